@@ -3,12 +3,22 @@ import pandas as pd
 import sys
 from Bio import SeqIO
 from Bio.Align import PairwiseAligner
+from ConSeqUMI.consensus.CompactBenchmarkOutput import CompactBenchmarkOutput
 
 pd.set_option("display.max_rows", None)
 
+
+def load_benchmark_dataframe(benchmarkPath):
+    if benchmarkPath.endswith(".npz"):
+        benchmarkDf = CompactBenchmarkOutput.load(benchmarkPath)
+    else:
+        benchmarkDf = pd.read_csv(benchmarkPath)
+    return benchmarkDf.rename(columns={"interval": "clusterSize"})
+
+
 benchmarkPath = sys.argv[1]
 # benchmarkPath = 'test/data/delete/newConsensus_lamassemble_benchmark-20221130-171853/benchmark.csv'
-df = pd.read_csv(benchmarkPath)
+df = load_benchmark_dataframe(benchmarkPath)
 df = df[["clusterSize", "levenshteinDistance"]]
 print(len(df) / len(set(df["clusterSize"])))
 df = df.groupby("clusterSize").mean()
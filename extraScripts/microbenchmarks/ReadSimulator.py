@@ -0,0 +1,140 @@
+import numpy as np
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
+
+NUCLEOTIDES = np.array([*"ACGT"])
+IUPAC_NUCLEOTIDES = {
+    "A": "A",
+    "C": "C",
+    "G": "G",
+    "T": "T",
+    "U": "T",
+    "W": "AT",
+    "S": "CG",
+    "R": "AG",
+    "Y": "CT",
+    "K": "GT",
+    "M": "AC",
+    "B": "CGT",
+    "D": "AGT",
+    "H": "ACT",
+    "V": "ACG",
+    "N": "ACGT",
+}
+NANOPORE_ERROR_PROFILE = {
+    "substitution": 0.02,
+    "insertion": 0.015,
+    "deletion": 0.025,
+    "homopolymerDeletion": 0.05,
+}
+
+
+class ReadSimulator:
+    def __init__(self, adapters, *args, **kwargs):
+        self.seed = kwargs.get("seed", 0)
+        self.rng = np.random.default_rng(self.seed)
+        self.umiLength = kwargs.get("umiLength", 18)
+        self.ampliconLength = kwargs.get("ampliconLength", 1000)
+        self.errorProfile = {
+            **NANOPORE_ERROR_PROFILE,
+            **kwargs.get("errorProfile", {}),
+        }
+        self.errorQuality = kwargs.get("errorQuality", 5)
+        self.matchQuality = kwargs.get("matchQuality", 20)
+        (
+            self.topFrontAdapter,
+            self.topBackAdapter,
+            self.bottomFrontAdapter,
+            self.bottomBackAdapter,
+        ) = [self.resolve_ambiguous_nucleotides(adapter) for adapter in adapters]
+
+    def resolve_ambiguous_nucleotides(self, sequence):
+        return "".join(
+            self.rng.choice([*IUPAC_NUCLEOTIDES[nucleotide]])
+            for nucleotide in sequence.upper()
+        )
+
+    def generate_random_sequence(self, length):
+        return "".join(self.rng.choice(NUCLEOTIDES, size=length))
+
+    def generate_molecule_sequence(self, ampliconSequence, topUmi, bottomUmi):
+        bottomEnd = str(
+            Seq(
+                self.bottomFrontAdapter + bottomUmi + self.bottomBackAdapter
+            ).reverse_complement()
+        )
+        return (
+            self.topFrontAdapter
+            + topUmi
+            + self.topBackAdapter
+            + ampliconSequence
+            + bottomEnd
+        )
+
+    def find_homopolymer_positions(self, sequence):
+        sequenceArray = np.frombuffer(sequence.encode(), dtype=np.uint8)
+        isRepeat = np.zeros(len(sequence), dtype=bool)
+        isRepeat[1:] = sequenceArray[1:] == sequenceArray[:-1]
+        isRepeat[:-1] |= isRepeat[1:]
+        return isRepeat
+
+    def add_sequencing_errors(self, sequence):
+        deletionRates = np.where(
+            self.find_homopolymer_positions(sequence),
+            self.errorProfile["homopolymerDeletion"],
+            self.errorProfile["deletion"],
+        )
+        draws = self.rng.random((3, len(sequence)))
+        readNucleotides, readQualities = [], []
+        for index, nucleotide in enumerate(sequence):
+            if draws[0, index] < self.errorProfile["insertion"]:
+                readNucleotides.append(self.rng.choice(NUCLEOTIDES))
+                readQualities.append(self.errorQuality)
+            if draws[1, index] < deletionRates[index]:
+                continue
+            if draws[2, index] < self.errorProfile["substitution"]:
+                nucleotide = self.rng.choice(NUCLEOTIDES[NUCLEOTIDES != nucleotide])
+                readQualities.append(self.errorQuality)
+            else:
+                readQualities.append(self.matchQuality)
+            readNucleotides.append(nucleotide)
+        return "".join(readNucleotides), readQualities
+
+    def generate_read_record(self, moleculeSequence, readId):
+        readSequence, readQualities = self.add_sequencing_errors(moleculeSequence)
+        return SeqRecord(
+            Seq(readSequence),
+            id=readId,
+            description="",
+            letter_annotations={"phred_quality": readQualities},
+        )
+
+    def generate_reads(self, umiCount, readsPerUmi):
+        ampliconSequence = self.generate_random_sequence(self.ampliconLength)
+        readRecords, umiPairs = [], []
+        for umiIndex in range(umiCount):
+            topUmi = self.generate_random_sequence(self.umiLength)
+            bottomUmi = self.generate_random_sequence(self.umiLength)
+            umiPairs.append((topUmi, bottomUmi))
+            moleculeSequence = self.generate_molecule_sequence(
+                ampliconSequence, topUmi, bottomUmi
+            )
+            strandSequences = [
+                moleculeSequence,
+                str(Seq(moleculeSequence).reverse_complement()),
+            ]
+            for readIndex in range(readsPerUmi):
+                readRecords.append(
+                    self.generate_read_record(
+                        strandSequences[self.rng.integers(2)],
+                        f"read_{umiIndex}_{readIndex}",
+                    )
+                )
+        readOrder = self.rng.permutation(len(readRecords))
+        return ampliconSequence, umiPairs, [readRecords[i] for i in readOrder]
+
+    def generate_target_records(self, ampliconSequence, readNumber):
+        return [
+            self.generate_read_record(ampliconSequence, f"target_{readIndex}")
+            for readIndex in range(readNumber)
+        ]
@@ -0,0 +1,279 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from collections import defaultdict
+import numpy as np
+from ReadSimulator import ReadSimulator
+from ConSeqUMI.conseq import AdapterFile
+from ConSeqUMI.umi.UmiExtractor import UmiExtractor
+from ConSeqUMI.umi import umiBinningFunctions
+from ConSeqUMI.consensus.ReferenceConsensusGenerator import (
+    ReferenceConsensusGenerator,
+)
+from ConSeqUMI.consensus.ConsensusStrategyPairwise import ConsensusStrategyPairwise
+
+defaultAdapterPath = os.path.join(os.path.dirname(__file__), "adapters.txt")
+
+
+def set_command_line_settings():
+    parser = argparse.ArgumentParser(
+        description="Time the UMI extraction, UMI pairing and consensus hot paths on simulated nanopore reads and store the timings as JSON."
+    )
+    parser.add_argument(
+        "-a",
+        "--adapters",
+        type=AdapterFile(),
+        default=AdapterFile()(defaultAdapterPath),
+        help="A text file with f, F, r, R adapters listed in order. Defaults to the adapters used in the tests.",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        default="microbenchmarks.json",
+        help="Path of the JSON file the timings are written to.",
+    )
+    parser.add_argument(
+        "-b",
+        "--baseline",
+        help="A JSON file written by an earlier run. Stages that got slower than the baseline by more than --tolerance are reported and the script exits with status 1.",
+    )
+    parser.add_argument(
+        "-t",
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed fractional slowdown against --baseline. Default 0.2.",
+    )
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument(
+        "-u",
+        "--umiCounts",
+        type=int,
+        nargs="+",
+        default=[50, 200, 800],
+        help="Number of UMI pairs simulated at each scale of the UMI stages.",
+    )
+    parser.add_argument("-rpu", "--readsPerUmi", type=int, default=5)
+    parser.add_argument(
+        "-d",
+        "--binDepths",
+        type=int,
+        nargs="+",
+        default=[10, 25, 50],
+        help="Number of reads in the simulated bin at each scale of the consensus stages.",
+    )
+    parser.add_argument("-l", "--ampliconLength", type=int, default=1000)
+    parser.add_argument("-ul", "--umiLength", type=int, default=18)
+    parser.add_argument("-sub", "--substitutionRate", type=float, default=0.02)
+    parser.add_argument("-ins", "--insertionRate", type=float, default=0.015)
+    parser.add_argument("-del", "--deletionRate", type=float, default=0.025)
+    parser.add_argument(
+        "-hdel",
+        "--homopolymerDeletionRate",
+        type=float,
+        default=0.05,
+        help="Deletion rate used instead of --deletionRate inside homopolymers.",
+    )
+    parser.add_argument(
+        "-r",
+        "--repeats",
+        type=int,
+        default=3,
+        help="Number of times each stage is timed at each scale.",
+    )
+    return parser
+
+
+def time_function(function, repeats):
+    seconds = []
+    for _ in range(repeats):
+        startTime = time.perf_counter()
+        result = function()
+        seconds.append(time.perf_counter() - startTime)
+    return result, seconds
+
+
+def find_umi_to_read_indices(readRecords, umiPairs, keptIndices):
+    topUmiToReadIndices = defaultdict(set)
+    bottomUmiToReadIndices = defaultdict(set)
+    for readIndex in keptIndices:
+        umiIndex = int(readRecords[readIndex].id.split("_")[1])
+        topUmi, bottomUmi = umiPairs[umiIndex]
+        topUmiToReadIndices[topUmi].add(readIndex)
+        bottomUmiToReadIndices[bottomUmi].add(readIndex)
+    return dict(topUmiToReadIndices), dict(bottomUmiToReadIndices)
+
+
+def run_umi_stages(readSimulator, adapters, umiLength, umiCount, readsPerUmi, repeats):
+    _, umiPairs, readRecords = readSimulator.generate_reads(umiCount, readsPerUmi)
+    umiExtractor = UmiExtractor(umiLength=umiLength)
+    umiExtractor.set_universal_top_and_bottom_linked_adapters(*adapters)
+    rawUmisAndTargetSequences, extractionSeconds = time_function(
+        lambda: umiExtractor.extract_umis_and_target_sequences_from_all_records(
+            readRecords
+        ),
+        repeats,
+    )
+    errorMarkers = umiBinningFunctions.identify_reads_that_are_missing_key_values(
+        *rawUmisAndTargetSequences
+    )
+    keptIndices = [i for i in range(len(errorMarkers)) if 1 not in errorMarkers[i]]
+    topUmiToReadIndices, bottomUmiToReadIndices = find_umi_to_read_indices(
+        readRecords, umiPairs, keptIndices
+    )
+    _, pairingSeconds = time_function(
+        lambda: umiBinningFunctions.pair_top_and_bottom_umi_by_matching_reads(
+            topUmiToReadIndices, bottomUmiToReadIndices
+        ),
+        repeats,
+    )
+    scale = {"umiCount": umiCount, "readsPerUmi": readsPerUmi}
+    return [
+        {
+            "stage": "UmiExtractor",
+            "scale": {**scale, "readNumber": len(readRecords)},
+            "seconds": extractionSeconds,
+        },
+        {
+            "stage": "pair_top_and_bottom_umi_by_matching_reads",
+            "scale": {**scale, "readNumber": len(keptIndices)},
+            "seconds": pairingSeconds,
+        },
+    ]
+
+
+def run_consensus_stages(readSimulator, binDepth, repeats):
+    ampliconSequence = readSimulator.generate_random_sequence(
+        readSimulator.ampliconLength
+    )
+    targetRecords = readSimulator.generate_target_records(ampliconSequence, binDepth)
+    targetSequences = [str(record.seq) for record in targetRecords]
+    referenceConsensusGenerator = ReferenceConsensusGenerator()
+    _, referenceSeconds = time_function(
+        lambda: referenceConsensusGenerator.generate_consensus_sequence(
+            targetSequences
+        ),
+        repeats,
+    )
+    consensusStrategyPairwise = ConsensusStrategyPairwise()
+    consensusRecord, pairwiseSeconds = time_function(
+        lambda: consensusStrategyPairwise.generate_consensus_record_from_biopython_records(
+            targetRecords
+        ),
+        repeats,
+    )
+    scale = {"binDepth": binDepth, "ampliconLength": readSimulator.ampliconLength}
+    return [
+        {
+            "stage": "ReferenceConsensusGenerator",
+            "scale": scale,
+            "seconds": referenceSeconds,
+        },
+        {
+            "stage": "ConsensusStrategyPairwise",
+            "scale": scale,
+            "seconds": pairwiseSeconds,
+            "consensusMatchesAmplicon": str(consensusRecord.seq) == ampliconSequence,
+        },
+    ]
+
+
+def create_read_simulator(args, errorProfile, stageNumber, scaleNumber):
+    return ReadSimulator(
+        args["adapters"],
+        seed=np.random.SeedSequence(args["seed"], spawn_key=(stageNumber, scaleNumber)),
+        umiLength=args["umiLength"],
+        ampliconLength=args["ampliconLength"],
+        errorProfile=errorProfile,
+    )
+
+
+def summarize_result(result):
+    result["minimumSeconds"] = min(result["seconds"])
+    result["medianSeconds"] = statistics.median(result["seconds"])
+    return result
+
+
+def find_result_key(result):
+    return result["stage"], json.dumps(result["scale"], sort_keys=True)
+
+
+def find_regressions(results, baselineResults, tolerance):
+    baselineSeconds = {
+        find_result_key(result): result["minimumSeconds"] for result in baselineResults
+    }
+    regressions = []
+    for result in results:
+        resultKey = find_result_key(result)
+        if resultKey not in baselineSeconds:
+            continue
+        ratio = result["minimumSeconds"] / max(baselineSeconds[resultKey], 1e-9)
+        print(f"{resultKey[0]} {resultKey[1]}: {ratio:.2f}x baseline")
+        if ratio > 1 + tolerance:
+            regressions.append((*resultKey, ratio))
+    return regressions
+
+
+def main(args):
+    errorProfile = {
+        "substitution": args["substitutionRate"],
+        "insertion": args["insertionRate"],
+        "deletion": args["deletionRate"],
+        "homopolymerDeletion": args["homopolymerDeletionRate"],
+    }
+    results = []
+    for umiCount in args["umiCounts"]:
+        results.extend(
+            run_umi_stages(
+                create_read_simulator(args, errorProfile, 0, umiCount),
+                args["adapters"],
+                args["umiLength"],
+                umiCount,
+                args["readsPerUmi"],
+                args["repeats"],
+            )
+        )
+    for binDepth in args["binDepths"]:
+        results.extend(
+            run_consensus_stages(
+                create_read_simulator(args, errorProfile, 1, binDepth),
+                binDepth,
+                args["repeats"],
+            )
+        )
+    results = [summarize_result(result) for result in results]
+    for result in results:
+        print(
+            f"{result['stage']} {json.dumps(result['scale'], sort_keys=True)}: {result['minimumSeconds']:.4f}s"
+        )
+    output = {
+        "metadata": {
+            "timestamp": time.strftime("%Y%m%d-%H%M%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "settings": {
+                key: value for key, value in args.items() if key != "baseline"
+            },
+        },
+        "results": results,
+    }
+    with open(args["output"], "w") as file:
+        json.dump(output, file, indent=2)
+    if not args["baseline"]:
+        return 0
+    with open(args["baseline"]) as file:
+        baselineResults = json.load(file)["results"]
+    regressions = find_regressions(results, baselineResults, args["tolerance"])
+    for stage, scale, ratio in regressions:
+        print(f"regression: {stage} {scale} is {ratio:.2f}x slower than baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(vars(set_command_line_settings().parse_args())))
@@ -0,0 +1,201 @@
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from tempfile import TemporaryFile
+from ConSeqUMI.config import EXTERNAL_PROCESS_RUNNER
+
+INVOCATION_RECORD_COLUMNS = [
+    "tool",
+    "attempt",
+    "returnCode",
+    "timedOut",
+    "wallTimeSeconds",
+    "maxRssKilobytes",
+]
+
+
+class ExternalProcessError(RuntimeError):
+    pass
+
+
+def kill_process_group(process):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+def find_exit_code_from_wait_status(status):
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+class ExternalProcessRunner:
+    def __init__(self, *args, **kwargs):
+        self.timeout = kwargs.get("timeout", EXTERNAL_PROCESS_RUNNER["timeout"])
+        self.retries = kwargs.get("retries", EXTERNAL_PROCESS_RUNNER["retries"])
+        self.logFile = kwargs.get("logFile", EXTERNAL_PROCESS_RUNNER["logFile"])
+        self.pollInterval = kwargs.get("pollInterval", 0.05)
+        self.invocationRecords = []
+
+    def write_process_input(self, processInput, inputText):
+        try:
+            processInput.write(inputText.encode())
+        except BrokenPipeError:
+            pass
+        finally:
+            try:
+                processInput.close()
+            except BrokenPipeError:
+                pass
+
+    def wait_for_process(self, process, startTime):
+        pollInterval = 0.001
+        timedOut = False
+        while True:
+            processId, status, resourceUsage = os.wait4(process.pid, os.WNOHANG)
+            if processId:
+                break
+            if self.timeout and time.perf_counter() - startTime > self.timeout:
+                kill_process_group(process)
+                processId, status, resourceUsage = os.wait4(process.pid, 0)
+                timedOut = True
+                break
+            time.sleep(pollInterval)
+            pollInterval = min(pollInterval * 2, self.pollInterval)
+        process.returncode = find_exit_code_from_wait_status(status)
+        maxRss = resourceUsage.ru_maxrss
+        if sys.platform == "darwin":
+            maxRss //= 1024
+        return timedOut, maxRss
+
+    def run_once(self, processCommands, inputText, attempt):
+        with TemporaryFile() as outputFile, TemporaryFile() as errorFile:
+            startTime = time.perf_counter()
+            process = subprocess.Popen(
+                processCommands,
+                stdin=subprocess.DEVNULL if inputText is None else subprocess.PIPE,
+                stdout=outputFile,
+                stderr=errorFile,
+                start_new_session=True,
+            )
+            if inputText is not None:
+                threading.Thread(
+                    target=self.write_process_input,
+                    args=(process.stdin, inputText),
+                    daemon=True,
+                ).start()
+            timedOut, maxRss = self.wait_for_process(process, startTime)
+            wallTime = time.perf_counter() - startTime
+            outputFile.seek(0)
+            errorFile.seek(0)
+            completedProcess = subprocess.CompletedProcess(
+                processCommands,
+                process.returncode,
+                outputFile.read(),
+                errorFile.read(),
+            )
+        self.record_invocation(
+            [
+                os.path.basename(processCommands[0]),
+                attempt,
+                process.returncode,
+                timedOut,
+                round(wallTime, 3),
+                maxRss,
+            ]
+        )
+        return completedProcess, timedOut
+
+    def record_invocation(self, invocationRecord):
+        self.invocationRecords.append(
+            dict(zip(INVOCATION_RECORD_COLUMNS, invocationRecord))
+        )
+        if self.logFile:
+            self.append_to_log_file(",".join(map(str, invocationRecord)) + os.linesep)
+
+    def append_to_log_file(self, logLine):
+        try:
+            fileDescriptor = os.open(
+                self.logFile, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND
+            )
+            logLine = ",".join(INVOCATION_RECORD_COLUMNS) + os.linesep + logLine
+        except FileExistsError:
+            fileDescriptor = os.open(self.logFile, os.O_WRONLY | os.O_APPEND)
+        with os.fdopen(fileDescriptor, "w") as file:
+            file.write(logLine)
+
+    def raise_external_process_error(
+        self, processCommands, completedProcess, timedOut, attempt
+    ):
+        if timedOut:
+            failure = f"timed out after {self.timeout} seconds"
+        else:
+            failure = f"exited with code {completedProcess.returncode}"
+        errorText = completedProcess.stderr.decode("utf8", errors="replace").strip()
+        raise ExternalProcessError(
+            f"{os.path.basename(processCommands[0])} {failure} after {attempt} attempt(s). Command: {' '.join(processCommands)}"
+            + (f"\n{errorText[-2000:]}" if errorText else "")
+        )
+
+    def run(self, processCommands, inputText=None):
+        for attempt in range(1, self.retries + 2):
+            completedProcess, timedOut = self.run_once(
+                processCommands, inputText, attempt
+            )
+            if completedProcess.returncode == 0 and not timedOut:
+                return completedProcess
+        self.raise_external_process_error(
+            processCommands, completedProcess, timedOut, attempt
+        )
+
+    async def run_once_async(self, processCommands, inputText, attempt):
+        startTime = time.perf_counter()
+        process = await asyncio.create_subprocess_exec(
+            *processCommands,
+            stdin=subprocess.DEVNULL if inputText is None else subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            start_new_session=True,
+        )
+        processInput = None if inputText is None else inputText.encode()
+        timedOut = False
+        try:
+            outputBytes, errorBytes = await asyncio.wait_for(
+                process.communicate(processInput), self.timeout or None
+            )
+        except asyncio.TimeoutError:
+            kill_process_group(process)
+            outputBytes, errorBytes = await process.communicate()
+            timedOut = True
+        wallTime = time.perf_counter() - startTime
+        self.record_invocation(
+            [
+                os.path.basename(processCommands[0]),
+                attempt,
+                process.returncode,
+                timedOut,
+                round(wallTime, 3),
+                "",
+            ]
+        )
+        completedProcess = subprocess.CompletedProcess(
+            processCommands, process.returncode, outputBytes, errorBytes
+        )
+        return completedProcess, timedOut
+
+    async def run_async(self, processCommands, inputText=None):
+        for attempt in range(1, self.retries + 2):
+            completedProcess, timedOut = await self.run_once_async(
+                processCommands, inputText, attempt
+            )
+            if completedProcess.returncode == 0 and not timedOut:
+                return completedProcess
+        self.raise_external_process_error(
+            processCommands, completedProcess, timedOut, attempt
+        )
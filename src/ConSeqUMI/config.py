@@ -1,2 +1,3 @@
 starcodeCommandLine = "starcode --seq-id -q"
 SCOMMAND = starcodeCommandLine.split()
+EXTERNAL_PROCESS_RUNNER = {"timeout": 0, "retries": 0, "logFile": ""}
@@ -0,0 +1,196 @@
+import numpy as np
+
+
+class BandedAligner:
+    def __init__(self, *args, **kwargs):
+        self.matchScore = kwargs.get("matchScore", 1)
+        self.mismatchScore = kwargs.get("mismatchScore", -1)
+        self.openGapScore = kwargs.get("openGapScore", -1)
+        self.extendGapScore = kwargs.get("extendGapScore", -0.5)
+        self.errorRate = kwargs.get("errorRate", 0.05)
+        self.minimumBandWidth = kwargs.get("minimumBandWidth", 20)
+
+    def determine_band_width(self, targetLength, queryLength):
+        expectedIndelDrift = 3 * np.sqrt(
+            self.errorRate * max(targetLength, queryLength)
+        )
+        return int(
+            abs(targetLength - queryLength)
+            + np.ceil(expectedIndelDrift)
+            + self.minimumBandWidth
+        )
+
+    def find_band_start_columns(self, targetLength, queryLength, bandWidth):
+        if targetLength == 0:
+            return np.array([-bandWidth], dtype=np.int64)
+        bandCenters = np.round(
+            np.arange(targetLength + 1) * queryLength / targetLength
+        ).astype(np.int64)
+        return bandCenters - bandWidth
+
+    def fill_horizontal_gap_row(self, openingScores, gapOffsets):
+        shiftedOpeningScores = np.empty(len(openingScores))
+        shiftedOpeningScores[0] = -np.inf
+        shiftedOpeningScores[1:] = openingScores[:-1] - gapOffsets[:-1]
+        return (
+            np.maximum.accumulate(shiftedOpeningScores)
+            + gapOffsets
+            - self.extendGapScore
+        )
+
+    def fill_band_matrices(self, targetCodes, queryCodes, bandStarts, bandWidth):
+        targetLength, queryLength = len(targetCodes), len(queryCodes)
+        bandLength = 2 * bandWidth + 1
+        bandShifts = np.diff(bandStarts)
+        padding = int(bandShifts.max()) + 1 if len(bandShifts) else 1
+        matrixShape = (targetLength + 1, bandLength + 2 * padding)
+        matchMatrix = np.full(matrixShape, -np.inf)
+        verticalGapMatrix = np.full(matrixShape, -np.inf)
+        horizontalGapMatrix = np.full(matrixShape, -np.inf)
+        paddedQueryCodes = np.zeros(queryLength + 2 * bandLength + 2, dtype=np.uint8)
+        paddedQueryCodes[bandLength + 1 : bandLength + 1 + queryLength] = queryCodes
+        gapOffsets = np.arange(bandLength) * self.extendGapScore
+        band = slice(padding, padding + bandLength)
+        firstValidOffset = -bandStarts[0]
+        matchMatrix[0, padding + firstValidOffset] = 0
+        horizontalGapRow = self.fill_horizontal_gap_row(
+            matchMatrix[0, band] + self.openGapScore, gapOffsets
+        )
+        horizontalGapRow[: firstValidOffset + 1] = -np.inf
+        horizontalGapRow[queryLength - bandStarts[0] + 1 :] = -np.inf
+        horizontalGapMatrix[0, band] = horizontalGapRow
+        for row in range(1, targetLength + 1):
+            bandStart = bandStarts[row]
+            previousBand = slice(
+                padding + bandStart - bandStarts[row - 1],
+                padding + bandStart - bandStarts[row - 1] + bandLength,
+            )
+            previousDiagonalBand = slice(previousBand.start - 1, previousBand.stop - 1)
+            previousMatchRow = matchMatrix[row - 1]
+            previousVerticalGapRow = verticalGapMatrix[row - 1]
+            previousHorizontalGapRow = horizontalGapMatrix[row - 1]
+            previousBestRow = np.maximum(
+                np.maximum(previousMatchRow, previousVerticalGapRow),
+                previousHorizontalGapRow,
+            )
+            queryStart = bandStart + bandLength
+            matchRow = previousBestRow[previousDiagonalBand] + np.where(
+                paddedQueryCodes[queryStart : queryStart + bandLength]
+                == targetCodes[row - 1],
+                self.matchScore,
+                self.mismatchScore,
+            )
+            verticalGapRow = np.maximum(
+                np.maximum(
+                    previousMatchRow[previousBand],
+                    previousHorizontalGapRow[previousBand],
+                )
+                + self.openGapScore,
+                previousVerticalGapRow[previousBand] + self.extendGapScore,
+            )
+            firstValidOffset = max(-bandStart, 0)
+            lastValidOffset = queryLength - bandStart
+            matchRow[: max(1 - bandStart, 0)] = -np.inf
+            verticalGapRow[:firstValidOffset] = -np.inf
+            if lastValidOffset < bandLength - 1:
+                matchRow[lastValidOffset + 1 :] = -np.inf
+                verticalGapRow[lastValidOffset + 1 :] = -np.inf
+            horizontalGapRow = self.fill_horizontal_gap_row(
+                np.maximum(matchRow, verticalGapRow) + self.openGapScore, gapOffsets
+            )
+            horizontalGapRow[: firstValidOffset + 1] = -np.inf
+            if lastValidOffset < bandLength - 1:
+                horizontalGapRow[lastValidOffset + 1 :] = -np.inf
+            matchMatrix[row, band] = matchRow
+            verticalGapMatrix[row, band] = verticalGapRow
+            horizontalGapMatrix[row, band] = horizontalGapRow
+        return (
+            matchMatrix[:, band],
+            verticalGapMatrix[:, band],
+            horizontalGapMatrix[:, band],
+        )
+
+    def trace_back_alignment_strings(
+        self, target, query, bandStarts, bandWidth, matrices
+    ):
+        matchMatrix, verticalGapMatrix, horizontalGapMatrix = matrices
+        lastOffset = 2 * bandWidth
+        row, column = len(target), len(query)
+        offset = column - bandStarts[row]
+        endScores = [matrix[row, offset] for matrix in matrices]
+        state = int(np.argmax(endScores))
+        score = endScores[state]
+        targetAlignment, indicator, queryAlignment = [], [], []
+        while row > 0 or column > 0:
+            offset = column - bandStarts[row]
+            if (offset == 0 and column > 0) or (
+                offset == lastOffset and column < len(query)
+            ):
+                return None
+            cellScore = matrices[state][row, offset]
+            if state == 0:
+                previousOffset = column - 1 - bandStarts[row - 1]
+                substitutionScore = (
+                    self.matchScore
+                    if target[row - 1] == query[column - 1]
+                    else self.mismatchScore
+                )
+                candidateStates = [(0, 0), (1, 0), (2, 0)]
+                previousRow, previousColumn = row - 1, column - 1
+                targetAlignment.append(target[row - 1])
+                queryAlignment.append(query[column - 1])
+                indicator.append("|" if target[row - 1] == query[column - 1] else ".")
+                scoreDifference = substitutionScore
+            elif state == 1:
+                previousOffset = column - bandStarts[row - 1]
+                candidateStates = [(0, 1), (2, 1), (1, 2)]
+                previousRow, previousColumn = row - 1, column
+                targetAlignment.append(target[row - 1])
+                queryAlignment.append("-")
+                indicator.append("-")
+            else:
+                previousOffset = offset - 1
+                candidateStates = [(0, 1), (1, 1), (2, 2)]
+                previousRow, previousColumn = row, column - 1
+                targetAlignment.append("-")
+                queryAlignment.append(query[column - 1])
+                indicator.append("-")
+            if not 0 <= previousOffset <= lastOffset:
+                return None
+            for candidateState, scoreType in candidateStates:
+                if scoreType != 0:
+                    scoreDifference = (
+                        self.openGapScore if scoreType == 1 else self.extendGapScore
+                    )
+                previousScore = matrices[candidateState][previousRow, previousOffset]
+                if abs(previousScore + scoreDifference - cellScore) < 1e-9:
+                    state = candidateState
+                    break
+            row, column = previousRow, previousColumn
+        return (
+            float(score),
+            "".join(targetAlignment[::-1]),
+            "".join(indicator[::-1]),
+            "".join(queryAlignment[::-1]),
+        )
+
+    def align(self, target, query):
+        bandWidth = self.determine_band_width(len(target), len(query))
+        bandStarts = self.find_band_start_columns(len(target), len(query), bandWidth)
+        targetCodes = np.frombuffer(target.encode(), dtype=np.uint8)
+        queryCodes = np.frombuffer(query.encode(), dtype=np.uint8)
+        matrices = self.fill_band_matrices(
+            targetCodes, queryCodes, bandStarts, bandWidth
+        )
+        bandedAlignment = self.trace_back_alignment_strings(
+            target, query, bandStarts, bandWidth, matrices
+        )
+        if bandedAlignment and self.exceeds_expected_divergence(bandedAlignment[2]):
+            return None
+        return bandedAlignment
+
+    def exceeds_expected_divergence(self, indelIndicator):
+        if len(indelIndicator) < self.minimumBandWidth:
+            return False
+        differenceCount = len(indelIndicator) - indelIndicator.count("|")
+        return differenceCount > 4 * self.errorRate * len(indelIndicator)
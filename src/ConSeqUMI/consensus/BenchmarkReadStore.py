@@ -0,0 +1,133 @@
+import os
+import json
+import shutil
+import tempfile
+import numpy as np
+from multiprocessing.util import Finalize
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
+from ConSeqUMI.consensus.ExternalProcessExecutor import (
+    find_scratch_root_directory,
+    initialize_external_process_worker,
+)
+
+BENCHMARK_READ_STORE = {"store": None}
+
+
+def initialize_benchmark_worker(readStoreDirectory, *externalProcessArguments):
+    initialize_external_process_worker(*externalProcessArguments)
+    BENCHMARK_READ_STORE["store"] = BenchmarkReadStore.attach(readStoreDirectory)
+
+
+class BenchmarkReadStore:
+    def __init__(
+        self,
+        storeDirectory,
+        sequences,
+        qualities,
+        offsets,
+        binOffsets,
+        ids,
+        referenceSequences,
+    ):
+        self.storeDirectory = storeDirectory
+        self.sequences = sequences
+        self.qualities = qualities
+        self.offsets = offsets
+        self.binOffsets = binOffsets
+        self.ids = ids
+        self.referenceSequences = referenceSequences
+        self.referenceSequence = referenceSequences[0]
+
+    @classmethod
+    def create(cls, binRecords, referenceSequence, storeDirectory=None):
+        return cls.create_from_bins([binRecords], [referenceSequence], storeDirectory)
+
+    @classmethod
+    def create_from_bins(cls, binRecordLists, referenceSequences, storeDirectory=None):
+        if storeDirectory is None:
+            storeDirectory = tempfile.mkdtemp(
+                prefix="conseq_benchmark_reads_delete_",
+                dir=find_scratch_root_directory(),
+            )
+            Finalize(
+                None,
+                shutil.rmtree,
+                args=(storeDirectory,),
+                kwargs={"ignore_errors": True},
+                exitpriority=0,
+            )
+        binRecords = [record for records in binRecordLists for record in records]
+        binOffsets = np.zeros(len(binRecordLists) + 1, dtype=np.int64)
+        np.cumsum([len(records) for records in binRecordLists], out=binOffsets[1:])
+        readLengths = np.array(
+            [len(record.seq) for record in binRecords], dtype=np.int64
+        )
+        offsets = np.zeros(len(binRecords) + 1, dtype=np.int64)
+        np.cumsum(readLengths, out=offsets[1:])
+        sequences = np.frombuffer(
+            "".join(str(record.seq) for record in binRecords).encode(), dtype=np.uint8
+        )
+        hasQualities = all(
+            "phred_quality" in record.letter_annotations for record in binRecords
+        )
+        qualities = np.zeros(len(sequences) if hasQualities else 0, dtype=np.uint8)
+        if hasQualities:
+            for record, start in zip(binRecords, offsets):
+                qualities[start : start + len(record)] = record.letter_annotations[
+                    "phred_quality"
+                ]
+        np.save(os.path.join(storeDirectory, "sequences.npy"), sequences)
+        np.save(os.path.join(storeDirectory, "qualities.npy"), qualities)
+        np.save(os.path.join(storeDirectory, "offsets.npy"), offsets)
+        np.save(os.path.join(storeDirectory, "binOffsets.npy"), binOffsets)
+        with open(os.path.join(storeDirectory, "metadata.json"), "w") as file:
+            json.dump(
+                {
+                    "ids": [record.id for record in binRecords],
+                    "referenceSequences": list(referenceSequences),
+                },
+                file,
+            )
+        return cls.attach(storeDirectory)
+
+    @classmethod
+    def attach(cls, storeDirectory):
+        arrays = [
+            np.load(os.path.join(storeDirectory, fileName), mmap_mode="r")
+            for fileName in [
+                "sequences.npy",
+                "qualities.npy",
+                "offsets.npy",
+                "binOffsets.npy",
+            ]
+        ]
+        with open(os.path.join(storeDirectory, "metadata.json")) as file:
+            metadata = json.load(file)
+        return cls(
+            storeDirectory, *arrays, metadata["ids"], metadata["referenceSequences"]
+        )
+
+    def __len__(self):
+        return self.find_bin_size(0)
+
+    def find_bin_size(self, binIndex):
+        return int(self.binOffsets[binIndex + 1] - self.binOffsets[binIndex])
+
+    def find_record(self, index, binIndex=0):
+        index += int(self.binOffsets[binIndex])
+        start, end = int(self.offsets[index]), int(self.offsets[index + 1])
+        record = SeqRecord(
+            Seq(self.sequences[start:end].tobytes().decode()), id=self.ids[index]
+        )
+        if len(self.qualities):
+            record.letter_annotations["phred_quality"] = self.qualities[
+                start:end
+            ].tolist()
+        return record
+
+    def find_records(self, indices, binIndex=0):
+        return [self.find_record(index, binIndex) for index in indices]
+
+    def remove(self):
+        shutil.rmtree(self.storeDirectory, ignore_errors=True)
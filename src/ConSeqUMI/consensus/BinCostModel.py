@@ -0,0 +1,93 @@
+import os
+import csv
+import numpy as np
+import pandas as pd
+
+
+class BinCostModel:
+    def __init__(self, *args, **kwargs):
+        self.consensusAlgorithm = kwargs.get("consensusAlgorithm", "")
+        self.minimumTimingCount = kwargs.get("minimumTimingCount", 3)
+        self.timingColumns = [
+            "consensusAlgorithm",
+            "path",
+            "readCount",
+            "meanReadLength",
+            "seconds",
+        ]
+        self.coefficients = None
+
+    def find_bin_features(self, binRecords):
+        readCount = len(binRecords)
+        meanReadLength = (
+            np.mean([len(record.seq) for record in binRecords]) if readCount else 0.0
+        )
+        return readCount, float(meanReadLength)
+
+    def find_feature_matrix(self, readCounts, meanReadLengths):
+        return np.column_stack(
+            [
+                np.ones(len(readCounts)),
+                np.log(np.maximum(readCounts, 1)),
+                np.log(np.maximum(meanReadLengths, 1)),
+            ]
+        )
+
+    def calibrate_from_timing_file(self, timingFile):
+        if not os.path.isfile(timingFile):
+            return False
+        timings = pd.read_csv(timingFile)
+        timings = timings[
+            (timings["consensusAlgorithm"] == self.consensusAlgorithm)
+            & (timings["seconds"] > 0)
+        ]
+        if len(timings) < self.minimumTimingCount:
+            return False
+        featureMatrix = self.find_feature_matrix(
+            timings["readCount"].to_numpy(dtype=float),
+            timings["meanReadLength"].to_numpy(dtype=float),
+        )
+        self.coefficients = np.linalg.lstsq(
+            featureMatrix, np.log(timings["seconds"].to_numpy(dtype=float)), rcond=None
+        )[0]
+        return True
+
+    def estimate_cost(self, binRecords):
+        readCount, meanReadLength = self.find_bin_features(binRecords)
+        if self.coefficients is None:
+            return readCount * meanReadLength
+        featureRow = self.find_feature_matrix([readCount], [meanReadLength])[0]
+        return float(np.exp(featureRow @ self.coefficients))
+
+    def sort_paths_by_expected_cost(self, paths, inputRecords):
+        return sorted(
+            sorted(paths),
+            key=lambda path: self.estimate_cost(inputRecords[path]),
+            reverse=True,
+        )
+
+    def record_timings(self, timingFile, paths, binRecordBatch, seconds):
+        binFeatures = [
+            self.find_bin_features(binRecords) for binRecords in binRecordBatch
+        ]
+        binSizes = [
+            readCount * meanReadLength for readCount, meanReadLength in binFeatures
+        ]
+        totalSize = sum(binSizes) or 1
+        writeHeader = not os.path.exists(timingFile)
+        with open(timingFile, "a", newline="") as file:
+            timingWriter = csv.writer(file)
+            if writeHeader:
+                timingWriter.writerow(self.timingColumns)
+            for path, (readCount, meanReadLength), binSize in zip(
+                paths, binFeatures, binSizes
+            ):
+                timingWriter.writerow(
+                    [
+                        self.consensusAlgorithm,
+                        path,
+                        readCount,
+                        round(meanReadLength, 1),
+                        round(seconds * binSize / totalSize, 4),
+                    ]
+                )
@@ -0,0 +1,111 @@
+import hashlib
+import numpy as np
+import pandas as pd
+from Levenshtein import editops
+
+
+class CompactBenchmarkOutput:
+    def __init__(self, outputPathStart):
+        self.resultsPath = outputPathStart + ".npz"
+        self.sequencesPath = outputPathStart + "-sequences.fasta"
+        self.columns = {
+            "interval": [],
+            "iteration": [],
+            "sequenceIndex": [],
+            "levenshteinDistance": [],
+            "substitutions": [],
+            "insertions": [],
+            "deletions": [],
+            "originalNumberOfSequences": [],
+        }
+        self.consensusAlgorithms = []
+        self.wallTimes = []
+        self.binNames = []
+        self.cachedConsensus = []
+        self.sequenceIndices = {}
+        self.sequenceHashes = []
+        self.errorBreakdowns = {}
+
+    def find_sequence_hash(self, sequence):
+        return hashlib.sha1(sequence.encode()).hexdigest()
+
+    def find_error_breakdown(self, referenceSequence, sequence):
+        errorCounts = {"replace": 0, "insert": 0, "delete": 0}
+        for operation, _, _ in editops(referenceSequence, sequence):
+            errorCounts[operation] += 1
+        return errorCounts["replace"], errorCounts["insert"], errorCounts["delete"]
+
+    def find_sequence_index(self, sequence, sequencesFile):
+        sequenceHash = self.find_sequence_hash(sequence)
+        if sequenceHash not in self.sequenceIndices:
+            self.sequenceIndices[sequenceHash] = len(self.sequenceHashes)
+            self.sequenceHashes.append(sequenceHash)
+            sequencesFile.write(f">{sequenceHash}\n{sequence}\n")
+        return self.sequenceIndices[sequenceHash]
+
+    def add_row(self, row, sequencesFile):
+        (
+            interval,
+            iteration,
+            referenceSequence,
+            sequence,
+            distance,
+            originalNumberOfSequences,
+            consensusAlgorithm,
+            wallTimeSeconds,
+            binName,
+            cachedConsensus,
+        ) = row
+        sequenceIndex = self.find_sequence_index(sequence, sequencesFile)
+        if (referenceSequence, sequenceIndex) not in self.errorBreakdowns:
+            self.errorBreakdowns[(referenceSequence, sequenceIndex)] = (
+                self.find_error_breakdown(referenceSequence, sequence)
+            )
+        substitutions, insertions, deletions = self.errorBreakdowns[
+            (referenceSequence, sequenceIndex)
+        ]
+        for column, value in [
+            ("interval", interval),
+            ("iteration", iteration),
+            ("sequenceIndex", sequenceIndex),
+            ("levenshteinDistance", distance),
+            ("substitutions", substitutions),
+            ("insertions", insertions),
+            ("deletions", deletions),
+            ("originalNumberOfSequences", originalNumberOfSequences),
+        ]:
+            self.columns[column].append(int(value))
+        self.consensusAlgorithms.append(consensusAlgorithm)
+        self.wallTimes.append(float(wallTimeSeconds))
+        self.binNames.append(binName)
+        self.cachedConsensus.append(cachedConsensus == str(True))
+
+    def write(self):
+        np.savez_compressed(
+            self.resultsPath,
+            sequenceHashes=np.array(self.sequenceHashes, dtype="S40"),
+            consensusAlgorithm=np.array(self.consensusAlgorithms, dtype="S"),
+            wallTimeSeconds=np.array(self.wallTimes, dtype=np.float64),
+            bin=np.array(self.binNames, dtype="S"),
+            cachedConsensus=np.array(self.cachedConsensus, dtype=bool),
+            **{
+                column: np.array(values, dtype=np.int32)
+                for column, values in self.columns.items()
+            },
+        )
+
+    @staticmethod
+    def load(resultsPath):
+        with np.load(resultsPath) as results:
+            benchmarkDf = pd.DataFrame(
+                {
+                    column: results[column]
+                    for column in results.files
+                    if column != "sequenceHashes"
+                }
+            )
+            for column in ["consensusAlgorithm", "bin"]:
+                benchmarkDf[column] = results[column].astype(str)
+            sequenceHashes = results["sequenceHashes"].astype(str)
+        benchmarkDf["sequenceHash"] = sequenceHashes[benchmarkDf["sequenceIndex"]]
+        return benchmarkDf
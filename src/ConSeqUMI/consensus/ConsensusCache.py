@@ -0,0 +1,105 @@
+import os
+import json
+import hashlib
+import tempfile
+from Bio import SeqIO
+from ConSeqUMI.consensus.config import CONSENSUS_CACHE
+
+CACHE_SIZES = {}
+
+
+class ConsensusCache:
+    def __init__(self, *args, **kwargs):
+        self.cacheDirectory = kwargs.get(
+            "cacheDirectory", CONSENSUS_CACHE["cacheDirectory"]
+        )
+        self.maximumSize = kwargs.get("maximumSize", CONSENSUS_CACHE["maximumSize"])
+        self.fileTypes = ["fastq", "fasta"]
+
+    def is_enabled(self):
+        return bool(self.cacheDirectory)
+
+    def find_cache_key(self, binRecords, consensusConfiguration):
+        cacheHash = hashlib.sha256()
+        cacheHash.update(
+            json.dumps(consensusConfiguration, sort_keys=True, default=str).encode()
+        )
+        for record in binRecords:
+            cacheHash.update(b"\n")
+            cacheHash.update(str(record.seq).encode())
+            qualities = record.letter_annotations.get("phred_quality")
+            if qualities is not None:
+                cacheHash.update(b"\t")
+                cacheHash.update(bytes(qualities))
+        return cacheHash.hexdigest()
+
+    def find_cache_path(self, cacheKey, fileType):
+        return os.path.join(self.cacheDirectory, f"{cacheKey}.{fileType}")
+
+    def load(self, cacheKey):
+        for fileType in self.fileTypes:
+            cachePath = self.find_cache_path(cacheKey, fileType)
+            try:
+                cachedRecord = next(SeqIO.parse(cachePath, fileType))
+                os.utime(cachePath)
+            except (FileNotFoundError, StopIteration, ValueError):
+                continue
+            return cachedRecord
+        return None
+
+    def store(self, cacheKey, consensusRecord):
+        fileType = (
+            "fastq"
+            if "phred_quality" in consensusRecord.letter_annotations
+            else "fasta"
+        )
+        fileDescriptor, temporaryPath = tempfile.mkstemp(
+            prefix=".conseq_cache_", dir=self.cacheDirectory
+        )
+        with os.fdopen(fileDescriptor, "w") as output_handle:
+            SeqIO.write([consensusRecord], output_handle, fileType)
+        cachePath = self.find_cache_path(cacheKey, fileType)
+        cacheSize = self.find_cache_size()
+        try:
+            cacheSize -= os.path.getsize(cachePath)
+        except FileNotFoundError:
+            pass
+        cacheSize += os.path.getsize(temporaryPath)
+        os.replace(temporaryPath, cachePath)
+        CACHE_SIZES[self.cacheDirectory] = cacheSize
+        if cacheSize > self.maximumSize:
+            self.evict_least_recently_used()
+
+    def find_cache_size(self):
+        if self.cacheDirectory not in CACHE_SIZES:
+            CACHE_SIZES[self.cacheDirectory] = sum(
+                fileSize for _, fileSize, _ in self.find_cache_entries()
+            )
+        return CACHE_SIZES[self.cacheDirectory]
+
+    def find_cache_entries(self):
+        cacheEntries = []
+        for directoryEntry in os.scandir(self.cacheDirectory):
+            if directoryEntry.name.startswith(".") or not directoryEntry.is_file():
+                continue
+            try:
+                fileStatus = directoryEntry.stat()
+            except FileNotFoundError:
+                continue
+            cacheEntries.append(
+                (fileStatus.st_mtime, fileStatus.st_size, directoryEntry.path)
+            )
+        return cacheEntries
+
+    def evict_least_recently_used(self):
+        cacheEntries = self.find_cache_entries()
+        cacheSize = sum(fileSize for _, fileSize, _ in cacheEntries)
+        for _, fileSize, cachePath in sorted(cacheEntries):
+            if cacheSize <= self.maximumSize:
+                break
+            try:
+                os.remove(cachePath)
+            except FileNotFoundError:
+                pass
+            cacheSize -= fileSize
+        CACHE_SIZES[self.cacheDirectory] = cacheSize
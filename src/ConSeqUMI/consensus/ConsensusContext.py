@@ -7,6 +7,9 @@ from ConSeqUMI.consensus.ConsensusStrategyLamassemble import (
 from ConSeqUMI.consensus.ConsensusStrategyMedaka import (
     ConsensusStrategyMedaka as MedakaStrategy,
 )
+from ConSeqUMI.consensus.ConsensusStrategyPoa import (
+    ConsensusStrategyPoa as PoaStrategy,
+)
 from ConSeqUMI.consensus.ConsensusStrategy import ConsensusStrategy as ConsensusStrategy
 from concurrent.futures import Future
 import typing as T
@@ -18,6 +21,7 @@ class ConsensusContext:
             "pairwise": PairwiseStrategy(),
             "lamassemble": LamassembleStrategy(),
             "medaka": MedakaStrategy(),
+            "poa": PoaStrategy(),
         }
         self._strategy = self._strategy_types[strategy]
 
@@ -32,11 +36,49 @@ class ConsensusContext:
     def generate_consensus_algorithm_path_header(self, processName: str):
         return self._strategy.generate_consensus_algorithm_path_header(processName)
 
+    def find_consensus_configuration(self) -> dict:
+        return self._strategy.find_consensus_configuration()
+
     def generate_consensus_record_from_biopython_records(self, binRecords: list) -> str:
         return self._strategy.generate_consensus_record_from_biopython_records(
             binRecords
         )
 
+    async def generate_consensus_record_from_biopython_records_async(
+        self, binRecords: list, processPool
+    ):
+        return (
+            await self._strategy.generate_consensus_record_from_biopython_records_async(
+                binRecords, processPool
+            )
+        )
+
+    def generate_consensus_records_from_biopython_record_batch(
+        self, binRecordBatch: list
+    ) -> list:
+        return self._strategy.generate_consensus_records_from_biopython_record_batch(
+            binRecordBatch
+        )
+
+    def create_benchmark_process_pool(
+        self, processNum: int, referenceSequence: str, binRecords: list
+    ):
+        return self._strategy.create_benchmark_process_pool(
+            processNum, referenceSequence, binRecords
+        )
+
+    def create_benchmark_process_pool_from_bins(
+        self, processNum: int, referenceSequences: list, binRecordLists: list
+    ):
+        return self._strategy.create_benchmark_process_pool_from_bins(
+            processNum, referenceSequences, binRecordLists
+        )
+
+    def find_benchmark_interval_numbers(self, binRecords: list, intervalNumbers: list):
+        return self._strategy.find_benchmark_interval_numbers(
+            binRecords, intervalNumbers
+        )
+
     def populate_future_processes_with_benchmark_tasks(
         self,
         futureProcesses: T.List[Future],
@@ -45,12 +87,14 @@ class ConsensusContext:
         binRecords: list,
         intervals: int,
         iterations: int,
+        seed: int = None,
     ):
-        self._strategy.populate_future_processes_with_benchmark_tasks(
+        return self._strategy.populate_future_processes_with_benchmark_tasks(
             futureProcesses,
             numProcesses,
             referenceSequence,
             binRecords,
             intervals,
             iterations,
+            seed,
         )
@@ -0,0 +1,61 @@
+import os
+import glob
+
+
+class ConsensusManifest:
+    def __init__(self, outputDirectory, *args, **kwargs):
+        self.outputDirectory = outputDirectory
+        self.manifestPath = os.path.join(
+            outputDirectory, kwargs.get("manifestName", "consensus_manifest.tsv")
+        )
+        self.completedPaths = set()
+        self.consensusFileOffset = 0
+
+    def load_completed_paths(self):
+        if not os.path.isfile(self.manifestPath):
+            return self.completedPaths
+        with open(self.manifestPath) as file:
+            for line in file:
+                if not line.endswith("\n"):
+                    break
+                consensusFileOffset, path = line.rstrip("\n").split("\t", 1)
+                self.completedPaths.add(path)
+                self.consensusFileOffset = max(
+                    self.consensusFileOffset, int(consensusFileOffset)
+                )
+        return self.completedPaths
+
+    def find_consensus_file_path(self, consensusFilePath):
+        fileName = os.path.basename(consensusFilePath)
+        fileNameStart = "-".join(fileName.split("-")[:-2])
+        fileType = fileName.split(".")[-1]
+        existingFilePaths = sorted(
+            glob.glob(
+                os.path.join(
+                    glob.escape(self.outputDirectory),
+                    f"{glob.escape(fileNameStart)}-*.{fileType}",
+                )
+            )
+        )
+        if existingFilePaths:
+            return existingFilePaths[-1]
+        return consensusFilePath
+
+    def open_consensus_file(self, consensusFilePath):
+        if not os.path.isfile(consensusFilePath):
+            return open(consensusFilePath, "w")
+        output_handle = open(consensusFilePath, "r+")
+        output_handle.truncate(self.consensusFileOffset)
+        output_handle.seek(self.consensusFileOffset)
+        return output_handle
+
+    def record_completed_paths(self, paths, output_handle):
+        output_handle.flush()
+        os.fsync(output_handle.fileno())
+        consensusFileOffset = output_handle.tell()
+        with open(self.manifestPath, "a") as file:
+            for path in paths:
+                file.write(f"{consensusFileOffset}\t{path}\n")
+            file.flush()
+            os.fsync(file.fileno())
+        self.completedPaths.update(paths)
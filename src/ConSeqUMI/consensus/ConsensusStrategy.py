@@ -1,11 +1,25 @@
 from abc import ABC, abstractmethod
+import asyncio
 import random
+import numpy as np
 from Levenshtein import distance
 import time
 from ConSeqUMI.Printer import Printer
 from concurrent.futures import ProcessPoolExecutor, Future, as_completed
 import typing as T
 from Bio.SeqRecord import SeqRecord
+from ConSeqUMI.consensus.config import EXTERNAL_PROCESS
+from ConSeqUMI.config import EXTERNAL_PROCESS_RUNNER
+from ConSeqUMI.consensus.ExternalProcessExecutor import (
+    create_external_process_slots,
+    find_consensus_settings,
+)
+from ConSeqUMI.consensus.ConsensusCache import ConsensusCache
+from ConSeqUMI.consensus.BenchmarkReadStore import (
+    BENCHMARK_READ_STORE,
+    BenchmarkReadStore,
+    initialize_benchmark_worker,
+)
 
 
 class ConsensusStrategy(ABC):
@@ -19,6 +33,26 @@ class ConsensusStrategy(ABC):
     ) -> SeqRecord:
         pass
 
+    def generate_consensus_records_from_biopython_record_batch(
+        self, binRecordBatch: list
+    ) -> T.List[SeqRecord]:
+        return [
+            self.generate_consensus_record_from_biopython_records(binRecords)
+            for binRecords in binRecordBatch
+        ]
+
+    async def generate_consensus_record_from_biopython_records_async(
+        self, binRecords: list, processPool: ProcessPoolExecutor
+    ) -> SeqRecord:
+        return await asyncio.get_running_loop().run_in_executor(
+            processPool,
+            self.generate_consensus_record_from_biopython_records,
+            binRecords,
+        )
+
+    def find_consensus_configuration(self) -> dict:
+        return {"algorithm": self.generate_consensus_algorithm_path_header_insert()}
+
     def generate_consensus_algorithm_path_header(self, processName: str):
         return (
             processName
@@ -27,6 +61,29 @@ class ConsensusStrategy(ABC):
             + time.strftime("-%Y%m%d-%H%M%S")
         )
 
+    def find_benchmarked_record(self, randomSampleOfRecords, intervalNumber):
+        if intervalNumber == 1:
+            return randomSampleOfRecords[0], False
+        consensusCache = ConsensusCache()
+        if not consensusCache.is_enabled():
+            return (
+                self.generate_consensus_record_from_biopython_records(
+                    randomSampleOfRecords
+                ),
+                False,
+            )
+        cacheKey = consensusCache.find_cache_key(
+            randomSampleOfRecords, self.find_consensus_configuration()
+        )
+        benchmarkedRecord = consensusCache.load(cacheKey)
+        if benchmarkedRecord is not None:
+            return benchmarkedRecord, True
+        benchmarkedRecord = self.generate_consensus_record_from_biopython_records(
+            randomSampleOfRecords
+        )
+        consensusCache.store(cacheKey, benchmarkedRecord)
+        return benchmarkedRecord, False
+
     def find_consensus_and_add_to_writing_queue(
         self,
         randomSampleOfRecords,
@@ -35,12 +92,25 @@ class ConsensusStrategy(ABC):
         referenceSequence,
         numBinRecords,
     ):
-        if intervalNumber == 1:
-            benchmarkedRecord = randomSampleOfRecords[0]
-        else:
-            benchmarkedRecord = self.generate_consensus_record_from_biopython_records(
-                randomSampleOfRecords
-            )
+        benchmarkedRecord, _ = self.find_benchmarked_record(
+            randomSampleOfRecords, intervalNumber
+        )
+        return self.find_benchmark_row(
+            benchmarkedRecord,
+            intervalNumber,
+            iteration,
+            referenceSequence,
+            numBinRecords,
+        )
+
+    def find_benchmark_row(
+        self,
+        benchmarkedRecord,
+        intervalNumber,
+        iteration,
+        referenceSequence,
+        numBinRecords,
+    ):
         benchmarkedSequence = str(benchmarkedRecord.seq)
         outputList = [
             str(intervalNumber),
@@ -52,6 +122,104 @@ class ConsensusStrategy(ABC):
         ]
         return outputList
 
+    def generate_nested_consensus_records_from_biopython_records(
+        self, binRecords: list, intervalNumbers: list
+    ) -> T.Iterator[SeqRecord]:
+        for intervalNumber in intervalNumbers:
+            if intervalNumber == 1:
+                yield binRecords[0]
+            else:
+                yield self.generate_consensus_record_from_biopython_records(
+                    binRecords[:intervalNumber]
+                )
+
+    def find_consensus_from_benchmark_read_store(
+        self, sampleIndices, intervalNumber, iteration, binIndex=0
+    ):
+        row, _ = self.find_consensus_and_cache_status_from_benchmark_read_store(
+            sampleIndices, intervalNumber, iteration, binIndex
+        )
+        return row
+
+    def find_consensus_and_cache_status_from_benchmark_read_store(
+        self, sampleIndices, intervalNumber, iteration, binIndex=0
+    ):
+        benchmarkReadStore = BENCHMARK_READ_STORE["store"]
+        benchmarkedRecord, isCached = self.find_benchmarked_record(
+            benchmarkReadStore.find_records(sampleIndices, binIndex), intervalNumber
+        )
+        row = self.find_benchmark_row(
+            benchmarkedRecord,
+            intervalNumber,
+            iteration,
+            benchmarkReadStore.referenceSequences[binIndex],
+            benchmarkReadStore.find_bin_size(binIndex),
+        )
+        return row, isCached
+
+    def generate_nested_benchmark_rows_from_benchmark_read_store(
+        self, sampleIndices, intervalNumbers, iteration, binIndex=0
+    ):
+        benchmarkReadStore = BENCHMARK_READ_STORE["store"]
+        nestedRecords = self.generate_nested_consensus_records_from_biopython_records(
+            benchmarkReadStore.find_records(sampleIndices, binIndex), intervalNumbers
+        )
+        for intervalNumber, benchmarkedRecord in zip(intervalNumbers, nestedRecords):
+            yield self.find_benchmark_row(
+                benchmarkedRecord,
+                intervalNumber,
+                iteration,
+                benchmarkReadStore.referenceSequences[binIndex],
+                benchmarkReadStore.find_bin_size(binIndex),
+            )
+
+    def create_benchmark_process_pool(
+        self, processNum: int, referenceSequence: str, binRecords: list
+    ):
+        return self.create_benchmark_process_pool_from_bins(
+            processNum, [referenceSequence], [binRecords]
+        )
+
+    def create_benchmark_process_pool_from_bins(
+        self, processNum: int, referenceSequences: list, binRecordLists: list
+    ):
+        benchmarkReadStore = BenchmarkReadStore.create_from_bins(
+            binRecordLists, referenceSequences
+        )
+        benchmarkGenerationProcessPool: ProcessPoolExecutor = ProcessPoolExecutor(
+            max_workers=processNum,
+            initializer=initialize_benchmark_worker,
+            initargs=(
+                benchmarkReadStore.storeDirectory,
+                create_external_process_slots(),
+                dict(EXTERNAL_PROCESS),
+                dict(EXTERNAL_PROCESS_RUNNER),
+                find_consensus_settings(),
+            ),
+        )
+        return benchmarkGenerationProcessPool, benchmarkReadStore
+
+    def find_benchmark_sample_indices(
+        self, numBinRecords, intervalNumber, iteration, seed=None, binKey=0
+    ):
+        if seed is None:
+            return random.sample(range(numBinRecords), k=intervalNumber)
+        randomGenerator = np.random.default_rng(
+            np.random.SeedSequence(seed, spawn_key=(binKey, intervalNumber, iteration))
+        )
+        return randomGenerator.choice(
+            numBinRecords, size=intervalNumber, replace=False
+        ).tolist()
+
+    def find_benchmark_interval_numbers(self, binRecords: list, intervalNumbers: list):
+        if len(intervalNumbers) == 1:
+            intervals = intervalNumbers[0]
+            intervalNumbers = [1]
+            for i in range(1, len(binRecords) // intervals + 1):
+                if i * intervals <= 500:
+                    intervalNumbers.append(i * intervals)
+        return intervalNumbers
+
     def populate_future_processes_with_benchmark_tasks(
         self,
         futureProcesses: T.List[Future],
@@ -60,26 +228,28 @@ class ConsensusStrategy(ABC):
         binRecords: list,
         intervalNumbers: list,
         iterations: int,
+        seed: int = None,
     ):
-        benchmarkGenerationProcessPool: ProcessPoolExecutor = ProcessPoolExecutor(
-            max_workers=processNum
+        (
+            benchmarkGenerationProcessPool,
+            benchmarkReadStore,
+        ) = self.create_benchmark_process_pool(
+            processNum, referenceSequence, binRecords
+        )
+        intervalNumbers = self.find_benchmark_interval_numbers(
+            binRecords, intervalNumbers
         )
-        if len(intervalNumbers) == 1:
-            intervals = intervalNumbers[0]
-            intervalNumbers = [1]
-            for i in range(1, len(binRecords) // intervals + 1):
-                if i * intervals <= 500:
-                    intervalNumbers.append(i * intervals)
         for intervalNumber in intervalNumbers:
             for iteration in range(iterations):
-                randomSampleOfRecords = random.sample(binRecords, k=intervalNumber)
+                sampleIndices = self.find_benchmark_sample_indices(
+                    len(binRecords), intervalNumber, iteration, seed
+                )
                 futureProcesses.append(
                     benchmarkGenerationProcessPool.submit(
-                        self.find_consensus_and_add_to_writing_queue,
-                        randomSampleOfRecords,
+                        self.find_consensus_from_benchmark_read_store,
+                        sampleIndices,
                         intervalNumber,
                         iteration,
-                        referenceSequence,
-                        len(binRecords),
                     )
                 )
+        return benchmarkReadStore
@@ -1,8 +1,10 @@
 from ConSeqUMI.consensus.ConsensusStrategy import ConsensusStrategy
-import subprocess
+from ConSeqUMI.consensus.ExternalProcessExecutor import (
+    ExternalProcessExecutor,
+    AsyncExternalProcessExecutor,
+)
 from Bio import SeqIO
 from io import StringIO
-from tempfile import NamedTemporaryFile
 from ConSeqUMI.consensus.config import LCOMMAND
 from ConSeqUMI.consensus.config import LAST_TRAIN_PATH
 
@@ -10,27 +12,50 @@ class ConsensusStrategyLamassemble(ConsensusStrategy):
     def generate_consensus_algorithm_path_header_insert(self) -> str:
         return "lamassemble"
 
-    def generate_consensus_record_from_biopython_records(self, binRecords: list) -> str:
-        inputFile = NamedTemporaryFile(
-            prefix="conseq_lamassemble_delete_", suffix=".fastq"
-        )
-        with open(inputFile.name, "w") as output_handle:
+    def find_consensus_configuration(self) -> dict:
+        processCommands = LCOMMAND[:]
+        processCommands[1] = LAST_TRAIN_PATH["ltp"]
+        return {
+            "algorithm": self.generate_consensus_algorithm_path_header_insert(),
+            "command": processCommands,
+        }
+
+    def write_input_file_and_find_process_commands(
+        self, externalProcessExecutor, binRecords: list
+    ) -> list:
+        inputFilePath = externalProcessExecutor.find_scratch_path("input.fastq")
+        with open(inputFilePath, "w") as output_handle:
             SeqIO.write(binRecords, output_handle, "fastq")
 
         LCOMMAND[1] = LAST_TRAIN_PATH["ltp"]
-        processCommands = LCOMMAND[:] + [inputFile.name]
-        child = subprocess.Popen(
-            processCommands,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-        )
-        # child.stdin.write(stdin.encode())
-        child_out = child.communicate()[0].decode("utf8")
+        return LCOMMAND[:] + [inputFilePath]
+
+    def find_consensus_record_from_lamassemble_output(self, child):
+        child_out = child.stdout.decode("utf8")
         seq_ali = list(SeqIO.parse(StringIO(child_out), "fasta"))
         if seq_ali:
-            child.stdin.close()
             return seq_ali[0].upper()
         seq_ali = list(SeqIO.parse(StringIO(child_out), "fastq"))
         if seq_ali:
-            child.stdin.close()
             return seq_ali[0].upper()
+
+    def generate_consensus_record_from_biopython_records(self, binRecords: list) -> str:
+        externalProcessExecutor = ExternalProcessExecutor("lamassemble")
+        processCommands = self.write_input_file_and_find_process_commands(
+            externalProcessExecutor, binRecords
+        )
+        child = externalProcessExecutor.run(processCommands)
+        return self.find_consensus_record_from_lamassemble_output(child)
+
+    async def generate_consensus_record_from_biopython_records_async(
+        self, binRecords: list, processPool
+    ) -> str:
+        externalProcessExecutor = AsyncExternalProcessExecutor("lamassemble")
+        try:
+            processCommands = self.write_input_file_and_find_process_commands(
+                externalProcessExecutor, binRecords
+            )
+            child = await externalProcessExecutor.run(processCommands)
+        finally:
+            externalProcessExecutor.remove_scratch_directory()
+        return self.find_consensus_record_from_lamassemble_output(child)
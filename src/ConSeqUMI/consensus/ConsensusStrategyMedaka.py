@@ -1,73 +1,259 @@
 from ConSeqUMI.consensus.ConsensusStrategy import ConsensusStrategy
 from ConSeqUMI.consensus.ReferenceConsensusGenerator import ReferenceConsensusGenerator
-import subprocess
+from ConSeqUMI.consensus.ExternalProcessExecutor import (
+    ExternalProcessExecutor,
+    AsyncExternalProcessExecutor,
+)
+from ConSeqUMI.ExternalProcessRunner import ExternalProcessError
+from ConSeqUMI.Printer import Printer
 from Bio.Seq import Seq
 from Bio.SeqRecord import SeqRecord
 from Bio import SeqIO
 from io import StringIO
-from tempfile import TemporaryDirectory, NamedTemporaryFile
-from os.path import exists
+import os
+import asyncio
 from ConSeqUMI.consensus.config import MCOMMAND
+from ConSeqUMI.consensus.config import MBATCHCOMMANDS
 import argparse
 
 
 class ConsensusStrategyMedaka(ConsensusStrategy):
-    def generate_consensus_algorithm_path_header_insert(self) -> str:
-        consensusAlgorithmInsert = "medaka"
+    def find_medaka_model(self):
         medakaParser = argparse.ArgumentParser(description="")
         medakaParser.add_argument("-m", type=str)
         args, unknown = medakaParser.parse_known_args(MCOMMAND)
         args = vars(args)
-        if args["m"]:
-            consensusAlgorithmInsert += "-" + args["m"]
+        return args["m"]
+
+    def generate_consensus_algorithm_path_header_insert(self) -> str:
+        consensusAlgorithmInsert = "medaka"
+        medakaModel = self.find_medaka_model()
+        if medakaModel:
+            consensusAlgorithmInsert += "-" + medakaModel
         return consensusAlgorithmInsert
 
-    def generate_consensus_record_from_biopython_records(self, binRecords: list) -> str:
-        inputFile = NamedTemporaryFile(prefix="conseq_medaka_delete_", suffix=".fastq")
-        outputDir = TemporaryDirectory(prefix="conseq_medaka_delete_")
-        draftFile = NamedTemporaryFile(prefix="conseq_medaka_delete_", suffix=".fasta")
-        with open(inputFile.name, "w") as output_handle:
-            SeqIO.write(binRecords, output_handle, "fastq")
+    def find_consensus_configuration(self) -> dict:
+        return {
+            "algorithm": self.generate_consensus_algorithm_path_header_insert(),
+            "command": MCOMMAND,
+            "batchCommands": MBATCHCOMMANDS,
+        }
+
+    def find_draft_record(self, binRecords: list) -> SeqRecord:
         binSequences = [str(record.seq) for record in binRecords]
         referenceConsensusGenerator = ReferenceConsensusGenerator()
         referenceSequence = referenceConsensusGenerator.generate_consensus_sequence(
             binSequences
         )
-        consensusRecords = [SeqRecord(Seq(referenceSequence), id="medaka_draft")]
+        return SeqRecord(Seq(referenceSequence), id="medaka_draft")
+
+    def write_input_file(self, externalProcessExecutor, binRecords: list) -> str:
+        inputFilePath = externalProcessExecutor.find_scratch_path("input.fastq")
+        with open(inputFilePath, "w") as output_handle:
+            SeqIO.write(binRecords, output_handle, "fastq")
+        return inputFilePath
+
+    def write_draft_file_and_find_process_commands(
+        self, externalProcessExecutor, inputFilePath, draftRecord
+    ) -> list:
+        draftFilePath = externalProcessExecutor.find_scratch_path("draft.fasta")
+        outputDirectoryPath = externalProcessExecutor.find_scratch_path("output")
+        consensusFilePath = os.path.join(outputDirectoryPath, "consensus.fasta")
+        with open(draftFilePath, "w") as output_handle:
+            SeqIO.write(
+                [draftRecord],
+                output_handle,
+                "fasta",
+            )
+        if os.path.exists(consensusFilePath):
+            os.remove(consensusFilePath)
+        processCommands = MCOMMAND[:]
+        processCommands += [
+            "-i",
+            inputFilePath,
+            "-d",
+            draftFilePath,
+            "-o",
+            outputDirectoryPath,
+        ]
+        return processCommands
+
+    def find_polished_record(self, externalProcessExecutor):
+        consensusFilePath = externalProcessExecutor.find_scratch_path(
+            os.path.join("output", "consensus.fasta")
+        )
+        if not os.path.exists(consensusFilePath):
+            return None
+        medakaOutputRecords = [
+            record for record in SeqIO.parse(consensusFilePath, "fasta")
+        ]
+        if len(medakaOutputRecords) == 0:
+            return None
+        return medakaOutputRecords[0]
+
+    def generate_consensus_record_from_biopython_records(self, binRecords: list) -> str:
+        externalProcessExecutor = ExternalProcessExecutor("medaka")
+        inputFilePath = self.write_input_file(externalProcessExecutor, binRecords)
+        consensusRecords = [self.find_draft_record(binRecords)]
         while len(consensusRecords) < 5:
-            with open(draftFile.name, "w") as output_handle:
-                SeqIO.write(
-                    [consensusRecords[-1]],
-                    output_handle,
-                    "fasta",
+            processCommands = self.write_draft_file_and_find_process_commands(
+                externalProcessExecutor, inputFilePath, consensusRecords[-1]
+            )
+            try:
+                externalProcessExecutor.run(processCommands)
+            except ExternalProcessError as error:
+                Printer()(f"medaka failed, keeping the previous draft: {error}")
+                return consensusRecords[-1]
+            polishedRecord = self.find_polished_record(externalProcessExecutor)
+            if polishedRecord is None:
+                return consensusRecords[-1]
+            consensusRecords.append(polishedRecord)
+            if str(consensusRecords[-1].seq) == str(consensusRecords[-2].seq):
+                return consensusRecords[-1]
+        return consensusRecords[-1]
+
+    async def generate_consensus_record_from_biopython_records_async(
+        self, binRecords: list, processPool
+    ) -> str:
+        consensusRecords = [
+            await asyncio.get_running_loop().run_in_executor(
+                processPool, self.find_draft_record, binRecords
+            )
+        ]
+        externalProcessExecutor = AsyncExternalProcessExecutor("medaka")
+        try:
+            inputFilePath = self.write_input_file(externalProcessExecutor, binRecords)
+            while len(consensusRecords) < 5:
+                processCommands = self.write_draft_file_and_find_process_commands(
+                    externalProcessExecutor, inputFilePath, consensusRecords[-1]
                 )
-            processCommands = MCOMMAND[:]
-            processCommands += [
-                "-i",
-                inputFile.name,
-                "-d",
-                draftFile.name,
-                "-o",
-                outputDir.name,
+                try:
+                    await externalProcessExecutor.run(processCommands)
+                except ExternalProcessError as error:
+                    Printer()(f"medaka failed, keeping the previous draft: {error}")
+                    break
+                polishedRecord = self.find_polished_record(externalProcessExecutor)
+                if polishedRecord is None:
+                    break
+                consensusRecords.append(polishedRecord)
+                if str(consensusRecords[-1].seq) == str(consensusRecords[-2].seq):
+                    break
+        finally:
+            externalProcessExecutor.remove_scratch_directory()
+        return consensusRecords[-1]
+
+    def polish_draft_records_in_single_medaka_run(
+        self, externalProcessExecutor, draftRecords, readFilePaths
+    ):
+        draftFilePath = externalProcessExecutor.find_scratch_path("draft.fasta")
+        with open(draftFilePath, "w") as output_handle:
+            SeqIO.write(draftRecords, output_handle, "fasta")
+        alignmentFilePaths = []
+        for draftRecord, readFilePath in zip(draftRecords, readFilePaths):
+            binDraftFilePath = externalProcessExecutor.find_scratch_path(
+                draftRecord.id + ".fasta"
+            )
+            with open(binDraftFilePath, "w") as output_handle:
+                SeqIO.write([draftRecord], output_handle, "fasta")
+            alignmentPrefix = externalProcessExecutor.find_scratch_path(
+                draftRecord.id + "_calls_to_draft"
+            )
+            externalProcessExecutor.run(
+                MBATCHCOMMANDS["align"]
+                + ["-i", readFilePath, "-r", binDraftFilePath, "-p", alignmentPrefix]
+            )
+            alignmentFilePaths.append(alignmentPrefix + ".bam")
+        mergedAlignmentFilePath = externalProcessExecutor.find_scratch_path(
+            "calls_to_draft.bam"
+        )
+        probabilityFilePath = externalProcessExecutor.find_scratch_path(
+            "consensus_probs.hdf"
+        )
+        consensusFilePath = externalProcessExecutor.find_scratch_path("consensus.fasta")
+        for filePath in [probabilityFilePath, consensusFilePath]:
+            if os.path.exists(filePath):
+                os.remove(filePath)
+        externalProcessExecutor.run(
+            MBATCHCOMMANDS["merge"] + [mergedAlignmentFilePath] + alignmentFilePaths
+        )
+        externalProcessExecutor.run(MBATCHCOMMANDS["index"] + [mergedAlignmentFilePath])
+        externalProcessExecutor.run(
+            MBATCHCOMMANDS["inference"]
+            + [
+                mergedAlignmentFilePath,
+                probabilityFilePath,
+                "--model",
+                self.find_medaka_model(),
             ]
-            child = subprocess.Popen(
-                processCommands,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
+        )
+        externalProcessExecutor.run(
+            MBATCHCOMMANDS["stitch"]
+            + [probabilityFilePath, draftFilePath, consensusFilePath]
+        )
+        polishedRecordPieces = {}
+        if not os.path.exists(consensusFilePath):
+            return polishedRecordPieces
+        for record in SeqIO.parse(consensusFilePath, "fasta"):
+            polishedRecordPieces.setdefault(record.id.split(":")[0], []).append(record)
+        return polishedRecordPieces
+
+    def generate_consensus_records_from_biopython_record_batch(
+        self, binRecordBatch: list
+    ) -> list:
+        if len(binRecordBatch) == 1 or self.find_medaka_model() is None:
+            return [
+                self.generate_consensus_record_from_biopython_records(binRecords)
+                for binRecords in binRecordBatch
+            ]
+        externalProcessExecutor = ExternalProcessExecutor("medaka")
+        readFilePaths = []
+        consensusRecords = []
+        referenceConsensusGenerator = ReferenceConsensusGenerator()
+        for binIndex, binRecords in enumerate(binRecordBatch):
+            readFilePath = externalProcessExecutor.find_scratch_path(
+                f"input_bin{binIndex}.fastq"
+            )
+            with open(readFilePath, "w") as output_handle:
+                SeqIO.write(binRecords, output_handle, "fastq")
+            readFilePaths.append(readFilePath)
+            referenceSequence = referenceConsensusGenerator.generate_consensus_sequence(
+                [str(record.seq) for record in binRecords]
             )
-            child.stdin.close()
-            if exists(outputDir.name + "/consensus.fasta"):
-                medakaOutputRecords = [
-                    record
-                    for record in SeqIO.parse(
-                        outputDir.name + "/consensus.fasta", "fasta"
+            consensusRecords.append(
+                SeqRecord(Seq(referenceSequence), id=f"bin{binIndex}")
+            )
+        unconvergedBinIndices = list(range(len(binRecordBatch)))
+        for _ in range(4):
+            try:
+                polishedRecordPieces = self.polish_draft_records_in_single_medaka_run(
+                    externalProcessExecutor,
+                    [consensusRecords[binIndex] for binIndex in unconvergedBinIndices],
+                    [readFilePaths[binIndex] for binIndex in unconvergedBinIndices],
+                )
+            except ExternalProcessError as error:
+                Printer()(f"medaka failed, keeping the previous drafts: {error}")
+                break
+            nextUnconvergedBinIndices = []
+            for binIndex in unconvergedBinIndices:
+                polishedRecords = polishedRecordPieces.get(f"bin{binIndex}", [])
+                if len(polishedRecords) > 1:
+                    binRecords = binRecordBatch[binIndex]
+                    consensusRecord = (
+                        self.generate_consensus_record_from_biopython_records(
+                            binRecords
+                        )
                     )
-                ]
-                if len(medakaOutputRecords) == 0:
-                    return consensusRecords[-1]
-                consensusRecords.append(medakaOutputRecords[0])
-                if str(consensusRecords[-1].seq) == str(consensusRecords[-2].seq):
-                    return consensusRecords[-1]
-            else:
-                return consensusRecords[-1]
-        return consensusRecords[-1]
+                    consensusRecord.id = f"bin{binIndex}"
+                    consensusRecords[binIndex] = consensusRecord
+                    continue
+                if len(polishedRecords) == 0 or len(polishedRecords[0].seq) == 0:
+                    continue
+                polishedRecord = polishedRecords[0]
+                if str(polishedRecord.seq) != str(consensusRecords[binIndex].seq):
+                    nextUnconvergedBinIndices.append(binIndex)
+                polishedRecord.id = f"bin{binIndex}"
+                consensusRecords[binIndex] = polishedRecord
+            unconvergedBinIndices = nextUnconvergedBinIndices
+            if not unconvergedBinIndices:
+                break
+        return consensusRecords
@@ -1,13 +1,28 @@
 from ConSeqUMI.consensus.ConsensusStrategy import ConsensusStrategy
 from ConSeqUMI.consensus.ReferenceConsensusGenerator import ReferenceConsensusGenerator
+from ConSeqUMI.consensus.BandedAligner import BandedAligner
+from ConSeqUMI.consensus.PairwiseAlignmentCache import PairwiseAlignmentCache
 from Bio.Align import PairwiseAligner
 from statistics import mean
 from ConSeqUMI.consensus.consensusStrategyPairwiseFunctions import (
     identify_differences_from_indices,
     find_in_string_indices_of_character,
+    find_insertion_columns,
     inject_difference_into_sequence,
+    find_window_boundaries,
+    map_target_indices_to_query_indices,
+    find_aligned_blocks_from_alignment_strings,
+    find_runs_of_character,
+    find_base_counts_before_columns,
+    find_summed_qualities_of_column_runs,
+    encode_differences,
+    count_matching_reads_at_each_position,
+    convert_match_counts_to_phred_qualities,
 )
-from collections import Counter
+from ConSeqUMI.consensus.config import PAIRWISE_WINDOW
+from ConSeqUMI.consensus.config import BANDED_ALIGNMENT
+from ConSeqUMI.consensus.config import PAIRWISE_VOTING
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import re
 from Bio.Seq import Seq
@@ -21,10 +36,40 @@ class ConsensusStrategyPairwise(ConsensusStrategy):
         aligner.open_gap_score = -1
         aligner.extend_gap_score = -0.5
         self.aligner = aligner
+        self.scoreOnlySupportFraction = 0.3
+        self.incrementalRealignment = True
+        self.qualityWeightedVoting = PAIRWISE_VOTING["qualityWeightedVoting"]
+        self.maximumConsensusQuality = 60
+        self.alignmentMemo = None
+        self.bandedAligner = BandedAligner(
+            matchScore=aligner.match_score,
+            mismatchScore=aligner.mismatch_score,
+            openGapScore=aligner.open_gap_score,
+            extendGapScore=aligner.extend_gap_score,
+            errorRate=BANDED_ALIGNMENT["errorRate"],
+            minimumBandWidth=BANDED_ALIGNMENT["minimumBandWidth"],
+        )
 
     def generate_consensus_algorithm_path_header_insert(self) -> str:
         return "pairwise"
 
+    def find_consensus_configuration(self) -> dict:
+        return {
+            "algorithm": self.generate_consensus_algorithm_path_header_insert(),
+            "alignerScores": [
+                self.aligner.match_score,
+                self.aligner.mismatch_score,
+                self.aligner.open_gap_score,
+                self.aligner.extend_gap_score,
+            ],
+            "scoreOnlySupportFraction": self.scoreOnlySupportFraction,
+            "qualityWeightedVoting": self.qualityWeightedVoting,
+            "maximumConsensusQuality": self.maximumConsensusQuality,
+            "windowLength": PAIRWISE_WINDOW["windowLength"],
+            "overlapLength": PAIRWISE_WINDOW["overlapLength"],
+            "bandedAlignment": BANDED_ALIGNMENT,
+        }
+
     def break_down_alignment_to_strings(self, alignment):
         alignmentString = alignment.format()
         if "target" in alignmentString:
@@ -61,17 +106,92 @@ class ConsensusStrategyPairwise(ConsensusStrategy):
             ) = alignment.format().split("\n")
         return originalSequenceAlignment, indelIndicator, differentSequenceAlignment
 
-    def find_pairwise_score_and_all_differences_between_two_sequences(
+    def find_pairwise_score_and_alignment_strings_between_two_sequences(
         self, originalSequence, differentSequence
     ):
+        if self.alignmentMemo is not None:
+            memoKey = (originalSequence, differentSequence)
+            if memoKey not in self.alignmentMemo:
+                self.alignmentMemo[memoKey] = self.find_pairwise_alignment(
+                    originalSequence, differentSequence
+                )
+            return self.alignmentMemo[memoKey]
+        return self.find_pairwise_alignment(originalSequence, differentSequence)
+
+    def find_pairwise_alignment(self, originalSequence, differentSequence):
+        if len(originalSequence) >= BANDED_ALIGNMENT["minimumSequenceLength"]:
+            bandedAlignment = self.bandedAligner.align(
+                originalSequence, differentSequence
+            )
+            if bandedAlignment:
+                return bandedAlignment
         alignments = self.aligner.align(originalSequence, differentSequence)
         alignment = alignments[0]
+        return (alignment.score, *self.break_down_alignment_to_strings(alignment))
+
+    def find_pairwise_score_and_all_differences_between_two_sequences(
+        self, originalSequence, differentSequence
+    ):
         (
-            originalSequenceAlignment,
-            indelIndicator,
-            differentSequenceAlignment,
-        ) = self.break_down_alignment_to_strings(alignment)
+            score,
+            differencesFromOriginal,
+            _,
+        ) = self.find_pairwise_score_and_all_weighted_differences_between_two_sequences(
+            originalSequence, differentSequence
+        )
+        return score, differencesFromOriginal
+
+    def find_pairwise_score_and_all_weighted_differences_between_two_sequences(
+        self, originalSequence, differentSequence, differentQualities=None
+    ):
+        (
+            score,
+            *alignmentStrings,
+        ) = self.find_pairwise_score_and_alignment_strings_between_two_sequences(
+            originalSequence, differentSequence
+        )
+        return (
+            score,
+            *self.find_all_weighted_differences_from_alignment_strings(
+                *alignmentStrings, differentQualities
+            ),
+        )
+
+    def find_all_weighted_differences_from_alignment_strings(
+        self,
+        originalSequenceAlignment,
+        indelIndicator,
+        differentSequenceAlignment,
+        differentQualities=None,
+    ):
+        differencesFromOriginal = self.find_all_differences_from_alignment_strings(
+            originalSequenceAlignment, indelIndicator, differentSequenceAlignment
+        )
+        if differentQualities is None:
+            return differencesFromOriginal, np.ones(len(differencesFromOriginal))
+        qualityPrefixSums = np.concatenate([[0], np.cumsum(differentQualities)])
+        basesBeforeColumns = find_base_counts_before_columns(differentSequenceAlignment)
+        differenceWeights = np.concatenate(
+            [
+                find_summed_qualities_of_column_runs(
+                    *find_runs_of_character(alignmentString, character),
+                    basesBeforeColumns,
+                    qualityPrefixSums,
+                )
+                for alignmentString, character in [
+                    (originalSequenceAlignment, "-"),
+                    (differentSequenceAlignment, "-"),
+                    (indelIndicator, "."),
+                ]
+            ]
+        )
+        return differencesFromOriginal, differenceWeights
+
+    def find_all_differences_from_alignment_strings(
+        self, originalSequenceAlignment, indelIndicator, differentSequenceAlignment
+    ):
         differencesFromOriginal = []
+        insertionColumns = find_insertion_columns(originalSequenceAlignment)
         insertionIndices = find_in_string_indices_of_character(
             originalSequenceAlignment, "-"
         )
@@ -81,6 +201,7 @@ class ConsensusStrategyPairwise(ConsensusStrategy):
                 insertionIndices,
                 originalSequenceAlignment,
                 differentSequenceAlignment,
+                insertionColumns,
             )
         )
 
@@ -89,7 +210,11 @@ class ConsensusStrategyPairwise(ConsensusStrategy):
         )
         differencesFromOriginal.extend(
             identify_differences_from_indices(
-                "deletion", deletionIndices, originalSequenceAlignment, ""
+                "deletion",
+                deletionIndices,
+                originalSequenceAlignment,
+                "",
+                insertionColumns,
             )
         )
 
@@ -100,59 +225,494 @@ class ConsensusStrategyPairwise(ConsensusStrategy):
                 mutationIndices,
                 originalSequenceAlignment,
                 differentSequenceAlignment,
+                insertionColumns,
             )
         )
 
-        return alignment.score, differencesFromOriginal
+        return differencesFromOriginal
 
     def find_average_pairwise_alignment_score_and_all_differences_between_candidate_sequence_and_binned_sequences(
         self, candidateSequence, readSequences
     ):
+        (
+            averageScore,
+            allReadSequenceDifferences,
+            _,
+        ) = self.find_average_pairwise_alignment_score_and_all_weighted_differences_between_candidate_sequence_and_binned_sequences(
+            candidateSequence, readSequences
+        )
+        return averageScore, allReadSequenceDifferences
+
+    def find_average_pairwise_alignment_score_and_all_weighted_differences_between_candidate_sequence_and_binned_sequences(
+        self, candidateSequence, readSequences, readQualities=None
+    ):
+        if readQualities is None:
+            readQualities = [None] * len(readSequences)
         alignedScores = []
         allReadSequenceDifferences = []
-        for readSequence in readSequences:
+        allReadSequenceDifferenceWeights = []
+        for readSequence, readSequenceQualities in zip(readSequences, readQualities):
             (
                 score,
                 readSequenceDifferences,
-            ) = self.find_pairwise_score_and_all_differences_between_two_sequences(
-                candidateSequence, readSequence
+                readSequenceDifferenceWeights,
+            ) = self.find_pairwise_score_and_all_weighted_differences_between_two_sequences(
+                candidateSequence, readSequence, readSequenceQualities
             )
             alignedScores.append(score)
             allReadSequenceDifferences.extend(readSequenceDifferences)
-        return mean(alignedScores), allReadSequenceDifferences
+            allReadSequenceDifferenceWeights.append(readSequenceDifferenceWeights)
+        return (
+            mean(alignedScores),
+            allReadSequenceDifferences,
+            np.concatenate(allReadSequenceDifferenceWeights),
+        )
 
-    def generate_consensus_record_from_biopython_records(self, binRecords: list) -> str:
-        binSequences = [str(record.seq) for record in binRecords]
-        referenceConsensusGenerator = ReferenceConsensusGenerator()
-        referenceSequence = referenceConsensusGenerator.generate_consensus_sequence(
-            binSequences
+    def find_best_supported_difference(self, differences, differenceWeights):
+        differenceCodes, firstIndices = encode_differences(differences)
+        differenceSupport = np.bincount(differenceCodes, weights=differenceWeights)
+        bestSupportedCodes = np.flatnonzero(
+            differenceSupport == differenceSupport.max()
         )
-        bestScore = -np.inf
-        candidateSequence = referenceSequence[:]
+        return differences[firstIndices[bestSupportedCodes].min()]
+
+    def find_pairwise_score_between_two_sequences(
+        self, originalSequence, differentSequence
+    ):
+        return self.aligner.score(originalSequence, differentSequence)
+
+    def find_average_pairwise_alignment_score_between_candidate_sequence_and_binned_sequences(
+        self, candidateSequence, readSequences
+    ):
+        return mean(
+            self.find_pairwise_score_between_two_sequences(
+                candidateSequence, readSequence
+            )
+            for readSequence in readSequences
+        )
+
+    def find_pairwise_alignments_between_candidate_sequence_and_binned_sequences(
+        self, candidateSequence, readSequences
+    ):
+        return [
+            self.find_pairwise_score_and_alignment_strings_between_two_sequences(
+                candidateSequence, readSequence
+            )
+            for readSequence in readSequences
+        ]
+
+    def find_all_weighted_differences_in_cached_alignments(
+        self, alignmentCache, version, readQualities=None
+    ):
+        return self.find_all_weighted_differences_in_alignments(
+            alignmentCache.find_alignments(version), readQualities
+        )
+
+    def find_all_weighted_differences_in_alignments(
+        self, alignments, readQualities=None
+    ):
+        if readQualities is None:
+            readQualities = [None] * len(alignments)
+        allReadSequenceDifferences = []
+        allReadSequenceDifferenceWeights = []
+        for (_, *alignmentStrings), readSequenceQualities in zip(
+            alignments, readQualities
+        ):
+            (
+                readSequenceDifferences,
+                readSequenceDifferenceWeights,
+            ) = self.find_all_weighted_differences_from_alignment_strings(
+                *alignmentStrings, readSequenceQualities
+            )
+            allReadSequenceDifferences.extend(readSequenceDifferences)
+            allReadSequenceDifferenceWeights.append(readSequenceDifferenceWeights)
+        return allReadSequenceDifferences, np.concatenate(
+            allReadSequenceDifferenceWeights
+        )
+
+    def polish_candidate_sequence_with_alignment_cache(
+        self, candidateSequence, readSequences, readQualities=None
+    ):
+        return self.polish_candidate_sequence_and_alignments_with_alignment_cache(
+            candidateSequence, readSequences, readQualities
+        )[0]
+
+    def polish_candidate_sequence_and_alignments_with_alignment_cache(
+        self, candidateSequence, readSequences, readQualities=None
+    ):
+        alignmentCache = PairwiseAlignmentCache(
+            self.find_pairwise_score_and_alignment_strings_between_two_sequences,
+            score_sequences=self.find_pairwise_score_between_two_sequences,
+            matchScore=self.aligner.match_score,
+            mismatchScore=self.aligner.mismatch_score,
+            openGapScore=self.aligner.open_gap_score,
+            extendGapScore=self.aligner.extend_gap_score,
+        )
+        currentVersion = alignmentCache.add_candidate_version(
+            candidateSequence, readSequences
+        )
+        isFullyAligned = True
         (
-            currentScore,
             currentDifferences,
-        ) = self.find_average_pairwise_alignment_score_and_all_differences_between_candidate_sequence_and_binned_sequences(
-            candidateSequence, binSequences
+            currentDifferenceWeights,
+        ) = self.find_all_weighted_differences_in_cached_alignments(
+            alignmentCache, currentVersion, readQualities
         )
-        while currentScore > bestScore:
-            if len(currentDifferences) == 0:
-                candidateRecord = SeqRecord(
-                    Seq(candidateSequence), id="candidateRecord"
+        while len(currentDifferences) != 0:
+            mostCommonDifference = self.find_best_supported_difference(
+                currentDifferences, currentDifferenceWeights
+            )
+            differenceSupport = currentDifferences.count(mostCommonDifference)
+            currentScore = alignmentCache.find_average_score(currentVersion)
+            if differenceSupport < self.scoreOnlySupportFraction * len(
+                readSequences
+            ) and (
+                alignmentCache.find_edited_average_score(
+                    currentVersion, mostCommonDifference
                 )
-                return candidateRecord
-            mostCommonDifference = Counter(currentDifferences).most_common(1)[0][0]
+                <= currentScore
+            ):
+                nextVersion = None
+            else:
+                nextVersion = alignmentCache.add_edited_candidate_version(
+                    currentVersion, mostCommonDifference
+                )
+            if (
+                nextVersion is not None
+                and alignmentCache.find_average_score(nextVersion) > currentScore
+            ):
+                alignmentCache.discard_version(currentVersion)
+                currentVersion, isFullyAligned = nextVersion, False
+            elif isFullyAligned:
+                break
+            else:
+                if nextVersion is not None:
+                    alignmentCache.discard_version(nextVersion)
+                candidateSequence = alignmentCache.find_candidate_sequence(
+                    currentVersion
+                )
+                alignmentCache.discard_version(currentVersion)
+                currentVersion = alignmentCache.add_candidate_version(
+                    candidateSequence, readSequences
+                )
+                isFullyAligned = True
+            (
+                currentDifferences,
+                currentDifferenceWeights,
+            ) = self.find_all_weighted_differences_in_cached_alignments(
+                alignmentCache, currentVersion, readQualities
+            )
+        return (
+            alignmentCache.find_candidate_sequence(currentVersion),
+            alignmentCache.find_alignments(currentVersion),
+        )
+
+    def polish_candidate_sequence_against_read_sequences(
+        self, candidateSequence, readSequences, readQualities=None
+    ):
+        return self.polish_candidate_sequence_and_alignments(
+            candidateSequence, readSequences, readQualities
+        )[0]
+
+    def polish_candidate_sequence_and_alignments(
+        self, candidateSequence, readSequences, readQualities=None
+    ):
+        if self.incrementalRealignment:
+            return self.polish_candidate_sequence_and_alignments_with_alignment_cache(
+                candidateSequence, readSequences, readQualities
+            )
+        return self.polish_candidate_sequence_and_alignments_with_full_realignment(
+            candidateSequence, readSequences, readQualities
+        )
+
+    def polish_candidate_sequence_and_alignments_with_full_realignment(
+        self, candidateSequence, readSequences, readQualities=None
+    ):
+        currentAlignments = self.find_pairwise_alignments_between_candidate_sequence_and_binned_sequences(
+            candidateSequence, readSequences
+        )
+        currentScore = mean(alignment[0] for alignment in currentAlignments)
+        (
+            currentDifferences,
+            currentDifferenceWeights,
+        ) = self.find_all_weighted_differences_in_alignments(
+            currentAlignments, readQualities
+        )
+        while len(currentDifferences) != 0:
+            mostCommonDifference = self.find_best_supported_difference(
+                currentDifferences, currentDifferenceWeights
+            )
+            differenceSupport = currentDifferences.count(mostCommonDifference)
             nextSequence = inject_difference_into_sequence(
                 candidateSequence, mostCommonDifference
             )
-            bestScore = currentScore
+            if differenceSupport < self.scoreOnlySupportFraction * len(readSequences):
+                nextScore = self.find_average_pairwise_alignment_score_between_candidate_sequence_and_binned_sequences(
+                    nextSequence, readSequences
+                )
+                if nextScore <= currentScore:
+                    break
+            nextAlignments = self.find_pairwise_alignments_between_candidate_sequence_and_binned_sequences(
+                nextSequence, readSequences
+            )
+            nextScore = mean(alignment[0] for alignment in nextAlignments)
+            if nextScore <= currentScore:
+                break
+            candidateSequence = nextSequence[:]
+            currentAlignments, currentScore = nextAlignments, nextScore
             (
-                currentScore,
                 currentDifferences,
-            ) = self.find_average_pairwise_alignment_score_and_all_differences_between_candidate_sequence_and_binned_sequences(
-                nextSequence, binSequences
+                currentDifferenceWeights,
+            ) = self.find_all_weighted_differences_in_alignments(
+                currentAlignments, readQualities
+            )
+        return candidateSequence, currentAlignments
+
+    def map_draft_indices_to_read_indices(self, draftSequence, readSequence):
+        (
+            _,
+            draftSequenceAlignment,
+            _,
+            readSequenceAlignment,
+        ) = self.find_pairwise_score_and_alignment_strings_between_two_sequences(
+            draftSequence, readSequence
+        )
+        alignedBlocks = find_aligned_blocks_from_alignment_strings(
+            draftSequenceAlignment, readSequenceAlignment
+        )
+        return map_target_indices_to_query_indices(
+            alignedBlocks, len(draftSequence), len(readSequence)
+        )
+
+    def polish_window_sequence(
+        self, windowSequence, windowReadSequences, windowReadQualities=None
+    ):
+        if windowReadQualities is None:
+            windowReadQualities = [None] * len(windowReadSequences)
+        windowReads = [
+            (windowReadSequence, windowReadSequenceQualities)
+            for windowReadSequence, windowReadSequenceQualities in zip(
+                windowReadSequences, windowReadQualities
+            )
+            if windowReadSequence
+        ]
+        if not windowReads:
+            return windowSequence, np.zeros(len(windowSequence), dtype=np.int64)
+        windowReadSequences, windowReadQualities = map(list, zip(*windowReads))
+        if windowReadQualities[0] is None:
+            windowReadQualities = None
+        windowSequence, windowAlignments = (
+            self.polish_candidate_sequence_and_alignments(
+                windowSequence, windowReadSequences, windowReadQualities
+            )
+        )
+        return windowSequence, count_matching_reads_at_each_position(
+            len(windowSequence), windowAlignments
+        )
+
+    def stitch_overlapping_window_sequences(self, windowSequences, overlapLength):
+        return self.stitch_overlapping_window_sequences_and_find_segments(
+            windowSequences, overlapLength
+        )[0]
+
+    def stitch_overlapping_window_sequences_and_find_segments(
+        self, windowSequences, overlapLength
+    ):
+        stitchedSequence = windowSequences[0]
+        windowSegments = [[0, len(windowSequences[0])]]
+        for windowSequence in windowSequences[1:]:
+            overlapStart = max(len(stitchedSequence) - overlapLength, 0)
+            previousOverlap = stitchedSequence[overlapStart:]
+            nextOverlap = windowSequence[:overlapLength]
+            alignment = self.aligner.align(previousOverlap, nextOverlap)[0]
+            overlapIndices = map_target_indices_to_query_indices(
+                alignment.aligned, len(previousOverlap), len(nextOverlap)
+            )
+            midpoint = len(previousOverlap) // 2
+            trimLength = len(previousOverlap) - midpoint
+            for windowSegment in reversed(windowSegments):
+                segmentTrimLength = min(trimLength, windowSegment[1] - windowSegment[0])
+                windowSegment[1] -= segmentTrimLength
+                trimLength -= segmentTrimLength
+            windowSegments.append([overlapIndices[midpoint], len(windowSequence)])
+            stitchedSequence = (
+                stitchedSequence[: overlapStart + midpoint]
+                + windowSequence[overlapIndices[midpoint] :]
+            )
+        return stitchedSequence, windowSegments
+
+    def polish_candidate_sequence_in_windows(
+        self, draftSequence, readSequences, readQualities=None
+    ):
+        return self.polish_candidate_sequence_and_count_matching_reads_in_windows(
+            draftSequence, readSequences, readQualities
+        )[0]
+
+    def polish_candidate_sequence_and_count_matching_reads_in_windows(
+        self, draftSequence, readSequences, readQualities=None
+    ):
+        windowLength = PAIRWISE_WINDOW["windowLength"]
+        overlapLength = PAIRWISE_WINDOW["overlapLength"]
+        windowBoundaries = find_window_boundaries(
+            len(draftSequence), windowLength, overlapLength
+        )
+        readIndexMaps = [
+            self.map_draft_indices_to_read_indices(draftSequence, readSequence)
+            for readSequence in readSequences
+        ]
+        windowSequences = []
+        windowReadSequences = []
+        windowReadQualities = []
+        for startIndex, endIndex in windowBoundaries:
+            windowSequences.append(draftSequence[startIndex:endIndex])
+            windowReadSequences.append(
+                [
+                    readSequence[readIndexMap[startIndex] : readIndexMap[endIndex]]
+                    for readSequence, readIndexMap in zip(readSequences, readIndexMaps)
+                ]
+            )
+            windowReadQualities.append(
+                None
+                if readQualities is None
+                else [
+                    readSequenceQualities[
+                        readIndexMap[startIndex] : readIndexMap[endIndex]
+                    ]
+                    for readSequenceQualities, readIndexMap in zip(
+                        readQualities, readIndexMaps
+                    )
+                ]
+            )
+        if PAIRWISE_WINDOW["processNum"] == 1:
+            polishedWindows = list(
+                map(
+                    self.polish_window_sequence,
+                    windowSequences,
+                    windowReadSequences,
+                    windowReadQualities,
+                )
             )
-            if currentScore > bestScore:
-                candidateSequence = nextSequence[:]
-        candidateRecord = SeqRecord(Seq(candidateSequence), id="candidateRecord")
+        else:
+            with ProcessPoolExecutor(
+                max_workers=PAIRWISE_WINDOW["processNum"]
+            ) as windowProcessPool:
+                polishedWindows = list(
+                    windowProcessPool.map(
+                        self.polish_window_sequence,
+                        windowSequences,
+                        windowReadSequences,
+                        windowReadQualities,
+                    )
+                )
+        polishedWindowSequences, windowMatchCounts = zip(*polishedWindows)
+        (
+            candidateSequence,
+            windowSegments,
+        ) = self.stitch_overlapping_window_sequences_and_find_segments(
+            polishedWindowSequences, overlapLength
+        )
+        return candidateSequence, np.concatenate(
+            [
+                matchCounts[segmentStart:segmentEnd]
+                for matchCounts, (segmentStart, segmentEnd) in zip(
+                    windowMatchCounts, windowSegments
+                )
+            ]
+        )
+
+    def find_read_qualities_from_biopython_records(self, binRecords):
+        readQualities = [
+            record.letter_annotations.get("phred_quality") for record in binRecords
+        ]
+        if not self.qualityWeightedVoting or any(
+            readSequenceQualities is None for readSequenceQualities in readQualities
+        ):
+            return None
+        return [
+            np.asarray(readSequenceQualities, dtype=np.float64)
+            for readSequenceQualities in readQualities
+        ]
+
+    def polish_candidate_sequence_and_count_matching_reads(
+        self, referenceSequence, readSequences, readQualities=None
+    ):
+        windowLength = PAIRWISE_WINDOW["windowLength"]
+        if windowLength and len(referenceSequence) > (
+            windowLength + PAIRWISE_WINDOW["overlapLength"]
+        ):
+            return self.polish_candidate_sequence_and_count_matching_reads_in_windows(
+                referenceSequence, readSequences, readQualities
+            )
+        candidateSequence, readAlignments = (
+            self.polish_candidate_sequence_and_alignments(
+                referenceSequence, readSequences, readQualities
+            )
+        )
+        return candidateSequence, count_matching_reads_at_each_position(
+            len(candidateSequence), readAlignments
+        )
+
+    def find_consensus_qualities_from_match_counts(self, matchCounts, readCount):
+        return convert_match_counts_to_phred_qualities(
+            matchCounts, readCount, self.maximumConsensusQuality
+        )
+
+    def generate_consensus_record_from_biopython_records(self, binRecords: list) -> str:
+        binSequences = [str(record.seq) for record in binRecords]
+        referenceConsensusGenerator = ReferenceConsensusGenerator()
+        referenceSequence = referenceConsensusGenerator.generate_consensus_sequence(
+            binSequences
+        )
+        return self.generate_consensus_record_from_draft_sequence(
+            referenceSequence, binRecords
+        )
+
+    def generate_nested_consensus_records_from_biopython_records(
+        self, binRecords: list, intervalNumbers: list
+    ):
+        referenceConsensusGenerator = ReferenceConsensusGenerator()
+        self.alignmentMemo = {}
+        try:
+            for intervalNumber in intervalNumbers:
+                if intervalNumber == 1:
+                    yield binRecords[0]
+                    continue
+                referenceSequence = (
+                    referenceConsensusGenerator.generate_consensus_sequence(
+                        [str(record.seq) for record in binRecords[:intervalNumber]]
+                    )
+                )
+                candidateRecord = self.generate_consensus_record_from_draft_sequence(
+                    referenceSequence, binRecords[:intervalNumber]
+                )
+                reusableSequences = {referenceSequence, str(candidateRecord.seq)}
+                self.alignmentMemo = {
+                    memoKey: alignment
+                    for memoKey, alignment in self.alignmentMemo.items()
+                    if memoKey[0] in reusableSequences
+                }
+                yield candidateRecord
+        finally:
+            self.alignmentMemo = None
+
+    def generate_consensus_record_from_draft_sequence(
+        self, referenceSequence: str, binRecords: list
+    ):
+        binSequences = [str(record.seq) for record in binRecords]
+        readQualities = self.find_read_qualities_from_biopython_records(binRecords)
+        (
+            candidateSequence,
+            matchCounts,
+        ) = self.polish_candidate_sequence_and_count_matching_reads(
+            referenceSequence, binSequences, readQualities
+        )
+        candidateRecord = SeqRecord(
+            Seq(candidateSequence),
+            id="candidateRecord",
+            letter_annotations={
+                "phred_quality": self.find_consensus_qualities_from_match_counts(
+                    matchCounts, len(binSequences)
+                )
+            },
+        )
         return candidateRecord
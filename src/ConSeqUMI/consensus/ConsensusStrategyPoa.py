@@ -0,0 +1,28 @@
+from ConSeqUMI.consensus.ConsensusStrategy import ConsensusStrategy
+from ConSeqUMI.consensus.PartialOrderGraph import PartialOrderGraph
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
+
+
+class ConsensusStrategyPoa(ConsensusStrategy):
+    def generate_consensus_algorithm_path_header_insert(self) -> str:
+        return "poa"
+
+    def find_consensus_configuration(self) -> dict:
+        partialOrderGraph = PartialOrderGraph(capacity=1)
+        return {
+            "algorithm": self.generate_consensus_algorithm_path_header_insert(),
+            "graphScores": [
+                partialOrderGraph.matchScore,
+                partialOrderGraph.mismatchScore,
+                partialOrderGraph.gapScore,
+            ],
+        }
+
+    def generate_consensus_record_from_biopython_records(self, binRecords: list) -> str:
+        partialOrderGraph = PartialOrderGraph()
+        for record in binRecords:
+            partialOrderGraph.add_sequence(str(record.seq))
+        consensusSequence = partialOrderGraph.find_heaviest_path_sequence()
+        candidateRecord = SeqRecord(Seq(consensusSequence), id="candidateRecord")
+        return candidateRecord
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+from multiprocessing import BoundedSemaphore
+from multiprocessing.util import Finalize
+from ConSeqUMI.consensus.config import EXTERNAL_PROCESS
+from ConSeqUMI.consensus.config import CONSENSUS_CACHE
+from ConSeqUMI.consensus.config import LAST_TRAIN_PATH
+from ConSeqUMI.consensus.config import PAIRWISE_VOTING
+from ConSeqUMI.consensus.config import PAIRWISE_WINDOW
+from ConSeqUMI.config import EXTERNAL_PROCESS_RUNNER
+from ConSeqUMI.ExternalProcessRunner import ExternalProcessRunner
+
+EXTERNAL_PROCESS_SLOTS = {"semaphore": None}
+WORKER_SCRATCH_DIRECTORIES = {}
+CONSENSUS_SETTINGS = {
+    "consensusCache": CONSENSUS_CACHE,
+    "lastTrainPath": LAST_TRAIN_PATH,
+    "pairwiseVoting": PAIRWISE_VOTING,
+    "pairwiseWindow": PAIRWISE_WINDOW,
+}
+
+
+def create_external_process_slots():
+    if EXTERNAL_PROCESS["processNum"]:
+        return BoundedSemaphore(EXTERNAL_PROCESS["processNum"])
+    return None
+
+
+def find_consensus_settings():
+    return {name: dict(settings) for name, settings in CONSENSUS_SETTINGS.items()}
+
+
+def initialize_external_process_worker(
+    externalProcessSlots,
+    externalProcessSettings,
+    externalProcessRunnerSettings=None,
+    consensusSettings=None,
+):
+    EXTERNAL_PROCESS_SLOTS["semaphore"] = externalProcessSlots
+    EXTERNAL_PROCESS.update(externalProcessSettings)
+    if externalProcessRunnerSettings:
+        EXTERNAL_PROCESS_RUNNER.update(externalProcessRunnerSettings)
+    for name, settings in (consensusSettings or {}).items():
+        CONSENSUS_SETTINGS[name].update(settings)
+
+
+def find_scratch_root_directory():
+    scratchDirectory = EXTERNAL_PROCESS["scratchDirectory"]
+    if (
+        scratchDirectory
+        and os.path.isdir(scratchDirectory)
+        and os.access(scratchDirectory, os.W_OK)
+    ):
+        return scratchDirectory
+    return None
+
+
+class ExternalProcessExecutor:
+    def __init__(self, toolName):
+        self.toolName = toolName
+
+    def find_scratch_directory(self):
+        workerKey = (os.getpid(), self.toolName)
+        if workerKey not in WORKER_SCRATCH_DIRECTORIES:
+            scratchDirectory = tempfile.mkdtemp(
+                prefix=f"conseq_{self.toolName}_delete_",
+                dir=find_scratch_root_directory(),
+            )
+            Finalize(
+                None,
+                shutil.rmtree,
+                args=(scratchDirectory,),
+                kwargs={"ignore_errors": True},
+                exitpriority=0,
+            )
+            WORKER_SCRATCH_DIRECTORIES[workerKey] = scratchDirectory
+        return WORKER_SCRATCH_DIRECTORIES[workerKey]
+
+    def find_scratch_path(self, fileName):
+        return os.path.join(self.find_scratch_directory(), fileName)
+
+    def run_process(self, processCommands):
+        return ExternalProcessRunner().run(processCommands)
+
+    def run(self, processCommands):
+        externalProcessSlots = EXTERNAL_PROCESS_SLOTS["semaphore"]
+        if externalProcessSlots is None:
+            return self.run_process(processCommands)
+        with externalProcessSlots:
+            return self.run_process(processCommands)
+
+
+class AsyncExternalProcessExecutor(ExternalProcessExecutor):
+    def __init__(self, toolName):
+        super().__init__(toolName)
+        self.scratchDirectory = None
+
+    def find_scratch_directory(self):
+        if self.scratchDirectory is None:
+            self.scratchDirectory = tempfile.mkdtemp(
+                prefix=f"conseq_{self.toolName}_delete_",
+                dir=find_scratch_root_directory(),
+            )
+        return self.scratchDirectory
+
+    def remove_scratch_directory(self):
+        if self.scratchDirectory is not None:
+            shutil.rmtree(self.scratchDirectory, ignore_errors=True)
+            self.scratchDirectory = None
+
+    async def run(self, processCommands):
+        return await ExternalProcessRunner().run_async(processCommands)
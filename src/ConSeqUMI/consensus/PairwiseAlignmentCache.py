@@ -0,0 +1,194 @@
+import numpy as np
+from ConSeqUMI.consensus.consensusStrategyPairwiseFunctions import (
+    inject_difference_into_sequence,
+)
+
+
+class PairwiseAlignmentCache:
+    def __init__(self, align_sequences, *args, **kwargs):
+        self.align_sequences = align_sequences
+        self.score_sequences = kwargs.get("score_sequences")
+        self.matchScore = kwargs.get("matchScore", 1)
+        self.mismatchScore = kwargs.get("mismatchScore", -1)
+        self.openGapScore = kwargs.get("openGapScore", -1)
+        self.extendGapScore = kwargs.get("extendGapScore", -0.5)
+        self.flankLength = kwargs.get("flankLength", 20)
+        self.candidateSequences = {}
+        self.alignments = {}
+        self.nextVersion = 0
+
+    def store_version(self, candidateSequence, alignments):
+        version = self.nextVersion
+        self.candidateSequences[version] = candidateSequence
+        self.alignments[version] = alignments
+        self.nextVersion += 1
+        return version
+
+    def discard_version(self, version):
+        del self.candidateSequences[version]
+        del self.alignments[version]
+
+    def find_candidate_sequence(self, version):
+        return self.candidateSequences[version]
+
+    def find_alignments(self, version):
+        return self.alignments[version]
+
+    def find_average_score(self, version):
+        return np.mean([alignment[0] for alignment in self.alignments[version]])
+
+    def add_candidate_version(self, candidateSequence, readSequences):
+        alignments = [
+            self.align_sequences(candidateSequence, readSequence)
+            for readSequence in readSequences
+        ]
+        return self.store_version(candidateSequence, alignments)
+
+    def score_alignment_strings(
+        self, originalSequenceAlignment, indelIndicator, differentSequenceAlignment
+    ):
+        indicatorCodes = np.frombuffer(indelIndicator.encode(), dtype=np.uint8)
+        score = (
+            np.count_nonzero(indicatorCodes == ord("|")) * self.matchScore
+            + np.count_nonzero(indicatorCodes == ord(".")) * self.mismatchScore
+        )
+        for sequenceAlignment in [
+            originalSequenceAlignment,
+            differentSequenceAlignment,
+        ]:
+            gaps = np.frombuffer(sequenceAlignment.encode(), dtype=np.uint8) == ord("-")
+            gapCount = np.count_nonzero(gaps)
+            gapRunCount = np.count_nonzero(np.diff(gaps.astype(np.int8)) == 1) + int(
+                gaps[:1].any()
+            )
+            score += (
+                gapRunCount * self.openGapScore
+                + (gapCount - gapRunCount) * self.extendGapScore
+            )
+        return float(score)
+
+    def find_realignment_columns(self, alignment, startIndex, endIndex):
+        _, originalSequenceAlignment, indelIndicator, _ = alignment
+        alignmentLength = len(indelIndicator)
+        originalColumns = np.flatnonzero(
+            np.frombuffer(originalSequenceAlignment.encode(), dtype=np.uint8)
+            != ord("-")
+        )
+        matchColumns = np.flatnonzero(
+            np.frombuffer(indelIndicator.encode(), dtype=np.uint8) == ord("|")
+        )
+        windowStart = max(startIndex - self.flankLength, 0)
+        windowEnd = min(endIndex + self.flankLength, len(originalColumns))
+        startColumn = originalColumns[windowStart] if windowStart > 0 else 0
+        endColumn = (
+            originalColumns[windowEnd]
+            if windowEnd < len(originalColumns)
+            else alignmentLength
+        )
+        previousMatchIndex = np.searchsorted(matchColumns, startColumn) - 1
+        startColumn = (
+            matchColumns[previousMatchIndex] + 1 if previousMatchIndex >= 0 else 0
+        )
+        nextMatchIndex = np.searchsorted(matchColumns, endColumn)
+        endColumn = (
+            matchColumns[nextMatchIndex]
+            if nextMatchIndex < len(matchColumns)
+            else alignmentLength
+        )
+        return (
+            int(startColumn),
+            int(endColumn),
+            int(np.searchsorted(originalColumns, startColumn)),
+            int(np.searchsorted(originalColumns, endColumn)),
+        )
+
+    def align_segments(self, originalSegment, differentSegment):
+        if originalSegment and differentSegment:
+            return self.align_sequences(originalSegment, differentSegment)[1:]
+        return (
+            originalSegment + "-" * len(differentSegment),
+            "-" * (len(originalSegment) + len(differentSegment)),
+            "-" * len(originalSegment) + differentSegment,
+        )
+
+    def score_segments(self, originalSegment, differentSegment):
+        if originalSegment and differentSegment and self.score_sequences:
+            return self.score_sequences(originalSegment, differentSegment)
+        return self.score_alignment_strings(
+            *self.align_segments(originalSegment, differentSegment)
+        )
+
+    def find_edited_region(self, alignment, editedSequence, difference):
+        startIndex, endIndex, insert = difference
+        (
+            startColumn,
+            endColumn,
+            segmentStart,
+            segmentEnd,
+        ) = self.find_realignment_columns(alignment, startIndex, endIndex)
+        editedSegment = editedSequence[
+            segmentStart : segmentEnd + len(insert) - (endIndex - startIndex)
+        ]
+        differentSegment = alignment[3][startColumn:endColumn].replace("-", "")
+        return startColumn, endColumn, editedSegment, differentSegment
+
+    def score_edited_region(self, alignment, editedSequence, difference):
+        (
+            startColumn,
+            endColumn,
+            editedSegment,
+            differentSegment,
+        ) = self.find_edited_region(alignment, editedSequence, difference)
+        return (
+            alignment[0]
+            - self.score_alignment_strings(
+                *[
+                    sequenceAlignment[startColumn:endColumn]
+                    for sequenceAlignment in alignment[1:]
+                ]
+            )
+            + self.score_segments(editedSegment, differentSegment)
+        )
+
+    def realign_edited_region(self, alignment, editedSequence, difference):
+        _, originalSequenceAlignment, indelIndicator, differentSequenceAlignment = (
+            alignment
+        )
+        (
+            startColumn,
+            endColumn,
+            editedSegment,
+            differentSegment,
+        ) = self.find_edited_region(alignment, editedSequence, difference)
+        localAlignment = self.align_segments(editedSegment, differentSegment)
+        alignmentStrings = [
+            sequenceAlignment[:startColumn]
+            + localSequenceAlignment
+            + sequenceAlignment[endColumn:]
+            for sequenceAlignment, localSequenceAlignment in zip(
+                [originalSequenceAlignment, indelIndicator, differentSequenceAlignment],
+                localAlignment,
+            )
+        ]
+        return (self.score_alignment_strings(*alignmentStrings), *alignmentStrings)
+
+    def add_edited_candidate_version(self, version, difference):
+        editedSequence = inject_difference_into_sequence(
+            self.candidateSequences[version], difference
+        )
+        alignments = [
+            self.realign_edited_region(alignment, editedSequence, difference)
+            for alignment in self.alignments[version]
+        ]
+        return self.store_version(editedSequence, alignments)
+
+    def find_edited_average_score(self, version, difference):
+        editedSequence = inject_difference_into_sequence(
+            self.candidateSequences[version], difference
+        )
+        return np.mean(
+            [
+                self.score_edited_region(alignment, editedSequence, difference)
+                for alignment in self.alignments[version]
+            ]
+        )
@@ -0,0 +1,180 @@
+import numpy as np
+
+
+class PartialOrderGraph:
+    def __init__(self, *args, **kwargs):
+        self.matchScore = kwargs.get("matchScore", 1)
+        self.mismatchScore = kwargs.get("mismatchScore", -1)
+        self.gapScore = kwargs.get("gapScore", -1)
+        self.nodeBases = np.zeros(kwargs.get("capacity", 1024), dtype=np.uint8)
+        self.numNodes = 0
+        self.predecessors = []
+        self.successors = []
+        self.alignedNodes = []
+        self.edgeWeights = {}
+
+    def encode_sequence(self, sequence):
+        return np.frombuffer(sequence.encode(), dtype=np.uint8)
+
+    def add_node(self, base):
+        if self.numNodes == len(self.nodeBases):
+            self.nodeBases = np.concatenate(
+                [self.nodeBases, np.zeros(len(self.nodeBases), dtype=np.uint8)]
+            )
+        self.nodeBases[self.numNodes] = base
+        self.predecessors.append([])
+        self.successors.append([])
+        self.alignedNodes.append([])
+        self.numNodes += 1
+        return self.numNodes - 1
+
+    def add_edge(self, sourceNode, targetNode, weight):
+        edge = (sourceNode, targetNode)
+        if edge not in self.edgeWeights:
+            self.edgeWeights[edge] = 0
+            self.predecessors[targetNode].append(sourceNode)
+            self.successors[sourceNode].append(targetNode)
+        self.edgeWeights[edge] += weight
+
+    def find_topological_order(self):
+        inDegrees = [len(predecessors) for predecessors in self.predecessors]
+        readyNodes = [node for node in range(self.numNodes) if inDegrees[node] == 0]
+        order = []
+        while readyNodes:
+            node = readyNodes.pop()
+            order.append(node)
+            for successor in self.successors[node]:
+                inDegrees[successor] -= 1
+                if inDegrees[successor] == 0:
+                    readyNodes.append(successor)
+        return order
+
+    def fill_alignment_matrix(self, readCodes, order, ranks):
+        gapRow = np.arange(len(readCodes) + 1, dtype=np.int32) * self.gapScore
+        scoreMatrix = np.empty((self.numNodes + 1, len(readCodes) + 1), dtype=np.int32)
+        scoreMatrix[0] = gapRow
+        for node in order:
+            predecessorRows = [
+                ranks[predecessor] for predecessor in self.predecessors[node]
+            ]
+            if not predecessorRows:
+                predecessorRows = [0]
+            substitutionScores = np.where(
+                readCodes == self.nodeBases[node], self.matchScore, self.mismatchScore
+            )
+            predecessorScores = scoreMatrix[predecessorRows].max(axis=0)
+            row = predecessorScores + self.gapScore
+            diagonalScores = (
+                scoreMatrix[predecessorRows, :-1] + substitutionScores
+            ).max(axis=0)
+            row[1:] = np.maximum(row[1:], diagonalScores)
+            scoreMatrix[ranks[node]] = np.maximum.accumulate(row - gapRow) + gapRow
+        return scoreMatrix
+
+    def trace_back_alignment(self, readCodes, order, ranks, scoreMatrix):
+        sinkNodes = [node for node in order if not self.successors[node]]
+        endNode = max(sinkNodes, key=lambda node: scoreMatrix[ranks[node], -1])
+        row, column = ranks[endNode], len(readCodes)
+        alignmentPairs = []
+        while row != 0 or column != 0:
+            if row == 0:
+                alignmentPairs.append((-1, column - 1))
+                column -= 1
+                continue
+            node = order[row - 1]
+            score = scoreMatrix[row, column]
+            predecessorRows = [
+                ranks[predecessor] for predecessor in self.predecessors[node]
+            ]
+            if not predecessorRows:
+                predecessorRows = [0]
+            nextCell = None
+            if column > 0:
+                substitutionScore = (
+                    self.matchScore
+                    if readCodes[column - 1] == self.nodeBases[node]
+                    else self.mismatchScore
+                )
+                for predecessorRow in predecessorRows:
+                    if (
+                        scoreMatrix[predecessorRow, column - 1] + substitutionScore
+                        == score
+                    ):
+                        nextCell = (predecessorRow, column - 1, (node, column - 1))
+                        break
+            if nextCell is None:
+                for predecessorRow in predecessorRows:
+                    if scoreMatrix[predecessorRow, column] + self.gapScore == score:
+                        nextCell = (predecessorRow, column, (node, -1))
+                        break
+            if nextCell is None:
+                nextCell = (row, column - 1, (-1, column - 1))
+            row, column, alignmentPair = nextCell
+            alignmentPairs.append(alignmentPair)
+        return alignmentPairs[::-1]
+
+    def align_sequence_to_graph(self, sequence):
+        readCodes = self.encode_sequence(sequence)
+        order = self.find_topological_order()
+        ranks = np.zeros(self.numNodes, dtype=np.int64)
+        ranks[order] = np.arange(1, self.numNodes + 1)
+        scoreMatrix = self.fill_alignment_matrix(readCodes, order, ranks)
+        return self.trace_back_alignment(readCodes, order, ranks, scoreMatrix)
+
+    def find_or_add_aligned_node(self, node, base):
+        if self.nodeBases[node] == base:
+            return node
+        for alignedNode in self.alignedNodes[node]:
+            if self.nodeBases[alignedNode] == base:
+                return alignedNode
+        newNode = self.add_node(base)
+        for alignedNode in self.alignedNodes[node] + [node]:
+            self.alignedNodes[alignedNode].append(newNode)
+            self.alignedNodes[newNode].append(alignedNode)
+        return newNode
+
+    def add_sequence(self, sequence, weights=None):
+        if not sequence:
+            return
+        readCodes = self.encode_sequence(sequence)
+        if weights is None:
+            weights = np.ones(len(readCodes), dtype=np.int64)
+        if self.numNodes == 0:
+            alignmentPairs = [(-1, index) for index in range(len(readCodes))]
+        else:
+            alignmentPairs = self.align_sequence_to_graph(sequence)
+        previousNode = -1
+        for node, readIndex in alignmentPairs:
+            if readIndex == -1:
+                continue
+            if node == -1:
+                currentNode = self.add_node(readCodes[readIndex])
+            else:
+                currentNode = self.find_or_add_aligned_node(node, readCodes[readIndex])
+            if previousNode != -1:
+                self.add_edge(previousNode, currentNode, weights[readIndex])
+            previousNode = currentNode
+
+    def find_heaviest_path_sequence(self):
+        if self.numNodes == 0:
+            return ""
+        pathScores = np.zeros(self.numNodes, dtype=np.float64)
+        bestPredecessors = np.full(self.numNodes, -1, dtype=np.int64)
+        for node in self.find_topological_order():
+            bestWeight = -np.inf
+            for predecessor in self.predecessors[node]:
+                weight = self.edgeWeights[(predecessor, node)]
+                if weight > bestWeight or (
+                    weight == bestWeight
+                    and pathScores[predecessor] > pathScores[bestPredecessors[node]]
+                ):
+                    bestWeight = weight
+                    bestPredecessors[node] = predecessor
+            if bestPredecessors[node] != -1:
+                pathScores[node] = bestWeight + pathScores[bestPredecessors[node]]
+        node = int(np.argmax(pathScores))
+        path = []
+        while node != -1:
+            path.append(node)
+            node = bestPredecessors[node]
+        return self.nodeBases[path[::-1]].tobytes().decode()
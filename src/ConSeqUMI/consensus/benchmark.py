@@ -1,14 +1,32 @@
 from ConSeqUMI.Printer import Printer
 from ConSeqUMI.consensus.ConsensusContext import ConsensusContext
+from ConSeqUMI.consensus.CompactBenchmarkOutput import CompactBenchmarkOutput
 import time
 import os
 from Bio.Seq import Seq
 from Bio.SeqRecord import SeqRecord
 from Bio import SeqIO
 import os
-from concurrent.futures import Future, as_completed
-import typing as T
+import random
+import zlib
+import numpy as np
+from scipy import stats
+import pandas as pd
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from ConSeqUMI.consensus.consensus import submit_tasks_with_bounded_window
 from ConSeqUMI.consensus.config import LAST_TRAIN_PATH
+from ConSeqUMI.consensus.config import EXTERNAL_PROCESS
+from ConSeqUMI.config import EXTERNAL_PROCESS_RUNNER
+from ConSeqUMI.ExternalProcessRunner import ExternalProcessError
+from ConSeqUMI.consensus.config import SUBMISSION_WINDOW
+from ConSeqUMI.consensus.config import ADAPTIVE_ITERATIONS
+from ConSeqUMI.consensus.config import CONSENSUS_CACHE
+from ConSeqUMI.consensus.ExternalProcessExecutor import (
+    create_external_process_slots,
+    find_consensus_settings,
+    initialize_external_process_worker,
+)
 
 
 
@@ -21,18 +39,341 @@ def writing_to_file_from_queue(queue, benchmarkOutputFile):
             file.write(",".join(row) + os.linesep)
 
 
+def find_confidence_interval_half_width(distances):
+    if len(distances) < 2:
+        return float("inf")
+    confidenceLevel = ADAPTIVE_ITERATIONS["confidenceLevel"]
+    return (
+        stats.t.ppf((1 + confidenceLevel) / 2, len(distances) - 1)
+        * np.std(distances, ddof=1)
+        / np.sqrt(len(distances))
+    )
+
+
+def has_interval_converged(distances, convergenceThreshold):
+    return (
+        convergenceThreshold > 0
+        and len(distances) >= ADAPTIVE_ITERATIONS["minimumIterations"]
+        and find_confidence_interval_half_width(distances) < convergenceThreshold
+    )
+
+
+def report_failed_benchmark_subsample(binName, intervalNumber, iteration, error):
+    Printer()(
+        f"skipping bin {binName} interval {intervalNumber} iteration {iteration}, consensus generation failed: {error}"
+    )
+
+
+def find_timed_benchmark_row(
+    strategy, sampleIndices, intervalNumber, iteration, binIndex=0, binName="input"
+):
+    startTime = time.perf_counter()
+    try:
+        (
+            row,
+            isCached,
+        ) = strategy.find_consensus_and_cache_status_from_benchmark_read_store(
+            sampleIndices, intervalNumber, iteration, binIndex
+        )
+    except ExternalProcessError as error:
+        report_failed_benchmark_subsample(binName, intervalNumber, iteration, error)
+        return None
+    return row + [
+        strategy.generate_consensus_algorithm_path_header_insert(),
+        f"{time.perf_counter() - startTime:.6f}",
+        binName,
+        str(isCached),
+    ]
+
+
+def find_timed_nested_benchmark_rows(
+    strategy, sampleIndices, intervalNumbers, iteration, binIndex=0, binName="input"
+):
+    rows = []
+    startTime = time.perf_counter()
+    try:
+        for row in strategy.generate_nested_benchmark_rows_from_benchmark_read_store(
+            sampleIndices, intervalNumbers, iteration, binIndex
+        ):
+            rows.append(
+                row
+                + [
+                    strategy.generate_consensus_algorithm_path_header_insert(),
+                    f"{time.perf_counter() - startTime:.6f}",
+                    binName,
+                    str(False),
+                ]
+            )
+            startTime = time.perf_counter()
+    except ExternalProcessError as error:
+        report_failed_benchmark_subsample(
+            binName, intervalNumbers[len(rows)], iteration, error
+        )
+    return rows
+
+
+def generate_nested_benchmark_task_arguments(
+    strategies,
+    binIntervalNumbers,
+    iterations,
+    binSizes,
+    binNames,
+    intervalDistances,
+    convergenceThreshold,
+    seed=None,
+):
+    for binIndex, intervalNumbers in enumerate(binIntervalNumbers):
+        binName = binNames[binIndex]
+        intervalNumbers = sorted(set(intervalNumbers))
+        for iteration in range(iterations):
+            strategyIntervalNumbers = [
+                [
+                    intervalNumber
+                    for intervalNumber in intervalNumbers
+                    if not has_interval_converged(
+                        intervalDistances[
+                            (
+                                strategy.generate_consensus_algorithm_path_header_insert(),
+                                binName,
+                                intervalNumber,
+                            )
+                        ],
+                        convergenceThreshold,
+                    )
+                ]
+                for strategy in strategies
+            ]
+            if not any(strategyIntervalNumbers):
+                break
+            sampleIndices = strategies[0].find_benchmark_sample_indices(
+                binSizes[binIndex],
+                intervalNumbers[-1],
+                iteration,
+                seed,
+                zlib.crc32(binName.encode()),
+            )
+            for strategy, openIntervalNumbers in zip(
+                strategies, strategyIntervalNumbers
+            ):
+                if openIntervalNumbers:
+                    yield (
+                        strategy,
+                        sampleIndices,
+                        openIntervalNumbers,
+                        iteration,
+                        binIndex,
+                        binName,
+                    )
+
+
+def generate_benchmark_task_arguments(
+    strategies,
+    binIntervalNumbers,
+    iterations,
+    binSizes,
+    binNames,
+    intervalDistances,
+    convergenceThreshold,
+    seed=None,
+):
+    for binIndex, intervalNumbers in enumerate(binIntervalNumbers):
+        binName = binNames[binIndex]
+        for intervalNumber in intervalNumbers:
+            for iteration in range(iterations):
+                openStrategies = [
+                    strategy
+                    for strategy in strategies
+                    if not has_interval_converged(
+                        intervalDistances[
+                            (
+                                strategy.generate_consensus_algorithm_path_header_insert(),
+                                binName,
+                                intervalNumber,
+                            )
+                        ],
+                        convergenceThreshold,
+                    )
+                ]
+                if not openStrategies:
+                    break
+                sampleIndices = strategies[0].find_benchmark_sample_indices(
+                    binSizes[binIndex],
+                    intervalNumber,
+                    iteration,
+                    seed,
+                    zlib.crc32(binName.encode()),
+                )
+                for strategy in openStrategies:
+                    yield (
+                        strategy,
+                        sampleIndices,
+                        intervalNumber,
+                        iteration,
+                        binIndex,
+                        binName,
+                    )
+
+
+def stream_benchmark_rows(
+    contexts,
+    processNum,
+    referenceSequences,
+    binRecordLists,
+    binNames,
+    intervalNumbers,
+    iterations,
+    convergenceThreshold=0,
+    seed=None,
+    nestedSubsamples=False,
+):
+    (
+        processPool,
+        benchmarkReadStore,
+    ) = contexts[0].create_benchmark_process_pool_from_bins(
+        processNum, referenceSequences, binRecordLists
+    )
+    binIntervalNumbers = [
+        contexts[0].find_benchmark_interval_numbers(binRecords, intervalNumbers)
+        for binRecords in binRecordLists
+    ]
+    binSizes = [len(binRecords) for binRecords in binRecordLists]
+    strategies = [context.strategy for context in contexts]
+    intervalDistances = defaultdict(list)
+    windowSize = (processNum or os.cpu_count()) * SUBMISSION_WINDOW["tasksPerWorker"]
+    taskFunction = find_timed_benchmark_row
+    generate_task_arguments = generate_benchmark_task_arguments
+    if nestedSubsamples:
+        taskFunction = find_timed_nested_benchmark_rows
+        generate_task_arguments = generate_nested_benchmark_task_arguments
+    try:
+        for result in submit_tasks_with_bounded_window(
+            processPool,
+            taskFunction,
+            generate_task_arguments(
+                strategies,
+                binIntervalNumbers,
+                iterations,
+                binSizes,
+                binNames,
+                intervalDistances,
+                convergenceThreshold,
+                seed,
+            ),
+            windowSize,
+        ):
+            if not nestedSubsamples:
+                result = [result] if result is not None else []
+            for row in result:
+                intervalDistances[(row[6], row[8], int(row[0]))].append(int(row[4]))
+                yield row
+    finally:
+        processPool.shutdown()
+        benchmarkReadStore.remove()
+
+
+def find_reference_records(context, binRecordLists, processNum):
+    if len(binRecordLists) == 1:
+        return [
+            context.generate_consensus_record_from_biopython_records(binRecordLists[0])
+        ]
+    with ProcessPoolExecutor(
+        max_workers=processNum,
+        initializer=initialize_external_process_worker,
+        initargs=(
+            create_external_process_slots(),
+            dict(EXTERNAL_PROCESS),
+            dict(EXTERNAL_PROCESS_RUNNER),
+            find_consensus_settings(),
+        ),
+    ) as referenceProcessPool:
+        return list(
+            referenceProcessPool.map(
+                context.strategy.generate_consensus_record_from_biopython_records,
+                binRecordLists,
+            )
+        )
+
+
+def write_accuracy_by_depth_tables(benchmarkOutputPathStart, summaryRows):
+    summaryDf = pd.DataFrame(
+        summaryRows,
+        columns=[
+            "bin",
+            "consensusAlgorithm",
+            "interval",
+            "levenshteinDistance",
+            "wallTimeSeconds",
+        ],
+    )
+    summaryDf["exactMatch"] = summaryDf["levenshteinDistance"] == 0
+    aggregations = {
+        "iterations": ("levenshteinDistance", "size"),
+        "meanLevenshteinDistance": ("levenshteinDistance", "mean"),
+        "standardDeviationLevenshteinDistance": ("levenshteinDistance", "std"),
+        "exactMatchFraction": ("exactMatch", "mean"),
+        "meanWallTimeSeconds": ("wallTimeSeconds", "mean"),
+    }
+    binDf = (
+        summaryDf.groupby(["bin", "consensusAlgorithm", "interval"])
+        .agg(**aggregations)
+        .reset_index()
+    )
+    binDf.to_csv(benchmarkOutputPathStart + "-per_bin.csv", index=False)
+    aggregateDf = (
+        summaryDf.groupby(["consensusAlgorithm", "interval"])
+        .agg(bins=("bin", "nunique"), **aggregations)
+        .reset_index()
+    )
+    aggregateDf.to_csv(benchmarkOutputPathStart + "-aggregate.csv", index=False)
+
+
 def main(args):
-    context = ConsensusContext(args["consensusAlgorithm"])
+    consensusAlgorithms = args["consensusAlgorithm"].split(",")
+    contexts = [
+        ConsensusContext(consensusAlgorithm)
+        for consensusAlgorithm in consensusAlgorithms
+    ]
+    context = contexts[0]
     inputFile = os.path.join(args["output"], "input.fastq")
-    benchmarkOutputFile = os.path.join(
+    benchmarkOutputPathStart = os.path.join(
         args["output"],
-        context.generate_consensus_algorithm_path_header("benchmark") + ".csv",
+        "benchmark-"
+        + "_".join(consensusAlgorithms)
+        + time.strftime("-%Y%m%d-%H%M%S"),
     )
-    print("output folder: " + benchmarkOutputFile)
+    benchmarkOutputFile = benchmarkOutputPathStart + ".csv"
+    compactBenchmarkOutput = CompactBenchmarkOutput(benchmarkOutputPathStart)
+    if args["compactOutput"]:
+        print("output file: " + compactBenchmarkOutput.resultsPath)
+        print("output sequences file: " + compactBenchmarkOutput.sequencesPath)
+        streamedOutputFile = compactBenchmarkOutput.sequencesPath
+    else:
+        print("output file: " + benchmarkOutputFile)
+        streamedOutputFile = benchmarkOutputFile
     referenceFile = os.path.join(args["output"], "reference.fasta")
     printer = Printer()
     print(args["output"])
-    printer(f"total number of input reads: {len(args['input'])}")
+    seed = args["seed"]
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    printer(f"random seed: {seed}")
+    if args["inputBins"]:
+        binPaths = args["inputBins"]
+        if args["binNumber"] and args["binNumber"] < len(binPaths):
+            binPaths = sorted(
+                random.Random(seed).sample(binPaths, k=args["binNumber"])
+            )
+        printer(f"benchmarking {len(binPaths)} of {len(args['inputBins'])} bins")
+        binNames = [
+            os.path.splitext(os.path.basename(binPath))[0] for binPath in binPaths
+        ]
+        binRecordLists = [list(SeqIO.parse(binPath, "fastq")) for binPath in binPaths]
+    else:
+        binNames = ["input"]
+        binRecordLists = [args["input"]]
+    printer(
+        f"total number of input reads: {sum(len(binRecords) for binRecords in binRecordLists)}"
+    )
     columns = [
         "interval",
         "iteration",
@@ -40,44 +381,125 @@ def main(args):
         "benchmarkSequence",
         "levenshteinDistance",
         "originalNumberOfSequences",
+        "consensusAlgorithm",
+        "wallTimeSeconds",
+        "bin",
+        "cachedConsensus",
     ]
     if args["lastTrain"]:
         LAST_TRAIN_PATH["ltp"] = args["lastTrain"]
+    if args["scratchDirectory"]:
+        EXTERNAL_PROCESS["scratchDirectory"] = args["scratchDirectory"]
+    EXTERNAL_PROCESS["processNum"] = args["externalProcessNum"]
+    EXTERNAL_PROCESS_RUNNER["timeout"] = args["toolTimeout"]
+    EXTERNAL_PROCESS_RUNNER["retries"] = args["toolRetries"]
+    EXTERNAL_PROCESS_RUNNER["logFile"] = os.path.join(
+        args["output"], "external_process_log.csv"
+    )
+    CONSENSUS_CACHE["cacheDirectory"] = args["cacheDirectory"]
+    CONSENSUS_CACHE["maximumSize"] = args["cacheSize"] * 1024**2
 
     if args["reference"]:
-        referenceRecord = args["reference"][0]
+        referenceRecords = [args["reference"][0]] * len(binRecordLists)
     else:
         printer("no reference sequence provided. Generating reference sequence")
-        referenceRecord = context.generate_consensus_record_from_biopython_records(
-            args["input"]
+        referenceRecords = find_reference_records(
+            context, binRecordLists, args["processNum"]
         )
 
     printer("writing input and reference sequence values to file for future reference")
-    with open(inputFile, "w") as output_handle:
-        SeqIO.write(args["input"], output_handle, "fastq")
+    if not args["inputBins"]:
+        with open(inputFile, "w") as output_handle:
+            SeqIO.write(args["input"], output_handle, "fastq")
     with open(referenceFile, "w") as output_handle:
-        SeqIO.write(referenceRecord, output_handle, "fasta")
+        if args["inputBins"]:
+            SeqIO.write(
+                [
+                    SeqRecord(referenceRecord.seq, id=binName, description="")
+                    for binName, referenceRecord in zip(binNames, referenceRecords)
+                ],
+                output_handle,
+                "fasta",
+            )
+        else:
+            SeqIO.write(referenceRecords[0], output_handle, "fasta")
 
     printer("beginning benchmark process")
 
-    futureProcesses: T.List[Future] = []
-    referenceSequence = str(referenceRecord.seq)
-    context.populate_future_processes_with_benchmark_tasks(
-        futureProcesses,
-        args["processNum"],
-        referenceSequence,
-        args["input"],
-        args["intervals"],
-        args["iterations"],
-    )
+    referenceSequences = [
+        str(referenceRecord.seq) for referenceRecord in referenceRecords
+    ]
+    if args["convergenceThreshold"]:
+        iterationText = f"at most {args['iterations']} iterations"
+    else:
+        iterationText = f"{args['iterations']} iterations"
     priorIntervals = set()
-    with open(benchmarkOutputFile, "w") as file:
-        file.write(",".join(columns) + os.linesep)
-        for futureProcess in as_completed(futureProcesses):
-            row = futureProcess.result()
-            if row[0] not in priorIntervals:
+    intervalIterations = Counter()
+    wallTimes = defaultdict(float)
+    cachedRows = Counter()
+    summaryRows = []
+    with open(streamedOutputFile, "w") as file:
+        if not args["compactOutput"]:
+            file.write(",".join(columns) + os.linesep)
+        for row in stream_benchmark_rows(
+            contexts,
+            args["processNum"],
+            referenceSequences,
+            binRecordLists,
+            binNames,
+            args["intervals"],
+            args["iterations"],
+            args["convergenceThreshold"],
+            seed,
+            args["nestedSubsamples"],
+        ):
+            if not args["inputBins"] and row[0] not in priorIntervals:
                 priorIntervals.add(row[0])
-                printer(
-                    f"benchmarking interval: {row[0]} ({args['iterations']} iterations)"
+                printer(f"benchmarking interval: {row[0]} ({iterationText})")
+            if args["inputBins"] and row[8] not in priorIntervals:
+                priorIntervals.add(row[8])
+                printer(f"benchmarking bin: {row[8]} ({iterationText})")
+            intervalIterations[(row[6], row[8], row[0])] += 1
+            isCached = row[9] == str(True)
+            if isCached:
+                cachedRows[row[6]] += 1
+            else:
+                wallTimes[row[6]] += float(row[7])
+            if args["inputBins"]:
+                summaryRows.append(
+                    [
+                        row[8],
+                        row[6],
+                        int(row[0]),
+                        int(row[4]),
+                        np.nan if isCached else float(row[7]),
+                    ]
                 )
-            file.write(",".join(row) + os.linesep)
+            if args["compactOutput"]:
+                compactBenchmarkOutput.add_row(row, file)
+            else:
+                file.write(",".join(row) + os.linesep)
+    if args["compactOutput"]:
+        compactBenchmarkOutput.write()
+    if args["inputBins"]:
+        write_accuracy_by_depth_tables(benchmarkOutputPathStart, summaryRows)
+    if args["convergenceThreshold"] and not args["inputBins"]:
+        for (
+            consensusAlgorithm,
+            _,
+            interval,
+        ), iterationCount in intervalIterations.items():
+            printer(
+                f"{consensusAlgorithm} interval {interval} finished after {iterationCount} iterations"
+            )
+    for consensusAlgorithm in [
+        context.strategy.generate_consensus_algorithm_path_header_insert()
+        for context in contexts
+    ]:
+        printer(
+            f"{consensusAlgorithm} total consensus time: {wallTimes[consensusAlgorithm]:.2f} seconds"
+        )
+        if cachedRows[consensusAlgorithm]:
+            printer(
+                f"{consensusAlgorithm} cached consensus sequences left out of the total: {cachedRows[consensusAlgorithm]}"
+            )
@@ -1,6 +1,14 @@
 from typing import List
 
 LAST_TRAIN_PATH = {"ltp":"[PATH TO LAST-TRAIN FILE]"}
+PAIRWISE_WINDOW = {"windowLength": 0, "overlapLength": 200, "processNum": 1}
+PAIRWISE_VOTING = {"qualityWeightedVoting": False}
+BANDED_ALIGNMENT = {"minimumSequenceLength": 2000, "errorRate": 0.05, "minimumBandWidth": 20}
+EXTERNAL_PROCESS = {"scratchDirectory": "/dev/shm", "processNum": 0}
+CONSENSUS_BATCH = {"batchSize": 1}
+SUBMISSION_WINDOW = {"tasksPerWorker": 2}
+ADAPTIVE_ITERATIONS = {"minimumIterations": 10, "confidenceLevel": 0.95}
+CONSENSUS_CACHE = {"cacheDirectory": "", "maximumSize": 1024**3}
 lamassembleCommandLine = f"lamassemble mat_path_filled_in_programmatically --end -g60 -m 40"
 
 LCOMMAND: List[str] = lamassembleCommandLine.split()
@@ -8,3 +16,14 @@ LCOMMAND: List[str] = lamassembleCommandLine.split()
 medakaCommandLine = "medaka_consensus -f -m r941_min_high_g303"
 MCOMMAND = medakaCommandLine.split()
 
+
+medakaBatchCommandLines = {
+    "align": "mini_align -m -t 1",
+    "merge": "samtools merge -f",
+    "index": "samtools index",
+    "inference": "medaka consensus",
+    "stitch": "medaka stitch",
+}
+MBATCHCOMMANDS = {
+    step: commandLine.split() for step, commandLine in medakaBatchCommandLines.items()
+}
@@ -1,29 +1,268 @@
 from ConSeqUMI.Printer import Printer
 from ConSeqUMI.consensus.ConsensusContext import ConsensusContext
+from ConSeqUMI.consensus.BinCostModel import BinCostModel
+from ConSeqUMI.consensus.ConsensusManifest import ConsensusManifest
+from ConSeqUMI.consensus.ConsensusCache import ConsensusCache
+from ConSeqUMI.consensus.config import CONSENSUS_CACHE
 from ConSeqUMI.consensus.config import LCOMMAND
 from ConSeqUMI.consensus.config import LAST_TRAIN_PATH
+from ConSeqUMI.consensus.config import PAIRWISE_WINDOW
+from ConSeqUMI.consensus.config import PAIRWISE_VOTING
+from ConSeqUMI.consensus.config import EXTERNAL_PROCESS
+from ConSeqUMI.config import EXTERNAL_PROCESS_RUNNER
+from ConSeqUMI.ExternalProcessRunner import ExternalProcessError
+from ConSeqUMI.consensus.config import CONSENSUS_BATCH
+from ConSeqUMI.consensus.config import SUBMISSION_WINDOW
+from ConSeqUMI.consensus.ExternalProcessExecutor import (
+    create_external_process_slots,
+    find_consensus_settings,
+    initialize_external_process_worker,
+)
 
 from Bio.Seq import Seq
 from Bio.SeqRecord import SeqRecord
 from Bio import SeqIO
 import time
+import asyncio
 import argparse
 import os
-from concurrent.futures import ProcessPoolExecutor, Future, as_completed
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from itertools import islice
+from collections import deque
 import typing as T
 
 
 
-def find_consensus_and_add_to_writing_queue(path, records, context, printer):
-    printer(f" ***** {len(records)} reads: generating consensus for {path}")
+def label_consensus_record(consensusRecord, path, records):
     id = path.split("/")[-1]
     description = f"Number of Target Sequences used to generate this consensus: {len(records)}, File Path: {path}"
-    consensusRecord = context.generate_consensus_record_from_biopython_records(records)
     consensusRecord.id = id
     consensusRecord.description = description
     return consensusRecord
 
 
+def find_cache_key(consensusCache, records, context):
+    if not consensusCache.is_enabled():
+        return None
+    return consensusCache.find_cache_key(
+        records, context.find_consensus_configuration()
+    )
+
+
+def find_cached_consensus(consensusCache, cacheKey, path, printer):
+    if cacheKey is None:
+        return None
+    consensusRecord = consensusCache.load(cacheKey)
+    if consensusRecord is not None:
+        printer(f" ***** using cached consensus for {path}")
+    return consensusRecord
+
+
+def store_cached_consensus(consensusCache, cacheKey, consensusRecord):
+    if cacheKey is not None and consensusRecord is not None:
+        consensusCache.store(cacheKey, consensusRecord)
+
+
+def report_failed_consensus(path, error, printer):
+    printer(f" ***** skipping {path}, consensus generation failed: {error}")
+
+
+def generate_consensus_record_or_report_failure(path, records, context, printer):
+    try:
+        return context.generate_consensus_record_from_biopython_records(records)
+    except ExternalProcessError as error:
+        report_failed_consensus(path, error, printer)
+        return None
+
+
+def find_consensus_and_add_to_writing_queue(path, records, context, printer):
+    consensusCache = ConsensusCache()
+    cacheKey = find_cache_key(consensusCache, records, context)
+    consensusRecord = find_cached_consensus(consensusCache, cacheKey, path, printer)
+    if consensusRecord is not None:
+        return label_consensus_record(consensusRecord, path, records), True
+    printer(f" ***** {len(records)} reads: generating consensus for {path}")
+    consensusRecord = generate_consensus_record_or_report_failure(
+        path, records, context, printer
+    )
+    if consensusRecord is None:
+        return None, False
+    store_cached_consensus(consensusCache, cacheKey, consensusRecord)
+    return label_consensus_record(consensusRecord, path, records), False
+
+
+def find_consensus_batch_and_add_to_writing_queue(paths, recordBatch, context, printer):
+    if len(paths) == 1:
+        consensusRecord, isCached = find_consensus_and_add_to_writing_queue(
+            paths[0], recordBatch[0], context, printer
+        )
+        return [consensusRecord], [isCached]
+    consensusCache = ConsensusCache()
+    cacheKeys = [
+        find_cache_key(consensusCache, records, context) for records in recordBatch
+    ]
+    consensusRecords = [
+        find_cached_consensus(consensusCache, cacheKey, path, printer)
+        for cacheKey, path in zip(cacheKeys, paths)
+    ]
+    cachedFlags = [consensusRecord is not None for consensusRecord in consensusRecords]
+    uncachedIndices = [
+        index for index, isCached in enumerate(cachedFlags) if not isCached
+    ]
+    for index in uncachedIndices:
+        printer(
+            f" ***** {len(recordBatch[index])} reads: generating consensus for {paths[index]}"
+        )
+    if uncachedIndices:
+        try:
+            generatedRecords = (
+                context.generate_consensus_records_from_biopython_record_batch(
+                    [recordBatch[index] for index in uncachedIndices]
+                )
+            )
+        except ExternalProcessError as error:
+            printer(
+                f" ***** batch consensus failed, retrying one file at a time: {error}"
+            )
+            generatedRecords = [
+                generate_consensus_record_or_report_failure(
+                    paths[index], recordBatch[index], context, printer
+                )
+                for index in uncachedIndices
+            ]
+        for index, consensusRecord in zip(uncachedIndices, generatedRecords):
+            store_cached_consensus(consensusCache, cacheKeys[index], consensusRecord)
+            consensusRecords[index] = consensusRecord
+    labeledRecords = [
+        (
+            label_consensus_record(consensusRecord, path, records)
+            if consensusRecord is not None
+            else None
+        )
+        for consensusRecord, path, records in zip(consensusRecords, paths, recordBatch)
+    ]
+    return labeledRecords, cachedFlags
+
+
+def find_timed_consensus_batch(paths, recordBatch, context, printer):
+    startTime = time.perf_counter()
+    consensusRecords, cachedFlags = find_consensus_batch_and_add_to_writing_queue(
+        paths, recordBatch, context, printer
+    )
+    seconds = time.perf_counter() - startTime
+    finishedIndices = [
+        index
+        for index, consensusRecord in enumerate(consensusRecords)
+        if consensusRecord is not None
+    ]
+    return (
+        [paths[index] for index in finishedIndices],
+        [consensusRecords[index] for index in finishedIndices],
+        seconds,
+        [cachedFlags[index] for index in finishedIndices],
+    )
+
+
+async def find_consensus_async(
+    path, records, context, printer, consensusSlots, processPool
+):
+    consensusCache = ConsensusCache()
+    cacheKey = find_cache_key(consensusCache, records, context)
+    consensusRecord = find_cached_consensus(consensusCache, cacheKey, path, printer)
+    if consensusRecord is not None:
+        return (
+            [path],
+            [label_consensus_record(consensusRecord, path, records)],
+            0.0,
+            [True],
+        )
+    async with consensusSlots:
+        printer(f" ***** {len(records)} reads: generating consensus for {path}")
+        startTime = time.perf_counter()
+        try:
+            consensusRecord = (
+                await context.generate_consensus_record_from_biopython_records_async(
+                    records, processPool
+                )
+            )
+        except ExternalProcessError as error:
+            report_failed_consensus(path, error, printer)
+            return [], [], 0.0, []
+        seconds = time.perf_counter() - startTime
+    store_cached_consensus(consensusCache, cacheKey, consensusRecord)
+    return (
+        [path],
+        [label_consensus_record(consensusRecord, path, records)],
+        seconds,
+        [False],
+    )
+
+
+async def write_consensus_records_with_async_external_processes(
+    consensusPaths,
+    inputRecords,
+    context,
+    printer,
+    processPool,
+    write_finished_consensus,
+    ordered=False,
+):
+    consensusSlots = asyncio.Semaphore(EXTERNAL_PROCESS["processNum"] or os.cpu_count())
+    consensusTasks = (
+        asyncio.ensure_future(
+            find_consensus_async(
+                path,
+                inputRecords[path],
+                context,
+                printer,
+                consensusSlots,
+                processPool,
+            )
+        )
+        for path in consensusPaths
+    )
+    if not ordered:
+        for consensusTask in asyncio.as_completed(list(consensusTasks)):
+            write_finished_consensus(*await consensusTask)
+        return
+    windowSize = (EXTERNAL_PROCESS["processNum"] or os.cpu_count()) * (
+        SUBMISSION_WINDOW["tasksPerWorker"]
+    )
+    pendingTasks = deque()
+    for consensusTask in consensusTasks:
+        pendingTasks.append(consensusTask)
+        if len(pendingTasks) >= windowSize:
+            write_finished_consensus(*await pendingTasks.popleft())
+    while pendingTasks:
+        write_finished_consensus(*await pendingTasks.popleft())
+
+
+def submit_tasks_with_bounded_window(
+    processPool, taskFunction, taskArguments, windowSize, ordered=False
+):
+    taskArguments = enumerate(taskArguments)
+    futureProcesses = {}
+    reorderBuffer = {}
+    nextTaskIndex = 0
+    while True:
+        openSlots = windowSize - len(futureProcesses) - len(reorderBuffer)
+        for taskIndex, arguments in islice(taskArguments, max(openSlots, 0)):
+            futureProcess = processPool.submit(taskFunction, *arguments)
+            futureProcesses[futureProcess] = taskIndex
+        if not futureProcesses:
+            return
+        finishedProcesses, _ = wait(futureProcesses, return_when=FIRST_COMPLETED)
+        for futureProcess in finishedProcesses:
+            taskIndex = futureProcesses.pop(futureProcess)
+            if not ordered:
+                yield futureProcess.result()
+                continue
+            reorderBuffer[taskIndex] = futureProcess.result()
+        while nextTaskIndex in reorderBuffer:
+            yield reorderBuffer.pop(nextTaskIndex)
+            nextTaskIndex += 1
+
+
 def writing_to_file_from_queue(queue, consensusFilePath):
     with open(consensusFilePath, "w") as output_handle:
         while True:
@@ -35,13 +274,28 @@ def writing_to_file_from_queue(queue, consensusFilePath):
 
 def main(args):
     printer = Printer()
+    PAIRWISE_VOTING["qualityWeightedVoting"] = args["qualityWeightedVoting"]
     context = ConsensusContext(args["consensusAlgorithm"])
-    pathsSortedByLength = sorted(args["input"])
-    pathsSortedByLength = sorted(
-        pathsSortedByLength, key=lambda k: len(args["input"][k]), reverse=True
-    )
+    binCostModel = BinCostModel(consensusAlgorithm=args["consensusAlgorithm"])
+    if args["resume"]:
+        args["output"] = args["resume"]
+    consensusManifest = ConsensusManifest(args["output"])
     if args["lastTrain"]:
         LAST_TRAIN_PATH["ltp"] = args["lastTrain"]
+    if args["windowLength"]:
+        PAIRWISE_WINDOW["windowLength"] = args["windowLength"]
+        PAIRWISE_WINDOW["processNum"] = args["windowProcessNum"]
+    if args["scratchDirectory"]:
+        EXTERNAL_PROCESS["scratchDirectory"] = args["scratchDirectory"]
+    EXTERNAL_PROCESS["processNum"] = args["externalProcessNum"]
+    EXTERNAL_PROCESS_RUNNER["timeout"] = args["toolTimeout"]
+    EXTERNAL_PROCESS_RUNNER["retries"] = args["toolRetries"]
+    EXTERNAL_PROCESS_RUNNER["logFile"] = os.path.join(
+        args["output"], "external_process_log.csv"
+    )
+    CONSENSUS_BATCH["batchSize"] = args["batchSize"]
+    CONSENSUS_CACHE["cacheDirectory"] = args["cacheDirectory"]
+    CONSENSUS_CACHE["maximumSize"] = args["cacheSize"] * 1024**2
 
     outputFileType = determine_output_file_type(args["consensusAlgorithm"])
     consensusFilePath = os.path.join(
@@ -50,30 +304,109 @@ def main(args):
         + "."
         + outputFileType,
     )
+    if args["resume"]:
+        consensusFilePath = consensusManifest.find_consensus_file_path(
+            consensusFilePath
+        )
+        if os.path.isfile(consensusFilePath):
+            consensusManifest.load_completed_paths()
+        printer(
+            f"resuming, {len(consensusManifest.completedPaths)} files already completed"
+        )
     print("output folder: " + consensusFilePath)
     printer("beginning consensus sequence generation")
 
     consensusGenerationProcessPool: ProcessPoolExecutor = ProcessPoolExecutor(
-        max_workers=args["processNum"]
+        max_workers=args["processNum"],
+        initializer=initialize_external_process_worker,
+        initargs=(
+            create_external_process_slots(),
+            dict(EXTERNAL_PROCESS),
+            dict(EXTERNAL_PROCESS_RUNNER),
+            find_consensus_settings(),
+        ),
     )
-    futureProcesses: T.List[Future] = []
+    consensusPaths = [
+        path
+        for path in args["input"]
+        if len(args["input"][path]) >= args["minimumReads"]
+    ]
+    if len(consensusPaths) < len(args["input"]):
+        printer(
+            f"skipping {len(args['input']) - len(consensusPaths)} files with fewer than minimum read number ({args['minimumReads']})"
+        )
+    consensusPaths = [
+        path for path in consensusPaths if path not in consensusManifest.completedPaths
+    ]
+    if args["orderedOutput"]:
+        consensusPaths = sorted(consensusPaths)
+    else:
+        if args["costModel"] and binCostModel.calibrate_from_timing_file(
+            args["costModel"]
+        ):
+            printer("ordering files by cost model calibrated from earlier bin timings")
+        consensusPaths = binCostModel.sort_paths_by_expected_cost(
+            consensusPaths, args["input"]
+        )
+    output_handle = consensusManifest.open_consensus_file(consensusFilePath)
 
-    for path in pathsSortedByLength:
-        records = args["input"][path]
-        if len(records) < args["minimumReads"]:
-            printer(
-                f"remaining files have fewer than minimum read number ({args['minimumReads']}), ending program"
+    def write_finished_consensus(paths, consensusRecords, seconds, cachedFlags):
+        if not paths:
+            return
+        timedPaths = [
+            path for path, isCached in zip(paths, cachedFlags) if not isCached
+        ]
+        if args["costModel"] and timedPaths:
+            binCostModel.record_timings(
+                args["costModel"],
+                timedPaths,
+                [args["input"][path] for path in timedPaths],
+                seconds,
             )
-            break
-        futureProcesses.append(
-            consensusGenerationProcessPool.submit(
-                find_consensus_and_add_to_writing_queue, path, records, context, printer
+        SeqIO.write(consensusRecords, output_handle, outputFileType)
+        consensusManifest.record_completed_paths(paths, output_handle)
+
+    if args["asyncExternalProcesses"]:
+        with output_handle:
+            asyncio.run(
+                write_consensus_records_with_async_external_processes(
+                    consensusPaths,
+                    args["input"],
+                    context,
+                    printer,
+                    consensusGenerationProcessPool,
+                    write_finished_consensus,
+                    args["orderedOutput"],
+                )
             )
-        )
+        printer("consensus generation complete")
+        return
 
-    with open(consensusFilePath, "w") as output_handle:
-        for futureProcess in as_completed(futureProcesses):
-            SeqIO.write([futureProcess.result()], output_handle, outputFileType)
+    batchSize = CONSENSUS_BATCH["batchSize"]
+    batchPathsList = [
+        consensusPaths[batchStart : batchStart + batchSize]
+        for batchStart in range(0, len(consensusPaths), batchSize)
+    ]
+    windowSize = (args["processNum"] or os.cpu_count()) * SUBMISSION_WINDOW[
+        "tasksPerWorker"
+    ]
+    with output_handle:
+        for consensusResult in submit_tasks_with_bounded_window(
+            consensusGenerationProcessPool,
+            find_timed_consensus_batch,
+            (
+                (
+                    batchPaths,
+                    [args["input"][path] for path in batchPaths],
+                    context,
+                    printer,
+                )
+                for batchPaths in batchPathsList
+            ),
+            windowSize,
+            args["orderedOutput"],
+        ):
+            write_finished_consensus(*consensusResult)
 
     printer("consensus generation complete")
 
@@ -89,4 +422,6 @@ def determine_output_file_type(consensusAlgorithm):
         args = vars(args)
         if args["f"] or args["format"]:
             return args["f"]
+    if consensusAlgorithm == "pairwise":
+        return "fastq"
     return "fasta"
@@ -1,18 +1,27 @@
-import more_itertools as mit
-import functools
-import operator
+import numpy as np
+
+
+def find_runs_of_character(string, character):
+    characterColumns = np.frombuffer(string.encode(), dtype=np.uint8) == ord(character)
+    runEdges = np.diff(np.concatenate([[0], characterColumns.astype(np.int8), [0]]))
+    return np.flatnonzero(runEdges == 1), np.flatnonzero(runEdges == -1)
 
 
 def find_in_string_indices_of_character(string, character):
-    individialIndices = [
-        index for index, value in enumerate(string) if value == character
-    ]
+    runStarts, runEnds = find_runs_of_character(string, character)
     indicesGroupedConsecutively = [
-        list(group) for group in mit.consecutive_groups(individialIndices)
+        list(range(runStart, runEnd))
+        for runStart, runEnd in zip(runStarts.tolist(), runEnds.tolist())
     ]
     return indicesGroupedConsecutively
 
 
+def find_insertion_columns(originalSequenceAlignment):
+    return np.flatnonzero(
+        np.frombuffer(originalSequenceAlignment.encode(), dtype=np.uint8) == ord("-")
+    )
+
+
 def inject_difference_into_sequence(sequence, difference):
     startIndex, endIndex, insert = difference
     alteredSequence = sequence[:startIndex] + insert + sequence[endIndex:]
@@ -20,17 +29,20 @@ def inject_difference_into_sequence(sequence, difference):
 
 
 def identify_differences_from_indices(
-    type, indices, originalSequenceAlignment, differentSequenceAlignment
+    type,
+    indices,
+    originalSequenceAlignment,
+    differentSequenceAlignment,
+    insertionColumns=None,
 ):
     differences = []
     format_difference_from_index = format_difference_from_index_function_generator(type)
-    insertIndices = find_in_string_indices_of_character(originalSequenceAlignment, "-")
-    if insertIndices:
-        insertIndices = functools.reduce(operator.iconcat, insertIndices)
-    for index in indices:
-        numInsertsBeforeIndex = sum(
-            indelIndex < index[0] for indelIndex in insertIndices
-        )
+    if insertionColumns is None:
+        insertionColumns = find_insertion_columns(originalSequenceAlignment)
+    numInsertsBeforeIndices = np.searchsorted(
+        insertionColumns, [index[0] for index in indices]
+    ).tolist()
+    for index, numInsertsBeforeIndex in zip(indices, numInsertsBeforeIndices):
         startIndex, endIndex, insert = format_difference_from_index(
             index, differentSequenceAlignment
         )
@@ -71,3 +83,106 @@ def format_mutation_difference_from_index(index, differentSequenceAlignment):
     endIndex = index[-1] + 1
     insert = differentSequenceAlignment[index[0] : index[-1] + 1]
     return startIndex, endIndex, insert
+
+
+def find_window_boundaries(sequenceLength, windowLength, overlapLength):
+    windowBoundaries = []
+    startIndex = 0
+    while True:
+        endIndex = min(startIndex + windowLength + overlapLength, sequenceLength)
+        windowBoundaries.append((startIndex, endIndex))
+        if endIndex == sequenceLength:
+            return windowBoundaries
+        startIndex += windowLength
+
+
+def map_target_indices_to_query_indices(alignedBlocks, targetLength, queryLength):
+    targetToQueryIndices = np.full(targetLength + 1, queryLength, dtype=np.int64)
+    for (targetStart, targetEnd), (queryStart, queryEnd) in zip(*alignedBlocks):
+        targetToQueryIndices[targetStart:targetEnd] = np.arange(queryStart, queryEnd)
+    targetToQueryIndices = np.minimum.accumulate(targetToQueryIndices[::-1])[::-1]
+    targetToQueryIndices[0] = 0
+    return targetToQueryIndices
+
+
+def find_aligned_blocks_from_alignment_strings(
+    originalSequenceAlignment, differentSequenceAlignment
+):
+    originalGaps = np.frombuffer(
+        originalSequenceAlignment.encode(), dtype=np.uint8
+    ) == ord("-")
+    differentGaps = np.frombuffer(
+        differentSequenceAlignment.encode(), dtype=np.uint8
+    ) == ord("-")
+    originalIndices = np.cumsum(~originalGaps) - ~originalGaps
+    differentIndices = np.cumsum(~differentGaps) - ~differentGaps
+    alignedColumns = np.concatenate([[0], ~(originalGaps | differentGaps), [0]])
+    blockEdges = np.diff(alignedColumns.astype(np.int8))
+    blockStarts = np.flatnonzero(blockEdges == 1)
+    blockLengths = np.flatnonzero(blockEdges == -1) - blockStarts
+    originalBlocks = np.stack(
+        [originalIndices[blockStarts], originalIndices[blockStarts] + blockLengths],
+        axis=1,
+    )
+    differentBlocks = np.stack(
+        [differentIndices[blockStarts], differentIndices[blockStarts] + blockLengths],
+        axis=1,
+    )
+    return originalBlocks, differentBlocks
+
+
+def find_base_counts_before_columns(sequenceAlignment):
+    sequenceCodes = np.frombuffer(sequenceAlignment.encode(), dtype=np.uint8)
+    sequenceBases = sequenceCodes != ord("-")
+    return np.concatenate([[0], np.cumsum(sequenceBases)])
+
+
+def find_summed_qualities_of_column_runs(
+    runStarts, runEnds, basesBeforeColumns, qualityPrefixSums
+):
+    baseStarts = basesBeforeColumns[runStarts]
+    baseEnds = basesBeforeColumns[runEnds]
+    isDeletion = baseStarts == baseEnds
+    flankStarts = np.maximum(baseStarts - 1, 0)
+    flankEnds = np.minimum(baseEnds + 1, len(qualityPrefixSums) - 1)
+    flankQualities = (
+        qualityPrefixSums[flankEnds] - qualityPrefixSums[flankStarts]
+    ) / np.maximum(flankEnds - flankStarts, 1)
+    return np.where(
+        isDeletion,
+        flankQualities,
+        qualityPrefixSums[baseEnds] - qualityPrefixSums[baseStarts],
+    )
+
+
+def encode_differences(differences):
+    startIndices, endIndices, inserts = zip(*differences)
+    _, insertCodes = np.unique(np.array(inserts), return_inverse=True)
+    differenceKeys = np.stack(
+        [startIndices, endIndices, insertCodes.reshape(-1)], axis=1
+    )
+    _, firstIndices, differenceCodes = np.unique(
+        differenceKeys, axis=0, return_index=True, return_inverse=True
+    )
+    return differenceCodes.reshape(-1), firstIndices
+
+
+def count_matching_reads_at_each_position(sequenceLength, alignments):
+    matchCounts = np.zeros(sequenceLength, dtype=np.int64)
+    for _, originalSequenceAlignment, indelIndicator, _ in alignments:
+        originalCodes = np.frombuffer(
+            originalSequenceAlignment.encode(), dtype=np.uint8
+        )
+        originalIndices = np.cumsum(originalCodes != ord("-")) - 1
+        indicatorCodes = np.frombuffer(indelIndicator.encode(), dtype=np.uint8)
+        matchColumns = indicatorCodes == ord("|")
+        matchCounts += np.bincount(
+            originalIndices[matchColumns], minlength=sequenceLength
+        )
+    return matchCounts
+
+
+def convert_match_counts_to_phred_qualities(matchCounts, readCount, maximumQuality):
+    errorProbabilities = (readCount - matchCounts + 1) / (readCount + 2)
+    phredQualities = np.round(-10 * np.log10(errorProbabilities))
+    return np.minimum(phredQualities, maximumQuality).astype(int).tolist()
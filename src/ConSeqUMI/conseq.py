@@ -16,6 +16,8 @@ def main():
     args = vars(parser.parse_args())
     if args["command"] == "gui" or not args["command"]:
         gui.main()
+    if args.get("resume"):
+        args["output"] = args["resume"]
     printer(f"output directory: {args['output']}")
     if args["command"] == "umi":
         umi.main(args)
@@ -73,7 +75,7 @@ def set_command_line_settings():
     )
     consParser = commandParser.add_parser(
         "cons",
-        help="Finds a consensus sequence for each fastq file in a given directory and writes them to a single output fasta file.",
+        help="Finds a consensus sequence for each fastq file in a given directory and writes them to a single output fasta file (fastq with per-base consensus qualities for the pairwise algorithm).",
     )
     consParser.add_argument(
         "-i",
@@ -82,19 +84,25 @@ def set_command_line_settings():
         required=True,
         help="Path to directory that only contains fastq files. Note that each individual fastq file should contain sequences that contribute to a single consensus. If directing at the 'umi' command output, this will be the 'bins' directory in the 'umi' command output.",
     )
-    consParser.add_argument(
+    consOutputGroup = consParser.add_mutually_exclusive_group(required=True)
+    consOutputGroup.add_argument(
         "-o",
         "--output",
         type=OutputDirectory("consensus"),
-        required=True,
         help="Path for folder output. The folder will be created with a time stamp.",
     )
+    consOutputGroup.add_argument(
+        "-re",
+        "--resume",
+        type=ResumeDirectory(),
+        help="Path to the output folder of an interrupted cons run, used instead of --output. Files listed in the consensus_manifest.tsv file of that folder are skipped and new consensus sequences are appended to its consensus file. Use the same input and settings as the interrupted run.",
+    )
     consParser.add_argument(
         "-c",
         "--consensusAlgorithm",
         type=ConsensusAlgorithmText(),
         default="pairwise",
-        help="An option between two consensus sequence algorithms. Default is a customized algorithm that relies on pairwise alignment, which can be slow for larger sequences. Options: pairwise (default), lamassemble",
+        help="An option between several consensus sequence algorithms. Default is a customized algorithm that relies on pairwise alignment, which can be slow for larger sequences. The poa option builds a partial order alignment graph and requires no external programs. Options: pairwise (default), lamassemble, medaka, poa",
     )
     consParser.add_argument(
         "-m",
@@ -116,17 +124,118 @@ def set_command_line_settings():
         type=LastTrainFile(),
         help="Path to a last-train mat file for lamassemble. If you have already put the path to the desired file in the consensus/config.py file, this flag is unnecessary and should not be used.",
     )
+    consParser.add_argument(
+        "-w",
+        "--windowLength",
+        type=ConseqInt("windowLength"),
+        default=0,
+        help="Pairwise algorithm only. Length of the windows that long target sequences are split into, minimum 100. Each window is polished independently against the matching stretch of every read and the windows are stitched back together, which is much faster for long amplicons. By default windowing is turned off.",
+    )
+    consParser.add_argument(
+        "-wp",
+        "--windowProcessNum",
+        type=ConseqInt("windowProcessNum"),
+        default=1,
+        help="Pairwise algorithm only. Number of processes used to polish the windows of a single consensus sequence when --windowLength is set. By default it will only use 1. Useful when there are only a few very large clusters.",
+    )
+    consParser.add_argument(
+        "-qw",
+        "--qualityWeightedVoting",
+        action="store_true",
+        help="Pairwise algorithm only. Weight each read's vote for a candidate edit by the sum of its base qualities over the edit (the qualities on either side for deletions) instead of counting every read once. Only used when every read in a file has base qualities. By default every read counts once.",
+    )
+    consParser.add_argument(
+        "-sd",
+        "--scratchDirectory",
+        type=ScratchDirectory(),
+        default="",
+        help="Lamassemble and medaka only. Directory where temporary read and draft files for the external programs are written. Each worker process reuses its own folder inside it. Default is /dev/shm (memory-backed) when available, otherwise the system temporary directory.",
+    )
+    consParser.add_argument(
+        "-ep",
+        "--externalProcessNum",
+        type=ConseqInt("externalProcessNum"),
+        default=0,
+        help="Lamassemble and medaka only. Maximum number of external lamassemble or medaka processes that may run at the same time across all worker processes. By default there is no separate limit (one per worker process).",
+    )
+    consParser.add_argument(
+        "-tt",
+        "--toolTimeout",
+        type=ConseqInt("toolTimeout"),
+        default=0,
+        help="Lamassemble and medaka only. Number of seconds a single lamassemble or medaka run may take before it is stopped and counted as failed. By default there is no time limit.",
+    )
+    consParser.add_argument(
+        "-tr",
+        "--toolRetries",
+        type=ConseqInt("toolRetries"),
+        default=0,
+        help="Lamassemble and medaka only. Number of times a failed or timed out lamassemble or medaka run is repeated before giving up. Every run is recorded in the external_process_log.csv file of the output folder. Default is 0.",
+    )
+    consParser.add_argument(
+        "-b",
+        "--batchSize",
+        type=ConseqInt("batchSize"),
+        default=1,
+        help="Number of fastq files handed to a worker process at once. With the medaka algorithm, every file in a batch is polished by a single medaka model run per polishing round instead of one run per file, which avoids reloading the model. Default is 1.",
+    )
+    consParser.add_argument(
+        "-as",
+        "--asyncExternalProcesses",
+        action="store_true",
+        help="Lamassemble and medaka only. Drive the external lamassemble or medaka processes from a single asyncio event loop instead of spending a worker process on each file, with at most --externalProcessNum files (default: the number of CPUs) in flight at once. Other steps, such as building the medaka draft, still run on the --processNum worker processes. --batchSize is ignored in this mode, and the maxRssKilobytes column of external_process_log.csv is left empty because the event loop, not conseq, collects the finished processes.",
+    )
+    consParser.add_argument(
+        "-cm",
+        "--costModel",
+        type=CostModelFile(),
+        default="",
+        help="Path to a csv file of per-file consensus timings. Timings from earlier runs of the same algorithm in this file are used to estimate how long each file will take (from its read count and mean read length), and the most expensive files are started first. The timings of this run are appended to the file, which is created if it does not exist. By default files are ordered by read count times mean read length.",
+    )
+    consParser.add_argument(
+        "-cd",
+        "--cacheDirectory",
+        type=CacheDirectory(),
+        default="",
+        help="Path to an existing folder used as a consensus cache shared between runs. Consensus sequences are stored under a hash of the reads in each file, the algorithm and its settings, so re-running the same files (for example with a different --minimumReads or output folder) reuses earlier results. By default there is no cache.",
+    )
+    consParser.add_argument(
+        "-cs",
+        "--cacheSize",
+        type=ConseqInt("cacheSize"),
+        default=1024,
+        help="Maximum size of the --cacheDirectory folder in megabytes. The least recently used consensus sequences are removed beyond this size. Default is 1024.",
+    )
+    consParser.add_argument(
+        "-oo",
+        "--orderedOutput",
+        action="store_true",
+        help="Process and write files sorted by input file path instead of writing them in the order they finish, so repeated runs give identical output files. Files are not reordered by expected cost or --costModel in this mode. Finished sequences that are ahead of their turn are held in a small buffer bounded by the number of tasks in flight.",
+    )
     benchmarkParser = commandParser.add_parser(
         "benchmark",
         help="Creates a benchmarking data analysis file for evaluating the accuracy of a provided consensus sequence algorithm when applied to a given input fastq file.",
     )
-    benchmarkParser.add_argument(
+    benchmarkInputGroup = benchmarkParser.add_mutually_exclusive_group(required=True)
+    benchmarkInputGroup.add_argument(
         "-i",
         "--input",
         type=InputFile("input"),
-        required=True,
         help="Path to a fastq file. Note that the fastq file should contain sequences that contribute to a single consensus. If directing at the 'umi' command output, this will be in the 'bins' directory in the 'umi' command output.",
     )
+    benchmarkInputGroup.add_argument(
+        "-ib",
+        "--inputBins",
+        type=BenchmarkBinDirectory(),
+        help="Path to a directory of fastq files, such as the 'bins' directory in the 'umi' command output, used instead of --input. Every file is benchmarked as its own bin in a single shared pool of worker processes, and per-bin and aggregated accuracy by read depth tables are written next to the benchmark file. Without -r, a reference sequence is generated for each bin from all of its reads.",
+    )
+    benchmarkParser.add_argument(
+        "-nb",
+        "--binNumber",
+        type=ConseqInt("binNumber"),
+        default=0,
+        help="Used with -ib or --inputBins. Number of bins chosen at random from the directory to benchmark. By default every bin is benchmarked.",
+    )
     benchmarkParser.add_argument(
         "-o",
         "--output",
@@ -144,9 +253,9 @@ def set_command_line_settings():
     benchmarkParser.add_argument(
         "-c",
         "--consensusAlgorithm",
-        type=ConsensusAlgorithmText(),
+        type=BenchmarkConsensusAlgorithms(),
         default="pairwise",
-        help="An option between two consensus sequence algorithms. Default is a customized algorithm that relies on pairwise alignment, which can be slow for larger sequences. Options: pairwise (default), lamassemble",
+        help="An option between several consensus sequence algorithms. Default is a customized algorithm that relies on pairwise alignment, which can be slow for larger sequences. The poa option builds a partial order alignment graph and requires no external programs. Options: pairwise (default), lamassemble, medaka, poa. Users can also provide a comma-delimited list of algorithms to compare them. If provided 'pairwise,poa' every random subsample is given to both algorithms and the results are written to the same file, with the algorithm and the time it took in the last two columns. Without -r, the reference sequence is generated with the first algorithm.",
     )
     benchmarkParser.add_argument(
         "-int",
@@ -160,7 +269,47 @@ def set_command_line_settings():
         "--iterations",
         type=ConseqInt("iterations"),
         default=100,
-        help="Number of iterations that occur at each interval. Default is 100. For example, at default, the program will generate a consensus sequence 100 times from randomly selecting 10 sequences, then 100 times for 20 sequences etc.",
+        help="Number of iterations that occur at each interval. Default is 100. For example, at default, the program will generate a consensus sequence 100 times from randomly selecting 10 sequences, then 100 times for 20 sequences etc. When -ct or --convergenceThreshold is provided, this is the maximum number of iterations per interval.",
+    )
+    benchmarkParser.add_argument(
+        "-ct",
+        "--convergenceThreshold",
+        type=ConvergenceThreshold(),
+        default=0,
+        help="Stops iterating an interval early once the 95%% confidence interval of its mean levenshtein distance is narrower than plus or minus this value (checked after at least 10 iterations). For example, at 0.5 an interval whose consensus sequences always match the reference stops after 10 iterations. By default every interval runs all iterations.",
+    )
+    benchmarkParser.add_argument(
+        "-ns",
+        "--nestedSubsamples",
+        action="store_true",
+        help="Draw one random ordering of the reads per iteration and use its first 1, 10, 20 etc. reads as the subsamples of that iteration, so each larger subsample contains the smaller ones. All intervals of an iteration are then computed by one worker from reads decoded once, and the pairwise algorithm reuses the read alignments the smaller subsamples already computed, which makes accuracy by read depth curves much cheaper without changing their results. Subsamples in this mode are not looked up in --cacheDirectory.",
+    )
+    benchmarkParser.add_argument(
+        "-s",
+        "--seed",
+        type=ConseqInt("seed"),
+        default=None,
+        help="Seed for the random subsamples. Every subsample is drawn from its own random stream derived from the seed, the bin, the interval and the iteration, so the same seed gives the same subsamples regardless of --processNum or of which other intervals are run. By default a new seed is chosen and printed at the start of the run.",
+    )
+    benchmarkParser.add_argument(
+        "-cd",
+        "--cacheDirectory",
+        type=CacheDirectory(),
+        default="",
+        help="Path to an existing folder used as a consensus cache shared between runs, as with the 'cons' command. Combined with --seed, re-running a benchmark reuses the consensus sequences of every subsample it has already seen. Rows served from the cache are marked True in the cachedConsensus column and left out of the reported consensus times. By default there is no cache.",
+    )
+    benchmarkParser.add_argument(
+        "-cs",
+        "--cacheSize",
+        type=ConseqInt("cacheSize"),
+        default=1024,
+        help="Maximum size of the --cacheDirectory folder in megabytes. The least recently used consensus sequences are removed beyond this size. Default is 1024.",
+    )
+    benchmarkParser.add_argument(
+        "-co",
+        "--compactOutput",
+        action="store_true",
+        help="Writes the benchmark results as a compressed numpy (.npz) table instead of a csv file. The reference sequence is only stored in reference.fasta, each distinct benchmark sequence is written once to a -sequences.fasta file named by its hash, and every row records substitution, insertion and deletion counts alongside the levenshtein distance.",
     )
     benchmarkParser.add_argument(
         "-p",
@@ -175,6 +324,34 @@ def set_command_line_settings():
         type=LastTrainFile(),
         help="Path to a last-train mat file for lamassemble. If you have already put the path to the desired file in the consensus/config.py file, this flag is unnecessary and should not be used.",
     )
+    benchmarkParser.add_argument(
+        "-sd",
+        "--scratchDirectory",
+        type=ScratchDirectory(),
+        default="",
+        help="Lamassemble and medaka only. Directory where temporary read and draft files for the external programs are written. Each worker process reuses its own folder inside it. Default is /dev/shm (memory-backed) when available, otherwise the system temporary directory.",
+    )
+    benchmarkParser.add_argument(
+        "-ep",
+        "--externalProcessNum",
+        type=ConseqInt("externalProcessNum"),
+        default=0,
+        help="Lamassemble and medaka only. Maximum number of external lamassemble or medaka processes that may run at the same time across all worker processes. By default there is no separate limit (one per worker process).",
+    )
+    benchmarkParser.add_argument(
+        "-tt",
+        "--toolTimeout",
+        type=ConseqInt("toolTimeout"),
+        default=0,
+        help="Lamassemble and medaka only. Number of seconds a single lamassemble or medaka run may take before it is stopped and counted as failed. By default there is no time limit.",
+    )
+    benchmarkParser.add_argument(
+        "-tr",
+        "--toolRetries",
+        type=ConseqInt("toolRetries"),
+        default=0,
+        help="Lamassemble and medaka only. Number of times a failed or timed out lamassemble or medaka run is repeated before giving up. Every run is recorded in the external_process_log.csv file of the output folder. Default is 0.",
+    )
     return parser
 
 
@@ -218,6 +395,27 @@ class InputDirectory:
             return records
 
 
+class BenchmarkBinDirectory:
+    def __init__(self):
+        self.allowedFileTypes = set(["fastq", "fq"])
+
+    def __call__(self, name):
+        if not os.path.isdir(name):
+            raise argparse.ArgumentTypeError(
+                "The -ib or --inputBins argument must be an existing directory."
+            )
+        binPaths = sorted(
+            os.path.join(name, file)
+            for file in os.listdir(name)
+            if file.split(".")[-1] in self.allowedFileTypes
+        )
+        if len(binPaths) == 0:
+            raise argparse.ArgumentTypeError(
+                "The -ib or --inputBins argument directory must contain fastq files (.fq or .fastq)."
+            )
+        return binPaths
+
+
 def generate_output_name(consensusAlgorithm):
     return "ConSeqUMI-" + consensusAlgorithm + time.strftime("-%Y%m%d-%H%M%S") + "/"
 
@@ -246,6 +444,28 @@ class OutputDirectory:
         return name
 
 
+class CacheDirectory:
+    def __call__(self, name):
+        if name == "":
+            return name
+        if not os.path.isdir(name):
+            raise argparse.ArgumentTypeError(
+                "The -cd or --cacheDirectory argument must be an existing directory."
+            )
+        return name
+
+
+class ResumeDirectory:
+    def __call__(self, name):
+        if not os.path.isdir(name):
+            raise argparse.ArgumentTypeError(
+                "The -re or --resume argument must be an existing directory."
+            )
+        if name[-1] != "/":
+            name += "/"
+        return name
+
+
 class AdapterFile:
     def __init__(self):
         self.allowedFileTypes = set(["txt"])
@@ -279,12 +499,14 @@ class AdapterFile:
 
 class ConsensusAlgorithmText:
     def __init__(self):
-        self.validConsensusArgorithms = set(["pairwise", "lamassemble", "medaka"])
+        self.validConsensusArgorithms = set(
+            ["pairwise", "lamassemble", "medaka", "poa"]
+        )
 
     def __call__(self, name):
         if name not in self.validConsensusArgorithms:
             raise argparse.ArgumentTypeError(
-                f"The -c or --consensusAlgorithm argument must be 'pairwise', 'lamassemble' or 'medaka'. Offending value: {name}"
+                f"The -c or --consensusAlgorithm argument must be 'pairwise', 'lamassemble', 'medaka' or 'poa'. Offending value: {name}"
             )
         if name == "medaka" and not which("medaka_consensus"):
             raise argparse.ArgumentTypeError(
@@ -296,6 +518,29 @@ class ConsensusAlgorithmText:
             )
         return name
 
+
+class BenchmarkConsensusAlgorithms:
+    def __call__(self, consensusAlgorithmInput):
+        consensusAlgorithmText = ConsensusAlgorithmText()
+        consensusAlgorithms = []
+        for consensusAlgorithm in consensusAlgorithmInput.split(","):
+            consensusAlgorithm = consensusAlgorithmText(consensusAlgorithm)
+            if consensusAlgorithm not in consensusAlgorithms:
+                consensusAlgorithms.append(consensusAlgorithm)
+        return ",".join(consensusAlgorithms)
+
+
+class ScratchDirectory:
+    def __call__(self, name):
+        if name == "":
+            return name
+        if not os.path.isdir(name):
+            raise argparse.ArgumentTypeError(
+                "The -sd or --scratchDirectory argument must be an existing directory."
+            )
+        return name
+
+
 class LastTrainFile:
 
     def __call__(self, name):
@@ -333,6 +578,35 @@ class ConseqInt:
         elif type == "processNum":
             self.type = "processNum"
             self.conciseType = "p"
+        elif type == "windowLength":
+            self.minValue = 100
+            self.type = "windowLength"
+            self.conciseType = "w"
+        elif type == "windowProcessNum":
+            self.type = "windowProcessNum"
+            self.conciseType = "wp"
+        elif type == "batchSize":
+            self.type = "batchSize"
+            self.conciseType = "b"
+        elif type == "externalProcessNum":
+            self.type = "externalProcessNum"
+            self.conciseType = "ep"
+        elif type == "toolTimeout":
+            self.type = "toolTimeout"
+            self.conciseType = "tt"
+        elif type == "toolRetries":
+            self.type = "toolRetries"
+            self.conciseType = "tr"
+        elif type == "cacheSize":
+            self.type = "cacheSize"
+            self.conciseType = "cs"
+        elif type == "binNumber":
+            self.type = "binNumber"
+            self.conciseType = "nb"
+        elif type == "seed":
+            self.minValue = 0
+            self.type = "seed"
+            self.conciseType = "s"
 
     def __call__(self, name):
         try:
@@ -341,11 +615,22 @@ class ConseqInt:
             raise argparse.ArgumentTypeError(
                 f"The -{self.conciseType} or --{self.type} argument must be an integer. Offending value: {name}"
             )
-        if nameInt < self.minValue and not (self.type == "umiLength" and nameInt == 0):
+        if nameInt < self.minValue and not (
+            self.type
+            in [
+                "umiLength",
+                "windowLength",
+                "externalProcessNum",
+                "toolTimeout",
+                "toolRetries",
+                "binNumber",
+            ]
+            and nameInt == 0
+        ):
             raise argparse.ArgumentTypeError(
                 f"The -{self.conciseType} or --{self.type} argument must be greater than or equal to {self.minValue}. Offending value: {name}"
             )
-        if nameInt > os.cpu_count() and self.type == "processNum":
+        if nameInt > os.cpu_count() and self.type in ["processNum", "windowProcessNum"]:
             nameInt = None
 
         return nameInt
@@ -359,6 +644,38 @@ class BenchmarkInterval:
         return intervalInputs
 
 
+class ConvergenceThreshold:
+    def __call__(self, name):
+        try:
+            threshold = float(name)
+        except ValueError:
+            raise argparse.ArgumentTypeError(
+                f"The -ct or --convergenceThreshold argument must be a number. Offending value: {name}"
+            )
+        if threshold < 0:
+            raise argparse.ArgumentTypeError(
+                f"The -ct or --convergenceThreshold argument must be greater than or equal to 0. Offending value: {name}"
+            )
+        return threshold
+
+
+class CostModelFile:
+    def __call__(self, name):
+        if name == "":
+            return name
+        if os.path.isdir(name) or not os.path.isdir(
+            os.path.dirname(os.path.abspath(name))
+        ):
+            raise argparse.ArgumentTypeError(
+                "The -cm or --costModel argument must be a file in an existing directory."
+            )
+        if name.split(".")[-1] != "csv":
+            raise argparse.ArgumentTypeError(
+                "The -cm or --costModel argument file can only be a csv file (.csv)."
+            )
+        return name
+
+
 class InputFile:
     def __init__(self, type):
         if type == "input":
@@ -90,7 +90,7 @@ class BenchmarkTabWindow(TabWindow):
     def set_setting_layout(self, settingLayout: QFormLayout) -> None:
         self.consensusAlgorithmLabel = QLabel("Consensus Algorithm")
         self.consensusAlgorithmComboBox = QComboBox()
-        self.consensusAlgorithmComboBox.addItems(["pairwise", "lamassemble", "medaka"])
+        self.consensusAlgorithmComboBox.addItems(["pairwise", "lamassemble", "medaka", "poa"])
         settingLayout.addRow(
             self.consensusAlgorithmLabel, self.consensusAlgorithmComboBox
         )
@@ -70,7 +70,7 @@ class ConsensusTabWindow(TabWindow):
     def set_setting_layout(self, settingLayout: QFormLayout) -> None:
         self.consensusAlgorithmLabel = QLabel("Consensus Algorithm")
         self.consensusAlgorithmComboBox = QComboBox()
-        self.consensusAlgorithmComboBox.addItems(["pairwise", "lamassemble", "medaka"])
+        self.consensusAlgorithmComboBox.addItems(["pairwise", "lamassemble", "medaka", "poa"])
         settingLayout.addRow(
             self.consensusAlgorithmLabel, self.consensusAlgorithmComboBox
         )
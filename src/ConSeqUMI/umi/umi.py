@@ -1,8 +1,8 @@
 import os
-import subprocess
 from io import StringIO
 import pandas as pd
 from ConSeqUMI.config import SCOMMAND
+from ConSeqUMI.ExternalProcessRunner import ExternalProcessRunner
 from ConSeqUMI.umi.UmiExtractor import UmiExtractor
 from ConSeqUMI.umi import umiBinningFunctions
 from Bio import SeqIO
@@ -35,6 +35,7 @@ def main(args):
     printer("create 'data_analysis' folder and add dropped read analysis file")
     dataAnalysisPath = args["output"] + "data_analysis/"
     os.mkdir(dataAnalysisPath)
+    externalProcessLogFile = dataAnalysisPath + "external_process_log.csv"
     readErrorDataFrame = pd.DataFrame(
         errorMarkers,
         columns=[
@@ -53,10 +54,14 @@ def main(args):
         )
     printer("run starcode")
     topUmiToReadIndices = starcode(
-        topRawUmis, dataAnalysisPath + "starcode_output_for_top_umis.csv"
+        topRawUmis,
+        dataAnalysisPath + "starcode_output_for_top_umis.csv",
+        logFile=externalProcessLogFile,
     )
     bottomUmiToReadIndices = starcode(
-        bottomRawUmis, dataAnalysisPath + "starcode_output_for_bottom_umis.csv"
+        bottomRawUmis,
+        dataAnalysisPath + "starcode_output_for_bottom_umis.csv",
+        logFile=externalProcessLogFile,
     )
     printer("pair top and bottom umi starcode results by matching reads")
     (
@@ -112,20 +117,16 @@ def main(args):
     printer("UMI extraction and binning complete")
 
 
-def starcode(umis, file=None):
+def starcode(umis, file=None, logFile=""):
     umisAsTextFileString = "\n".join(umis)
-    child = subprocess.Popen(
-        SCOMMAND,
-        stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
+    child = ExternalProcessRunner(logFile=logFile).run(
+        SCOMMAND, inputText=umisAsTextFileString
     )
-    child.stdin.write(umisAsTextFileString.encode())
-    child_out = child.communicate()[0].decode("utf8")
+    child_out = child.stdout.decode("utf8")
     starcodeOutput = pd.read_csv(StringIO(child_out), sep="\t", header=None)
     starcodeOutput.columns = ["umi", "count", "readIndices"]
     if file:
         starcodeOutput.to_csv(file, index=False)
-    child.stdin.close()
     umiToReadIndicesDict = starcodeOutput.set_index("umi").to_dict()["readIndices"]
     for umi, readIndices in umiToReadIndicesDict.items():
         if isinstance(readIndices, str):
@@ -0,0 +1,107 @@
+import pytest
+import random
+import sys
+import os
+from Bio.Align import PairwiseAligner
+
+srcPath = os.getcwd().split("/")[:-1]
+srcPath = "/".join(srcPath) + "/src/ConSeqUMI"
+sys.path.insert(1, srcPath)
+testsPath = os.getcwd().split("/")[:-1]
+testsPath = "/".join(testsPath) + "/tests"
+sys.path.insert(1, testsPath)
+from pytestConsensusFixtures import (
+    consensusSequence,
+    targetSequences,
+    simpleInsert,
+)
+from consensus.BandedAligner import BandedAligner
+from consensus.ConsensusStrategyPairwise import ConsensusStrategyPairwise
+
+
+@pytest.fixture
+def bandedAligner():
+    return BandedAligner()
+
+
+@pytest.fixture
+def consensusStrategyPairwise():
+    return ConsensusStrategyPairwise()
+
+
+def test__banded_aligner__initialization():
+    bandedAligner = BandedAligner(
+        matchScore=2,
+        mismatchScore=-2,
+        openGapScore=-3,
+        extendGapScore=-1,
+        errorRate=0.1,
+        minimumBandWidth=5,
+    )
+    assert bandedAligner.matchScore == 2
+    assert bandedAligner.mismatchScore == -2
+    assert bandedAligner.openGapScore == -3
+    assert bandedAligner.extendGapScore == -1
+    assert bandedAligner.errorRate == 0.1
+    assert bandedAligner.minimumBandWidth == 5
+
+
+def test__banded_aligner__determine_band_width_grows_with_length_difference(
+    bandedAligner,
+):
+    bandWidth = bandedAligner.determine_band_width(1000, 1000)
+    assert bandWidth > bandedAligner.minimumBandWidth
+    assert bandedAligner.determine_band_width(1000, 1050) == bandWidth + 50
+
+
+def test__banded_aligner__align_matches_full_alignment(
+    bandedAligner, consensusSequence, targetSequences, consensusStrategyPairwise
+):
+    for targetSequence in targetSequences:
+        alignment = consensusStrategyPairwise.aligner.align(
+            consensusSequence, targetSequence
+        )[0]
+        alignmentStrings = consensusStrategyPairwise.break_down_alignment_to_strings(
+            alignment
+        )
+        score, *alignmentStringsOutput = bandedAligner.align(
+            consensusSequence, targetSequence
+        )
+        assert score == alignment.score
+        assert tuple(alignmentStringsOutput) == alignmentStrings
+
+
+def test__banded_aligner__align_matches_full_alignment_for_random_sequences(
+    bandedAligner, consensusStrategyPairwise
+):
+    random.seed(0)
+    for _ in range(20):
+        originalSequence = "".join(random.choices("ACGT", k=300))
+        differentSequence = list(originalSequence)
+        for index in sorted(random.sample(range(300), k=10))[::-1]:
+            differentSequence[index : index + 1] = random.choice(
+                [[], ["A", differentSequence[index]], ["T"]]
+            )
+        differentSequence = "".join(differentSequence)
+        alignment = consensusStrategyPairwise.aligner.align(
+            originalSequence, differentSequence
+        )[0]
+        score, *alignmentStringsOutput = bandedAligner.align(
+            originalSequence, differentSequence
+        )
+        assert score == alignment.score
+        assert tuple(
+            alignmentStringsOutput
+        ) == consensusStrategyPairwise.break_down_alignment_to_strings(alignment)
+
+
+def test__banded_aligner__align_handles_empty_sequences(bandedAligner):
+    assert bandedAligner.align("", "ACG") == (-2.0, "---", "---", "ACG")
+    assert bandedAligner.align("ACG", "") == (-2.0, "ACG", "---", "---")
+
+
+def test__banded_aligner__align_returns_none_when_band_is_exceeded(bandedAligner):
+    random.seed(0)
+    originalSequence = "".join(random.choices("ACGT", k=400))
+    rotatedSequence = originalSequence[200:] + originalSequence[:200]
+    assert bandedAligner.align(originalSequence, rotatedSequence) is None
@@ -0,0 +1,105 @@
+import pytest
+import sys
+import os
+from tempfile import TemporaryDirectory
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
+
+srcPath = os.getcwd().split("/")[:-1]
+srcPath = "/".join(srcPath) + "/src/ConSeqUMI"
+sys.path.insert(1, srcPath)
+testsPath = os.getcwd().split("/")[:-1]
+testsPath = "/".join(testsPath) + "/tests"
+sys.path.insert(1, testsPath)
+from pytestConsensusFixtures import (
+    consensusSequence,
+    targetSequences,
+    targetSequenceRecords,
+    simpleInsert,
+)
+from consensus.BenchmarkReadStore import (
+    BENCHMARK_READ_STORE,
+    BenchmarkReadStore,
+    initialize_benchmark_worker,
+)
+
+
+@pytest.fixture
+def storeDirectory():
+    storeDirectory = TemporaryDirectory(prefix="conseq_benchmark_store_test_")
+    yield storeDirectory.name
+    storeDirectory.cleanup()
+
+
+def test__benchmark_read_store__find_records_round_trips_sequences_and_qualities(
+    storeDirectory, targetSequenceRecords, consensusSequence
+):
+    benchmarkReadStore = BenchmarkReadStore.create(
+        targetSequenceRecords, consensusSequence, storeDirectory
+    )
+    assert len(benchmarkReadStore) == len(targetSequenceRecords)
+    assert benchmarkReadStore.referenceSequence == consensusSequence
+    for index in [len(targetSequenceRecords) - 1, 0]:
+        storedRecord = benchmarkReadStore.find_record(index)
+        assert str(storedRecord.seq) == str(targetSequenceRecords[index].seq)
+        assert storedRecord.id == targetSequenceRecords[index].id
+        assert (
+            storedRecord.letter_annotations["phred_quality"]
+            == targetSequenceRecords[index].letter_annotations["phred_quality"]
+        )
+    assert [str(record.seq) for record in benchmarkReadStore.find_records([2, 1])] == [
+        str(targetSequenceRecords[2].seq),
+        str(targetSequenceRecords[1].seq),
+    ]
+
+
+def test__benchmark_read_store__records_without_qualities(
+    storeDirectory, consensusSequence
+):
+    binRecords = [
+        SeqRecord(Seq("ACGT"), id="first"),
+        SeqRecord(Seq("GGA"), id="second"),
+    ]
+    benchmarkReadStore = BenchmarkReadStore.create(
+        binRecords, consensusSequence, storeDirectory
+    )
+    storedRecord = benchmarkReadStore.find_record(1)
+    assert str(storedRecord.seq) == "GGA"
+    assert "phred_quality" not in storedRecord.letter_annotations
+
+
+def test__benchmark_read_store__worker_attaches_memory_mapped_store(
+    storeDirectory, targetSequenceRecords, consensusSequence
+):
+    BenchmarkReadStore.create(targetSequenceRecords, consensusSequence, storeDirectory)
+    initialize_benchmark_worker(storeDirectory, None, {})
+    attachedStore = BENCHMARK_READ_STORE["store"]
+    BENCHMARK_READ_STORE["store"] = None
+    assert attachedStore.storeDirectory == storeDirectory
+    assert attachedStore.referenceSequence == consensusSequence
+    assert str(attachedStore.find_record(0).seq) == str(targetSequenceRecords[0].seq)
+
+
+def test__benchmark_read_store__remove(targetSequenceRecords, consensusSequence):
+    benchmarkReadStore = BenchmarkReadStore.create(
+        targetSequenceRecords, consensusSequence
+    )
+    assert os.path.isdir(benchmarkReadStore.storeDirectory)
+    benchmarkReadStore.remove()
+    assert not os.path.exists(benchmarkReadStore.storeDirectory)
+
+
+def test__benchmark_read_store__create_from_bins(
+    storeDirectory, targetSequenceRecords, consensusSequence
+):
+    benchmarkReadStore = BenchmarkReadStore.create_from_bins(
+        [targetSequenceRecords[:4], targetSequenceRecords[4:]],
+        [consensusSequence, consensusSequence[1:]],
+        storeDirectory,
+    )
+    assert benchmarkReadStore.find_bin_size(0) == 4
+    assert benchmarkReadStore.find_bin_size(1) == len(targetSequenceRecords) - 4
+    assert benchmarkReadStore.referenceSequences[1] == consensusSequence[1:]
+    assert benchmarkReadStore.find_records([0], binIndex=1)[0].id == (
+        targetSequenceRecords[4].id
+    )
@@ -0,0 +1,100 @@
+import pytest
+import csv
+import sys
+import os
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
+
+srcPath = os.getcwd().split("/")[:-1]
+srcPath = "/".join(srcPath) + "/src/ConSeqUMI"
+sys.path.insert(1, srcPath)
+testsPath = os.getcwd().split("/")[:-1]
+testsPath = "/".join(testsPath) + "/tests"
+sys.path.insert(1, testsPath)
+from consensus.BinCostModel import BinCostModel
+
+
+def generate_bin_records(readCount, readLength):
+    return [
+        SeqRecord(Seq("A" * readLength), id=f"read{index}")
+        for index in range(readCount)
+    ]
+
+
+@pytest.fixture
+def binCostModel():
+    return BinCostModel(consensusAlgorithm="pairwise")
+
+
+@pytest.fixture
+def inputRecords():
+    return {
+        "manyShortReads.fastq": generate_bin_records(400, 100),
+        "fewLongReads.fastq": generate_bin_records(40, 800),
+        "fewShortReads.fastq": generate_bin_records(40, 100),
+    }
+
+
+@pytest.fixture
+def timingFile(tmp_path):
+    return str(tmp_path / "timings.csv")
+
+
+def test__bin_cost_model__find_bin_features(binCostModel):
+    binRecords = generate_bin_records(3, 10) + generate_bin_records(1, 50)
+    assert binCostModel.find_bin_features(binRecords) == (4, 20.0)
+    assert binCostModel.find_bin_features([]) == (0, 0.0)
+
+
+def test__bin_cost_model__estimate_cost__uncalibrated_uses_total_bases(
+    binCostModel, inputRecords
+):
+    assert binCostModel.estimate_cost(inputRecords["manyShortReads.fastq"]) == 40000
+    assert binCostModel.sort_paths_by_expected_cost(
+        list(inputRecords), inputRecords
+    ) == ["manyShortReads.fastq", "fewLongReads.fastq", "fewShortReads.fastq"]
+
+
+def test__bin_cost_model__calibrate_from_timing_file(
+    binCostModel, inputRecords, timingFile
+):
+    for readCount, readLength in [(10, 100), (50, 100), (10, 1000), (50, 1000)]:
+        binRecords = generate_bin_records(readCount, readLength)
+        binCostModel.record_timings(
+            timingFile,
+            [f"bin_{readCount}_{readLength}.fastq"],
+            [binRecords],
+            0.001 * readCount * readLength**2,
+        )
+    assert not BinCostModel(consensusAlgorithm="medaka").calibrate_from_timing_file(
+        timingFile
+    )
+    assert binCostModel.calibrate_from_timing_file(timingFile)
+    assert binCostModel.estimate_cost(generate_bin_records(20, 500)) == pytest.approx(
+        0.001 * 20 * 500**2
+    )
+    assert binCostModel.sort_paths_by_expected_cost(
+        list(inputRecords), inputRecords
+    ) == ["fewLongReads.fastq", "manyShortReads.fastq", "fewShortReads.fastq"]
+
+
+def test__bin_cost_model__calibrate_from_timing_file__requires_existing_file(
+    binCostModel, timingFile
+):
+    assert not binCostModel.calibrate_from_timing_file(timingFile)
+    assert binCostModel.coefficients is None
+
+
+def test__bin_cost_model__record_timings__splits_batch_time_by_bin_size(
+    binCostModel, inputRecords, timingFile
+):
+    paths = ["manyShortReads.fastq", "fewShortReads.fastq"]
+    binCostModel.record_timings(
+        timingFile, paths, [inputRecords[path] for path in paths], 11.0
+    )
+    with open(timingFile) as file:
+        timingRows = list(csv.DictReader(file))
+    assert [timingRow["path"] for timingRow in timingRows] == paths
+    assert [float(timingRow["seconds"]) for timingRow in timingRows] == [10.0, 1.0]
+    assert timingRows[0]["consensusAlgorithm"] == "pairwise"
+    assert timingRows[0]["readCount"] == "400"
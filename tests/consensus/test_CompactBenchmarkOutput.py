@@ -0,0 +1,126 @@
+import pytest
+import sys
+import os
+from Bio import SeqIO
+
+srcPath = os.getcwd().split("/")[:-1]
+srcPath = "/".join(srcPath) + "/src/ConSeqUMI"
+sys.path.insert(1, srcPath)
+testsPath = os.getcwd().split("/")[:-1]
+testsPath = "/".join(testsPath) + "/tests"
+sys.path.insert(1, testsPath)
+from consensus.CompactBenchmarkOutput import CompactBenchmarkOutput
+
+
+@pytest.fixture
+def referenceSequence():
+    return "ACGTACGTAC"
+
+
+@pytest.fixture
+def compactBenchmarkOutput(tmp_path):
+    return CompactBenchmarkOutput(str(tmp_path / "benchmark-test"))
+
+
+def test__compact_benchmark_output__find_error_breakdown(
+    compactBenchmarkOutput, referenceSequence
+):
+    assert compactBenchmarkOutput.find_error_breakdown(
+        referenceSequence, referenceSequence
+    ) == (0, 0, 0)
+    assert compactBenchmarkOutput.find_error_breakdown(
+        referenceSequence, "ACGTTCGTAC"
+    ) == (1, 0, 0)
+    assert compactBenchmarkOutput.find_error_breakdown(
+        referenceSequence, "ACGTACGTACG"
+    ) == (0, 1, 0)
+    assert compactBenchmarkOutput.find_error_breakdown(
+        referenceSequence, "ACGTACGTA"
+    ) == (0, 0, 1)
+
+
+def test__compact_benchmark_output__write_and_load(
+    compactBenchmarkOutput, referenceSequence
+):
+    rows = [
+        [
+            "1",
+            "0",
+            referenceSequence,
+            "ACGTTCGTAC",
+            "1",
+            "14",
+            "pairwise",
+            "0.5",
+            "bin1",
+            "False",
+        ],
+        [
+            "10",
+            "0",
+            referenceSequence,
+            referenceSequence,
+            "0",
+            "14",
+            "poa",
+            "0.25",
+            "bin1",
+            "False",
+        ],
+        [
+            "10",
+            "1",
+            referenceSequence,
+            referenceSequence,
+            "0",
+            "14",
+            "poa",
+            "0.25",
+            "bin1",
+            "True",
+        ],
+        [
+            "1",
+            "1",
+            referenceSequence,
+            "ACGTACGTA",
+            "1",
+            "14",
+            "pairwise",
+            "0.5",
+            "bin1",
+            "False",
+        ],
+    ]
+    with open(compactBenchmarkOutput.sequencesPath, "w") as sequencesFile:
+        for row in rows:
+            compactBenchmarkOutput.add_row(row, sequencesFile)
+    compactBenchmarkOutput.write()
+    sequenceRecords = list(SeqIO.parse(compactBenchmarkOutput.sequencesPath, "fasta"))
+    assert [str(record.seq) for record in sequenceRecords] == [
+        "ACGTTCGTAC",
+        referenceSequence,
+        "ACGTACGTA",
+    ]
+    benchmarkDf = CompactBenchmarkOutput.load(compactBenchmarkOutput.resultsPath)
+    assert list(benchmarkDf["interval"]) == [1, 10, 10, 1]
+    assert list(benchmarkDf["iteration"]) == [0, 0, 1, 1]
+    assert list(benchmarkDf["levenshteinDistance"]) == [1, 0, 0, 1]
+    assert list(benchmarkDf["substitutions"]) == [1, 0, 0, 0]
+    assert list(benchmarkDf["deletions"]) == [0, 0, 0, 1]
+    assert list(benchmarkDf["originalNumberOfSequences"]) == [14] * 4
+    assert list(benchmarkDf["consensusAlgorithm"]) == [
+        "pairwise",
+        "poa",
+        "poa",
+        "pairwise",
+    ]
+    assert list(benchmarkDf["wallTimeSeconds"]) == [0.5, 0.25, 0.25, 0.5]
+    assert list(benchmarkDf["bin"]) == ["bin1"] * 4
+    assert list(benchmarkDf["cachedConsensus"]) == [False, False, True, False]
+    assert list(benchmarkDf["sequenceHash"]) == [
+        sequenceRecords[0].id,
+        sequenceRecords[1].id,
+        sequenceRecords[1].id,
+        sequenceRecords[2].id,
+    ]
@@ -0,0 +1,137 @@
+import pytest
+import sys
+import os
+import time
+from tempfile import TemporaryDirectory
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
+
+srcPath = os.getcwd().split("/")[:-1]
+srcPath = "/".join(srcPath) + "/src/ConSeqUMI"
+sys.path.insert(1, srcPath)
+testsPath = os.getcwd().split("/")[:-1]
+testsPath = "/".join(testsPath) + "/tests"
+sys.path.insert(1, testsPath)
+from pytestConsensusFixtures import (
+    consensusSequence,
+    targetSequences,
+    targetSequenceRecords,
+    simpleInsert,
+)
+from consensus.ConsensusCache import ConsensusCache
+
+
+@pytest.fixture
+def cacheDirectory():
+    cacheDirectory = TemporaryDirectory(prefix="conseq_cache_test_")
+    yield cacheDirectory.name
+    cacheDirectory.cleanup()
+
+
+@pytest.fixture
+def consensusCache(cacheDirectory):
+    return ConsensusCache(cacheDirectory=cacheDirectory, maximumSize=1024**2)
+
+
+@pytest.fixture
+def consensusConfiguration():
+    return {"algorithm": "pairwise", "alignerScores": [1, -1, -1, -0.5]}
+
+
+def test__consensus_cache__is_enabled():
+    assert not ConsensusCache(cacheDirectory="").is_enabled()
+    assert ConsensusCache(cacheDirectory="/tmp").is_enabled()
+
+
+def test__consensus_cache__find_cache_key__depends_on_reads_qualities_and_configuration(
+    consensusCache, targetSequenceRecords, consensusConfiguration
+):
+    cacheKey = consensusCache.find_cache_key(
+        targetSequenceRecords, consensusConfiguration
+    )
+    assert cacheKey == consensusCache.find_cache_key(
+        targetSequenceRecords, dict(consensusConfiguration)
+    )
+    assert cacheKey != consensusCache.find_cache_key(
+        targetSequenceRecords[1:], consensusConfiguration
+    )
+    assert cacheKey != consensusCache.find_cache_key(
+        targetSequenceRecords, {**consensusConfiguration, "algorithm": "poa"}
+    )
+    changedQualityRecord = targetSequenceRecords[0][:]
+    changedQualityRecord.letter_annotations["phred_quality"] = [1] * len(
+        changedQualityRecord
+    )
+    assert cacheKey != consensusCache.find_cache_key(
+        [changedQualityRecord] + targetSequenceRecords[1:], consensusConfiguration
+    )
+
+
+def test__consensus_cache__store_and_load(consensusCache, consensusSequence):
+    assert consensusCache.load("missingKey") is None
+    fastaRecord = SeqRecord(Seq(consensusSequence), id="consensus")
+    consensusCache.store("fastaKey", fastaRecord)
+    assert str(consensusCache.load("fastaKey").seq) == consensusSequence
+    fastqRecord = SeqRecord(
+        Seq(consensusSequence),
+        id="consensus",
+        letter_annotations={"phred_quality": [30] * len(consensusSequence)},
+    )
+    consensusCache.store("fastqKey", fastqRecord)
+    loadedRecord = consensusCache.load("fastqKey")
+    assert str(loadedRecord.seq) == consensusSequence
+    assert loadedRecord.letter_annotations["phred_quality"] == [30] * len(
+        consensusSequence
+    )
+
+
+def test__consensus_cache__evicts_least_recently_used_entries(
+    cacheDirectory, consensusSequence
+):
+    consensusRecord = SeqRecord(Seq(consensusSequence), id="consensus")
+    consensusCache = ConsensusCache(cacheDirectory=cacheDirectory, maximumSize=10**6)
+    consensusCache.store("firstKey", consensusRecord)
+    entrySize = os.path.getsize(consensusCache.find_cache_path("firstKey", "fasta"))
+    consensusCache.maximumSize = 2 * entrySize
+    consensusCache.store("secondKey", consensusRecord)
+    oldTime = time.time() - 100
+    os.utime(consensusCache.find_cache_path("firstKey", "fasta"), (oldTime, oldTime))
+    os.utime(
+        consensusCache.find_cache_path("secondKey", "fasta"),
+        (oldTime - 100, oldTime - 100),
+    )
+    assert consensusCache.load("secondKey") is not None
+    consensusCache.store("thirdKey", consensusRecord)
+    assert consensusCache.load("firstKey") is None
+    assert consensusCache.load("secondKey") is not None
+    assert consensusCache.load("thirdKey") is not None
+    assert sorted(os.listdir(cacheDirectory)) == ["secondKey.fasta", "thirdKey.fasta"]
+
+
+def test__consensus_cache__store__only_scans_cache_directory_when_full(
+    cacheDirectory, consensusSequence, monkeypatch
+):
+    consensusRecord = SeqRecord(Seq(consensusSequence), id="consensus")
+    consensusCache = ConsensusCache(cacheDirectory=cacheDirectory, maximumSize=10**6)
+    consensusCache.store("firstKey", consensusRecord)
+    entrySize = os.path.getsize(consensusCache.find_cache_path("firstKey", "fasta"))
+    scannedCacheEntries = []
+    find_cache_entries = consensusCache.find_cache_entries
+
+    def find_and_record_cache_entries():
+        cacheEntries = find_cache_entries()
+        scannedCacheEntries.append(cacheEntries)
+        return cacheEntries
+
+    monkeypatch.setattr(
+        consensusCache, "find_cache_entries", find_and_record_cache_entries
+    )
+    consensusCache.store("firstKey", consensusRecord)
+    consensusCache.store("secondKey", consensusRecord)
+    assert scannedCacheEntries == []
+    assert consensusCache.find_cache_size() == 2 * entrySize
+    consensusCache.maximumSize = 2 * entrySize
+    consensusCache.store("thirdKey", consensusRecord)
+    assert len(scannedCacheEntries) == 1
+    assert consensusCache.find_cache_size() == 2 * entrySize
+    assert len(os.listdir(cacheDirectory)) == 2
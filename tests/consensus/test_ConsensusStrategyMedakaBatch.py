@@ -0,0 +1,283 @@
+import pytest
+import sys
+import os
+import stat
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from tempfile import TemporaryDirectory
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
+
+srcPath = os.getcwd().split("/")[:-1]
+srcPath = "/".join(srcPath) + "/src/ConSeqUMI"
+sys.path.insert(1, srcPath)
+testsPath = os.getcwd().split("/")[:-1]
+testsPath = "/".join(testsPath) + "/tests"
+sys.path.insert(1, testsPath)
+from pytestConsensusFixtures import (
+    consensusSequence,
+    targetSequences,
+    targetSequenceRecords,
+    simpleInsert,
+)
+from consensus import ConsensusStrategyMedaka
+from consensus import ExternalProcessExecutor
+
+fakeMedakaToolScript = """#!{python}
+import os
+import sys
+from Bio import SeqIO
+
+toolName = os.path.basename(sys.argv[0])
+arguments = sys.argv[1:]
+with open(os.path.join(os.path.dirname(sys.argv[0]), "calls.txt"), "a") as callFile:
+    callFile.write(" ".join([toolName] + arguments[:1]) + "\\n")
+if toolName == "medaka" and os.environ.get("FAKE_MEDAKA_EXIT_CODE"):
+    sys.stderr.write("fake medaka failure")
+    sys.exit(int(os.environ["FAKE_MEDAKA_EXIT_CODE"]))
+if toolName == "mini_align":
+    draftFile = arguments[arguments.index("-r") + 1]
+    alignmentPrefix = arguments[arguments.index("-p") + 1]
+    readFile = arguments[arguments.index("-i") + 1]
+    draftRecord = next(SeqIO.parse(draftFile, "fasta"))
+    readCount = len(list(SeqIO.parse(readFile, "fastq")))
+    with open(alignmentPrefix + ".bam", "w") as alignmentFile:
+        alignmentFile.write(f"{{draftRecord.id}}\\t{{readCount}}\\n")
+elif toolName == "samtools" and arguments[0] == "merge":
+    with open(arguments[2], "w") as mergedFile:
+        for alignmentFilePath in arguments[3:]:
+            with open(alignmentFilePath) as alignmentFile:
+                mergedFile.write(alignmentFile.read())
+elif toolName == "medaka" and arguments[0] == "consensus":
+    with open(arguments[1]) as mergedFile, open(arguments[2], "w") as probabilityFile:
+        probabilityFile.write(mergedFile.read())
+elif toolName == "medaka_consensus":
+    draftFile = arguments[arguments.index("-d") + 1]
+    outputDirectory = arguments[arguments.index("-o") + 1]
+    os.makedirs(outputDirectory, exist_ok=True)
+    draftRecord = next(SeqIO.parse(draftFile, "fasta"))
+    with open(os.path.join(outputDirectory, "consensus.fasta"), "w") as consensusFile:
+        consensusFile.write(f">{{draftRecord.id}}\\n{{str(draftRecord.seq).rstrip('N')}}\\n")
+elif toolName == "medaka" and arguments[0] == "stitch":
+    alignedContigs = dict(
+        line.split("\\t") for line in open(arguments[1]).read().splitlines()
+    )
+    with open(arguments[3], "w") as consensusFile:
+        for draftRecord in SeqIO.parse(arguments[2], "fasta"):
+            polishedSequence = str(draftRecord.seq).rstrip("N")
+            if draftRecord.id == os.environ.get("FAKE_MEDAKA_SPLIT_CONTIG"):
+                splitIndex = len(polishedSequence) // 2
+                consensusFile.write(f">{{draftRecord.id}}:0-{{splitIndex}}\\n")
+                consensusFile.write(polishedSequence[:splitIndex] + "\\n")
+                consensusFile.write(
+                    f">{{draftRecord.id}}:{{splitIndex}}-{{len(polishedSequence)}}\\n"
+                )
+                consensusFile.write(polishedSequence[splitIndex:] + "\\n")
+            elif draftRecord.id in alignedContigs and str(draftRecord.seq).endswith("N"):
+                consensusFile.write(f">{{draftRecord.id}}:0-{{len(polishedSequence)}}\\n")
+                consensusFile.write(polishedSequence + "\\n")
+            elif draftRecord.id in alignedContigs:
+                consensusFile.write(f">{{draftRecord.id}}\\n{{polishedSequence}}\\n")
+"""
+
+
+@pytest.fixture
+def fakeMedakaTools(monkeypatch):
+    toolDirectory = TemporaryDirectory(prefix="conseq_fake_medaka_tools_")
+    for toolName in ["mini_align", "samtools", "medaka", "medaka_consensus"]:
+        toolPath = os.path.join(toolDirectory.name, toolName)
+        with open(toolPath, "w") as toolFile:
+            toolFile.write(fakeMedakaToolScript.format(python=sys.executable))
+        os.chmod(toolPath, os.stat(toolPath).st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", toolDirectory.name + os.pathsep + os.environ["PATH"])
+    monkeypatch.setitem(
+        ExternalProcessExecutor.EXTERNAL_PROCESS,
+        "scratchDirectory",
+        toolDirectory.name,
+    )
+    strategyExternalProcessExecutor = sys.modules[
+        ConsensusStrategyMedaka.ExternalProcessExecutor.__module__
+    ]
+    for externalProcessExecutorModule in [
+        ExternalProcessExecutor,
+        strategyExternalProcessExecutor,
+    ]:
+        monkeypatch.setattr(
+            externalProcessExecutorModule, "WORKER_SCRATCH_DIRECTORIES", {}
+        )
+    yield toolDirectory.name
+    toolDirectory.cleanup()
+
+
+def read_fake_medaka_tool_calls(fakeMedakaTools):
+    with open(os.path.join(fakeMedakaTools, "calls.txt")) as callFile:
+        return callFile.read().splitlines()
+
+
+@pytest.fixture
+def consensusStrategyMedaka():
+    return ConsensusStrategyMedaka.ConsensusStrategyMedaka()
+
+
+def test__consensus_strategy_medaka__find_medaka_model(consensusStrategyMedaka):
+    assert consensusStrategyMedaka.find_medaka_model() == "r941_min_high_g303"
+
+
+def test__consensus_strategy_medaka__polish_draft_records_in_single_medaka_run(
+    consensusStrategyMedaka, fakeMedakaTools, targetSequenceRecords
+):
+    externalProcessExecutor = ExternalProcessExecutor.ExternalProcessExecutor("medaka")
+    readFilePath = externalProcessExecutor.find_scratch_path("input.fastq")
+    ConsensusStrategyMedaka.SeqIO.write(targetSequenceRecords, readFilePath, "fastq")
+    draftRecords = [
+        SeqRecord(Seq("ACGTNN"), id="bin0"),
+        SeqRecord(Seq("TTTT"), id="bin1"),
+    ]
+    polishedRecordsOutput = (
+        consensusStrategyMedaka.polish_draft_records_in_single_medaka_run(
+            externalProcessExecutor, draftRecords, [readFilePath, readFilePath]
+        )
+    )
+    assert {
+        contigName: [str(record.seq) for record in records]
+        for contigName, records in polishedRecordsOutput.items()
+    } == {"bin0": ["ACGT"], "bin1": ["TTTT"]}
+    assert read_fake_medaka_tool_calls(fakeMedakaTools) == [
+        "mini_align -m",
+        "mini_align -m",
+        "samtools merge",
+        "samtools index",
+        "medaka consensus",
+        "medaka stitch",
+    ]
+
+
+def test__consensus_strategy_medaka__generate_consensus_records_from_biopython_record_batch(
+    consensusStrategyMedaka, fakeMedakaTools, consensusSequence, targetSequenceRecords
+):
+    binRecordBatch = [targetSequenceRecords, targetSequenceRecords[:10]] * 2
+    consensusRecordsOutput = (
+        consensusStrategyMedaka.generate_consensus_records_from_biopython_record_batch(
+            binRecordBatch
+        )
+    )
+    assert len(consensusRecordsOutput) == len(binRecordBatch)
+    assert [record.id for record in consensusRecordsOutput] == [
+        "bin0",
+        "bin1",
+        "bin2",
+        "bin3",
+    ]
+    assert str(consensusRecordsOutput[0].seq) == consensusSequence
+    toolCalls = read_fake_medaka_tool_calls(fakeMedakaTools)
+    assert toolCalls.count("medaka consensus") == 1
+    assert toolCalls.count("mini_align -m") == len(binRecordBatch)
+
+
+def test__consensus_strategy_medaka__generate_consensus_records_from_biopython_record_batch__keeps_drafts_when_medaka_fails(
+    consensusStrategyMedaka,
+    fakeMedakaTools,
+    consensusSequence,
+    targetSequenceRecords,
+    monkeypatch,
+):
+    monkeypatch.setenv("FAKE_MEDAKA_EXIT_CODE", "1")
+    binRecordBatch = [targetSequenceRecords, targetSequenceRecords[:10]]
+    consensusRecordsOutput = (
+        consensusStrategyMedaka.generate_consensus_records_from_biopython_record_batch(
+            binRecordBatch
+        )
+    )
+    assert [record.id for record in consensusRecordsOutput] == ["bin0", "bin1"]
+    assert str(consensusRecordsOutput[0].seq) == consensusSequence
+    toolCalls = read_fake_medaka_tool_calls(fakeMedakaTools)
+    assert toolCalls.count("medaka consensus") == 1
+    assert "medaka stitch" not in toolCalls
+
+
+def test__consensus_strategy_medaka__polish_draft_records_in_single_medaka_run__keeps_every_stitched_piece(
+    consensusStrategyMedaka, fakeMedakaTools, targetSequenceRecords, monkeypatch
+):
+    monkeypatch.setenv("FAKE_MEDAKA_SPLIT_CONTIG", "bin0")
+    externalProcessExecutor = ExternalProcessExecutor.ExternalProcessExecutor("medaka")
+    readFilePath = externalProcessExecutor.find_scratch_path("input.fastq")
+    ConsensusStrategyMedaka.SeqIO.write(targetSequenceRecords, readFilePath, "fastq")
+    draftRecords = [
+        SeqRecord(Seq("ACGTAC"), id="bin0"),
+        SeqRecord(Seq("TTTT"), id="bin1"),
+    ]
+    polishedRecordsOutput = (
+        consensusStrategyMedaka.polish_draft_records_in_single_medaka_run(
+            externalProcessExecutor, draftRecords, [readFilePath, readFilePath]
+        )
+    )
+    assert {
+        contigName: [str(record.seq) for record in records]
+        for contigName, records in polishedRecordsOutput.items()
+    } == {"bin0": ["ACG", "TAC"], "bin1": ["TTTT"]}
+
+
+def test__consensus_strategy_medaka__generate_consensus_records_from_biopython_record_batch__polishes_split_bins_separately(
+    consensusStrategyMedaka,
+    fakeMedakaTools,
+    consensusSequence,
+    targetSequenceRecords,
+    monkeypatch,
+):
+    monkeypatch.setenv("FAKE_MEDAKA_SPLIT_CONTIG", "bin0")
+    binRecordBatch = [targetSequenceRecords, targetSequenceRecords[:10]]
+    consensusRecordsOutput = (
+        consensusStrategyMedaka.generate_consensus_records_from_biopython_record_batch(
+            binRecordBatch
+        )
+    )
+    assert [record.id for record in consensusRecordsOutput] == ["bin0", "bin1"]
+    assert str(consensusRecordsOutput[0].seq) == consensusSequence
+    toolCalls = read_fake_medaka_tool_calls(fakeMedakaTools)
+    assert toolCalls.count("medaka consensus") == 1
+    assert toolCalls.count("medaka_consensus -f") == 1
+
+
+def test__consensus_strategy_medaka__generate_consensus_records_from_biopython_record_batch__polishes_bins_separately_without_model(
+    consensusStrategyMedaka, fakeMedakaTools, consensusSequence, targetSequenceRecords
+):
+    consensusStrategyMedaka.find_medaka_model = lambda: None
+    binRecordBatch = [targetSequenceRecords, targetSequenceRecords[:10]]
+    consensusRecordsOutput = (
+        consensusStrategyMedaka.generate_consensus_records_from_biopython_record_batch(
+            binRecordBatch
+        )
+    )
+    assert len(consensusRecordsOutput) == len(binRecordBatch)
+    assert str(consensusRecordsOutput[0].seq) == consensusSequence
+    toolCalls = read_fake_medaka_tool_calls(fakeMedakaTools)
+    assert "medaka consensus" not in toolCalls
+    assert toolCalls.count("medaka_consensus -f") == len(binRecordBatch)
+
+
+def test__consensus_strategy_medaka__generate_consensus_record_from_biopython_records_async(
+    consensusStrategyMedaka, fakeMedakaTools, consensusSequence, targetSequenceRecords
+):
+    async def generate_consensus_records(processPool):
+        return await asyncio.gather(
+            *[
+                consensusStrategyMedaka.generate_consensus_record_from_biopython_records_async(
+                    targetSequenceRecords, processPool
+                )
+                for _ in range(3)
+            ]
+        )
+
+    with ProcessPoolExecutor(max_workers=2) as processPool:
+        consensusRecordsOutput = asyncio.run(generate_consensus_records(processPool))
+    assert [str(record.seq) for record in consensusRecordsOutput] == [
+        consensusSequence
+    ] * 3
+    assert (
+        read_fake_medaka_tool_calls(fakeMedakaTools).count("medaka_consensus -f") == 3
+    )
+    assert not [
+        fileName
+        for fileName in os.listdir(fakeMedakaTools)
+        if fileName.startswith("conseq_medaka_delete_")
+    ]
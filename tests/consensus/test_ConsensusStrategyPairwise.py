@@ -8,6 +8,8 @@ import pandas as pd
 import re
 from concurrent.futures import Future, as_completed
 import typing as T
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
 
 srcPath = os.getcwd().split("/")[:-1]
 srcPath = "/".join(srcPath) + "/src/ConSeqUMI"
@@ -171,6 +173,53 @@ def test__consensus_strategy_pairwise__find_pairwise_score_and_all_differences_b
     assert deletionDifferencesOutput == deletionDifferences
 
 
+def test__consensus_strategy_pairwise__find_pairwise_score_and_all_differences_between_two_sequences__banded_alignment_finds_same_differences(
+    consensusSequence,
+    targetSequences,
+    targetSequenceDifferences,
+    consensusStrategyPairwise,
+    monkeypatch,
+):
+    monkeypatch.setitem(
+        ConsensusStrategyPairwise.BANDED_ALIGNMENT, "minimumSequenceLength", 0
+    )
+    targetSequenceDifferencesOutput = []
+    for targetSequence in targetSequences:
+        (
+            _,
+            differencesOutput,
+        ) = consensusStrategyPairwise.find_pairwise_score_and_all_differences_between_two_sequences(
+            consensusSequence, targetSequence
+        )
+        targetSequenceDifferencesOutput.extend(differencesOutput)
+    assert targetSequenceDifferencesOutput == targetSequenceDifferences
+
+
+def test__consensus_strategy_pairwise__find_pairwise_score_and_alignment_strings_between_two_sequences__falls_back_when_band_is_exceeded(
+    consensusStrategyPairwise, longConsensusSequence, monkeypatch
+):
+    monkeypatch.setitem(
+        ConsensusStrategyPairwise.BANDED_ALIGNMENT, "minimumSequenceLength", 0
+    )
+    rotatedSequence = longConsensusSequence[400:] + longConsensusSequence[:400]
+    assert (
+        consensusStrategyPairwise.bandedAligner.align(
+            longConsensusSequence, rotatedSequence
+        )
+        is None
+    )
+    alignment = consensusStrategyPairwise.aligner.align(
+        longConsensusSequence, rotatedSequence
+    )[0]
+    (
+        scoreOutput,
+        *_,
+    ) = consensusStrategyPairwise.find_pairwise_score_and_alignment_strings_between_two_sequences(
+        longConsensusSequence, rotatedSequence
+    )
+    assert scoreOutput == alignment.score
+
+
 def calculate_average_pairwise_alignment_score_for_tests(consensusSequence):
     baseScore = len(consensusSequence)
     initialErrorScore = baseScore - 1
@@ -214,6 +263,232 @@ def test__consensus_strategy_pairwise__find_average_pairwise_alignment_score_and
     assert targetSequenceDifferencesOutput == targetSequenceDifferences
 
 
+def test__consensus_strategy_pairwise__find_average_pairwise_alignment_score_between_candidate_sequence_and_binned_sequences(
+    consensusSequence, targetSequences, consensusStrategyPairwise
+):
+    averagePairwiseAlignmentScore = (
+        calculate_average_pairwise_alignment_score_for_tests(consensusSequence)
+    )
+    averagePairwiseAlignmentScoreOutput = consensusStrategyPairwise.find_average_pairwise_alignment_score_between_candidate_sequence_and_binned_sequences(
+        consensusSequence, targetSequences
+    )
+    assert averagePairwiseAlignmentScore == averagePairwiseAlignmentScoreOutput
+
+
+def test__consensus_strategy_pairwise__polish_candidate_sequence_against_read_sequences__rejects_weak_difference_with_score_only_pass(
+    consensusSequence, targetSequences, consensusStrategyPairwise, monkeypatch
+):
+    consensusStrategyPairwise.incrementalRealignment = False
+    fullPassCandidates = []
+    findAlignments = (
+        consensusStrategyPairwise.find_pairwise_alignments_between_candidate_sequence_and_binned_sequences
+    )
+
+    def record_full_pass_candidate(candidateSequence, readSequences):
+        fullPassCandidates.append(candidateSequence)
+        return findAlignments(candidateSequence, readSequences)
+
+    monkeypatch.setattr(
+        consensusStrategyPairwise,
+        "find_pairwise_alignments_between_candidate_sequence_and_binned_sequences",
+        record_full_pass_candidate,
+    )
+    consensusSequenceOutput = (
+        consensusStrategyPairwise.polish_candidate_sequence_against_read_sequences(
+            consensusSequence, targetSequences
+        )
+    )
+    assert consensusSequenceOutput == consensusSequence
+    assert fullPassCandidates == [consensusSequence]
+
+
+def test__consensus_strategy_pairwise__polish_candidate_sequence_with_alignment_cache__rejects_weak_difference_with_score_only_pass(
+    consensusSequence, targetSequences, consensusStrategyPairwise, monkeypatch
+):
+    editedVersions = []
+    addEditedCandidateVersion = (
+        ConsensusStrategyPairwise.PairwiseAlignmentCache.add_edited_candidate_version
+    )
+
+    def record_edited_version(self, version, difference):
+        editedVersions.append(difference)
+        return addEditedCandidateVersion(self, version, difference)
+
+    monkeypatch.setattr(
+        ConsensusStrategyPairwise.PairwiseAlignmentCache,
+        "add_edited_candidate_version",
+        record_edited_version,
+    )
+    consensusSequenceOutput = (
+        consensusStrategyPairwise.polish_candidate_sequence_with_alignment_cache(
+            consensusSequence, targetSequences
+        )
+    )
+    assert consensusSequenceOutput == consensusSequence
+    assert editedVersions == []
+
+
+def test__consensus_strategy_pairwise__polish_candidate_sequence_with_alignment_cache__matches_full_realignment(
+    longConsensusSequence, longTargetSequences, consensusStrategyPairwise
+):
+    draftSequence = longConsensusSequence[:300] + longConsensusSequence[304:]
+    cachedSequenceOutput = (
+        consensusStrategyPairwise.polish_candidate_sequence_against_read_sequences(
+            draftSequence, longTargetSequences
+        )
+    )
+    consensusStrategyPairwise.incrementalRealignment = False
+    fullSequenceOutput = (
+        consensusStrategyPairwise.polish_candidate_sequence_against_read_sequences(
+            draftSequence, longTargetSequences
+        )
+    )
+    assert cachedSequenceOutput == fullSequenceOutput == longConsensusSequence
+
+
+def test__consensus_strategy_pairwise__find_all_weighted_differences_from_alignment_strings(
+    consensusStrategyPairwise,
+):
+    (
+        differencesOutput,
+        differenceWeightsOutput,
+    ) = consensusStrategyPairwise.find_all_weighted_differences_from_alignment_strings(
+        "AC-GTA", "||-|-.", "ACTG-C", [10, 20, 30, 40, 50]
+    )
+    assert differencesOutput == [(2, 2, "T"), (3, 4, ""), (4, 5, "C")]
+    assert list(differenceWeightsOutput) == [30, 45, 50]
+    (
+        _,
+        differenceWeightsOutput,
+    ) = consensusStrategyPairwise.find_all_weighted_differences_from_alignment_strings(
+        "ACGT--A", "||||--|", "ACGTCCA", [10, 20, 30, 40, 50, 60, 70]
+    )
+    assert list(differenceWeightsOutput) == [110]
+
+
+def test__consensus_strategy_pairwise__find_all_weighted_differences_from_alignment_strings__without_qualities(
+    consensusStrategyPairwise,
+):
+    (
+        differencesOutput,
+        differenceWeightsOutput,
+    ) = consensusStrategyPairwise.find_all_weighted_differences_from_alignment_strings(
+        "AC-GTA", "||-|-.", "ACTG-C"
+    )
+    assert len(differencesOutput) == 3
+    assert list(differenceWeightsOutput) == [1, 1, 1]
+
+
+def test__consensus_strategy_pairwise__find_best_supported_difference(
+    consensusStrategyPairwise,
+):
+    differences = [(5, 6, "T")] * 3 + [(5, 6, "G")] * 2
+    bestSupportedDifferenceOutput = (
+        consensusStrategyPairwise.find_best_supported_difference(
+            differences, np.array([5, 5, 5, 30, 30])
+        )
+    )
+    assert bestSupportedDifferenceOutput == (5, 6, "G")
+
+
+def test__consensus_strategy_pairwise__find_best_supported_difference__ties_go_to_first_difference(
+    consensusStrategyPairwise,
+):
+    differences = [(7, 7, "A"), (5, 6, "T"), (3, 4, ""), (5, 6, "T"), (7, 7, "A")]
+    bestSupportedDifferenceOutput = (
+        consensusStrategyPairwise.find_best_supported_difference(
+            differences, np.ones(len(differences))
+        )
+    )
+    assert bestSupportedDifferenceOutput == (7, 7, "A")
+
+
+@pytest.fixture
+def longTargetSequenceRecords(longTargetSequences):
+    return [
+        SeqRecord(
+            Seq(longTargetSequence),
+            id=f"read{i}",
+            letter_annotations={"phred_quality": [20] * len(longTargetSequence)},
+        )
+        for i, longTargetSequence in enumerate(longTargetSequences)
+    ]
+
+
+def test__consensus_strategy_pairwise__find_pairwise_score_between_two_sequences__skips_traceback_for_long_sequences(
+    consensusStrategyPairwise, longConsensusSequence, longTargetSequences, monkeypatch
+):
+    monkeypatch.setitem(
+        ConsensusStrategyPairwise.BANDED_ALIGNMENT, "minimumSequenceLength", 100
+    )
+    fullScore = consensusStrategyPairwise.find_pairwise_score_and_alignment_strings_between_two_sequences(
+        longConsensusSequence, longTargetSequences[0]
+    )[
+        0
+    ]
+
+    def fail_on_traceback(*args):
+        raise AssertionError("score-only pass should not trace back an alignment")
+
+    monkeypatch.setattr(
+        consensusStrategyPairwise,
+        "find_pairwise_score_and_alignment_strings_between_two_sequences",
+        fail_on_traceback,
+    )
+    assert (
+        consensusStrategyPairwise.find_pairwise_score_between_two_sequences(
+            longConsensusSequence, longTargetSequences[0]
+        )
+        == fullScore
+    )
+
+
+def test__consensus_strategy_pairwise__find_read_qualities_from_biopython_records(
+    consensusStrategyPairwise, longTargetSequenceRecords, longTargetSequences
+):
+    assert (
+        consensusStrategyPairwise.find_read_qualities_from_biopython_records(
+            longTargetSequenceRecords
+        )
+        is None
+    )
+    consensusStrategyPairwise.qualityWeightedVoting = True
+    readQualitiesOutput = (
+        consensusStrategyPairwise.find_read_qualities_from_biopython_records(
+            longTargetSequenceRecords
+        )
+    )
+    assert [len(readQualities) for readQualities in readQualitiesOutput] == [
+        len(record.seq) for record in longTargetSequenceRecords
+    ]
+    assert (
+        consensusStrategyPairwise.find_read_qualities_from_biopython_records(
+            longTargetSequenceRecords[:-1]
+            + [SeqRecord(Seq(longTargetSequences[-1]), id="readWithoutQualities")]
+        )
+        is None
+    )
+    consensusStrategyPairwise.qualityWeightedVoting = False
+    assert (
+        consensusStrategyPairwise.find_read_qualities_from_biopython_records(
+            longTargetSequenceRecords
+        )
+        is None
+    )
+
+
+def test__consensus_strategy_pairwise__generate_consensus_record_from_biopython_records__with_read_qualities(
+    longConsensusSequence, consensusStrategyPairwise, longTargetSequenceRecords
+):
+    consensusStrategyPairwise.qualityWeightedVoting = True
+    consensusRecordOutput = (
+        consensusStrategyPairwise.generate_consensus_record_from_biopython_records(
+            longTargetSequenceRecords
+        )
+    )
+    assert str(consensusRecordOutput.seq) == longConsensusSequence
+
+
 def test__consensus_strategy_pairwise__generate_consensus_record_from_biopython_records(
     consensusSequence, targetSequences, consensusStrategyPairwise, targetSequenceRecords
 ):
@@ -230,6 +505,57 @@ def test__consensus_strategy_pairwise__generate_consensus_record_from_biopython_
     assert str(consensusSequenceOutput.seq) == consensusSequence
 
 
+def test__consensus_strategy_pairwise__generate_consensus_record_from_biopython_records__adds_consensus_qualities(
+    consensusSequence, consensusStrategyPairwise, targetSequenceRecords
+):
+    consensusRecordOutput = (
+        consensusStrategyPairwise.generate_consensus_record_from_biopython_records(
+            targetSequenceRecords
+        )
+    )
+    phredQualities = consensusRecordOutput.letter_annotations["phred_quality"]
+    assert len(phredQualities) == len(consensusSequence)
+    assert phredQualities[0] == phredQualities[-1] == 12
+    assert min(phredQualities) < phredQualities[0]
+
+
+def find_match_counts_from_full_realignment(
+    consensusStrategyPairwise, candidateSequence, readSequences
+):
+    return ConsensusStrategyPairwise.count_matching_reads_at_each_position(
+        len(candidateSequence),
+        consensusStrategyPairwise.find_pairwise_alignments_between_candidate_sequence_and_binned_sequences(
+            candidateSequence, readSequences
+        ),
+    )
+
+
+@pytest.mark.parametrize("incrementalRealignment", [True, False])
+def test__consensus_strategy_pairwise__polish_candidate_sequence_and_count_matching_reads__matches_full_realignment(
+    longConsensusSequence,
+    longTargetSequences,
+    consensusStrategyPairwise,
+    incrementalRealignment,
+):
+    consensusStrategyPairwise.incrementalRealignment = incrementalRealignment
+    draftSequence = longConsensusSequence[:300] + longConsensusSequence[304:]
+    (
+        candidateSequenceOutput,
+        matchCountsOutput,
+    ) = consensusStrategyPairwise.polish_candidate_sequence_and_count_matching_reads(
+        draftSequence, longTargetSequences
+    )
+    assert candidateSequenceOutput == longConsensusSequence
+    assert consensusStrategyPairwise.find_consensus_qualities_from_match_counts(
+        matchCountsOutput, len(longTargetSequences)
+    ) == consensusStrategyPairwise.find_consensus_qualities_from_match_counts(
+        find_match_counts_from_full_realignment(
+            consensusStrategyPairwise, candidateSequenceOutput, longTargetSequences
+        ),
+        len(longTargetSequences),
+    )
+
+
 def test__consensus_strategy_pairwise__generate_consensus_sequence_from_biopython_records__works_when_all_target_sequences_are_the_same(
     consensusStrategyPairwise, targetSequenceRecords
 ):
@@ -243,6 +569,151 @@ def test__consensus_strategy_pairwise__generate_consensus_sequence_from_biopytho
     assert str(expectedSequenceOutput.seq) == expectedSequence
 
 
+@pytest.fixture
+def longConsensusSequence():
+    random.seed(1)
+    return "".join(random.choices("ACGT", k=800))
+
+
+@pytest.fixture
+def longTargetSequences(longConsensusSequence):
+    random.seed(2)
+    longTargetSequences = []
+    for _ in range(12):
+        targetSequence = longConsensusSequence
+        for index in sorted(random.sample(range(len(targetSequence)), k=6))[::-1]:
+            errorType = random.choice(["insertion", "deletion", "mutation"])
+            if errorType == "insertion":
+                targetSequence = targetSequence[:index] + "C" + targetSequence[index:]
+            elif errorType == "deletion":
+                targetSequence = targetSequence[:index] + targetSequence[index + 1 :]
+            else:
+                targetSequence = (
+                    targetSequence[:index] + "T" + targetSequence[index + 1 :]
+                )
+        longTargetSequences.append(targetSequence)
+    return longTargetSequences
+
+
+@pytest.fixture
+def windowSettings(monkeypatch):
+    monkeypatch.setitem(ConsensusStrategyPairwise.PAIRWISE_WINDOW, "windowLength", 200)
+    monkeypatch.setitem(ConsensusStrategyPairwise.PAIRWISE_WINDOW, "overlapLength", 50)
+    return ConsensusStrategyPairwise.PAIRWISE_WINDOW
+
+
+def test__consensus_strategy_pairwise__polish_candidate_sequence_in_windows(
+    consensusStrategyPairwise,
+    longConsensusSequence,
+    longTargetSequences,
+    windowSettings,
+):
+    draftSequence = (
+        longConsensusSequence[:300]
+        + "A"
+        + longConsensusSequence[300:600]
+        + longConsensusSequence[601:]
+    )
+    consensusSequenceOutput = (
+        consensusStrategyPairwise.polish_candidate_sequence_in_windows(
+            draftSequence, longTargetSequences
+        )
+    )
+    assert consensusSequenceOutput == longConsensusSequence
+
+
+@pytest.mark.parametrize("incrementalRealignment", [True, False])
+def test__consensus_strategy_pairwise__polish_candidate_sequence_and_count_matching_reads__windowed_reuses_window_alignments(
+    consensusStrategyPairwise,
+    longConsensusSequence,
+    longTargetSequences,
+    windowSettings,
+    incrementalRealignment,
+    monkeypatch,
+):
+    consensusStrategyPairwise.incrementalRealignment = incrementalRealignment
+    draftSequence = longConsensusSequence[:300] + longConsensusSequence[304:]
+    fullMatchCounts = find_match_counts_from_full_realignment(
+        consensusStrategyPairwise, longConsensusSequence, longTargetSequences
+    )
+    alignedSequences = []
+    findAlignment = consensusStrategyPairwise.find_pairwise_alignment
+
+    def record_aligned_sequence(originalSequence, differentSequence):
+        alignedSequences.append(originalSequence)
+        return findAlignment(originalSequence, differentSequence)
+
+    monkeypatch.setattr(
+        consensusStrategyPairwise, "find_pairwise_alignment", record_aligned_sequence
+    )
+    (
+        candidateSequenceOutput,
+        matchCountsOutput,
+    ) = consensusStrategyPairwise.polish_candidate_sequence_and_count_matching_reads(
+        draftSequence, longTargetSequences
+    )
+    assert candidateSequenceOutput == longConsensusSequence
+    assert longConsensusSequence not in alignedSequences
+    assert list(matchCountsOutput) == list(fullMatchCounts)
+
+
+def test__consensus_strategy_pairwise__generate_consensus_record_from_biopython_records__windowed(
+    consensusStrategyPairwise,
+    longConsensusSequence,
+    longTargetSequences,
+    windowSettings,
+):
+    longTargetSequenceRecords = [
+        SeqRecord(Seq(targetSequence), id=str(i))
+        for i, targetSequence in enumerate(longTargetSequences)
+    ]
+    consensusSequenceOutput = (
+        consensusStrategyPairwise.generate_consensus_record_from_biopython_records(
+            longTargetSequenceRecords
+        )
+    )
+    assert str(consensusSequenceOutput.seq) == longConsensusSequence
+
+
+def test__consensus_strategy_pairwise__stitch_overlapping_window_sequences(
+    consensusStrategyPairwise, longConsensusSequence
+):
+    windowSequences = [
+        longConsensusSequence[:250],
+        longConsensusSequence[200:450],
+        longConsensusSequence[400:],
+    ]
+    stitchedSequenceOutput = (
+        consensusStrategyPairwise.stitch_overlapping_window_sequences(
+            windowSequences, 50
+        )
+    )
+    assert stitchedSequenceOutput == longConsensusSequence
+
+
+def test__consensus_strategy_pairwise__stitch_overlapping_window_sequences_and_find_segments(
+    consensusStrategyPairwise, longConsensusSequence
+):
+    windowSequences = [
+        longConsensusSequence[:250],
+        longConsensusSequence[200:450],
+        longConsensusSequence[400:],
+    ]
+    (
+        stitchedSequenceOutput,
+        windowSegmentsOutput,
+    ) = consensusStrategyPairwise.stitch_overlapping_window_sequences_and_find_segments(
+        windowSequences, 50
+    )
+    assert stitchedSequenceOutput == "".join(
+        windowSequence[segmentStart:segmentEnd]
+        for windowSequence, (segmentStart, segmentEnd) in zip(
+            windowSequences, windowSegmentsOutput
+        )
+    )
+    assert windowSegmentsOutput == [[0, 225], [25, 225], [25, 400]]
+
+
 def test__consensus_strategy_pairwise__populate_future_processes_with_benchmark_tasks(
     consensusStrategyPairwise, consensusSequence, targetSequenceRecords
 ):
@@ -278,6 +749,67 @@ def test__consensus_strategy_pairwise__populate_future_processes_with_benchmark_
         assert rowOutput[-1] == row[-1]
 
 
+def test__consensus_strategy_pairwise__find_benchmark_sample_indices__seeded_streams_are_independent(
+    consensusStrategyPairwise,
+):
+    sampleIndices = consensusStrategyPairwise.find_benchmark_sample_indices(
+        50, 10, 3, seed=7
+    )
+    assert len(set(sampleIndices)) == 10
+    assert all(0 <= index < 50 for index in sampleIndices)
+    assert sampleIndices == consensusStrategyPairwise.find_benchmark_sample_indices(
+        50, 10, 3, seed=7
+    )
+    assert sampleIndices != consensusStrategyPairwise.find_benchmark_sample_indices(
+        50, 10, 4, seed=7
+    )
+    assert sampleIndices != consensusStrategyPairwise.find_benchmark_sample_indices(
+        50, 10, 3, seed=8
+    )
+    assert sampleIndices != consensusStrategyPairwise.find_benchmark_sample_indices(
+        50, 10, 3, seed=7, binKey=1
+    )
+
+
+def test__consensus_strategy_pairwise__generate_nested_consensus_records_from_biopython_records(
+    consensusStrategyPairwise, consensusSequence, targetSequenceRecords
+):
+    nestedRecords = list(
+        consensusStrategyPairwise.generate_nested_consensus_records_from_biopython_records(
+            targetSequenceRecords, [1, 5, len(targetSequenceRecords)]
+        )
+    )
+    assert len(nestedRecords) == 3
+    assert nestedRecords[0] is targetSequenceRecords[0]
+    assert str(nestedRecords[2].seq) == consensusSequence
+    assert len(nestedRecords[2].letter_annotations["phred_quality"]) == len(
+        consensusSequence
+    )
+    assert consensusStrategyPairwise.alignmentMemo is None
+
+
+def test__consensus_strategy_pairwise__generate_nested_consensus_records_from_biopython_records__matches_separate_subsamples(
+    consensusStrategyPairwise, targetSequenceRecords
+):
+    intervalNumbers = [5, 10, len(targetSequenceRecords)]
+    nestedRecords = list(
+        consensusStrategyPairwise.generate_nested_consensus_records_from_biopython_records(
+            targetSequenceRecords, intervalNumbers
+        )
+    )
+    for intervalNumber, nestedRecord in zip(intervalNumbers, nestedRecords):
+        separateRecord = (
+            consensusStrategyPairwise.generate_consensus_record_from_biopython_records(
+                targetSequenceRecords[:intervalNumber]
+            )
+        )
+        assert str(nestedRecord.seq) == str(separateRecord.seq)
+        assert (
+            nestedRecord.letter_annotations["phred_quality"]
+            == separateRecord.letter_annotations["phred_quality"]
+        )
+
+
 def test__consensus_strategy_pairwise__populate_future_processes_with_benchmark_tasks__max_interval_number_is_500(
     consensusStrategyPairwise, consensusSequence, targetSequenceRecords
 ):
@@ -0,0 +1,91 @@
+import pytest
+import re
+from Levenshtein import distance
+from concurrent.futures import Future, as_completed
+import typing as T
+import sys
+import os
+
+srcPath = os.getcwd().split("/")[:-1]
+srcPath = "/".join(srcPath) + "/src/ConSeqUMI"
+sys.path.insert(1, srcPath)
+testsPath = os.getcwd().split("/")[:-1]
+testsPath = "/".join(testsPath) + "/tests"
+sys.path.insert(1, testsPath)
+from pytestConsensusFixtures import (
+    consensusSequence,
+    targetSequences,
+    targetSequenceRecords,
+    simpleInsert,
+)
+from consensus import ConsensusStrategyPoa
+
+
+@pytest.fixture
+def consensusStrategyPoa():
+    return ConsensusStrategyPoa.ConsensusStrategyPoa()
+
+
+def test__consensus_strategy_poa__generate_consensus_record_from_biopython_records(
+    consensusSequence, targetSequenceRecords, consensusStrategyPoa
+):
+    consensusSequenceOutput = (
+        consensusStrategyPoa.generate_consensus_record_from_biopython_records(
+            targetSequenceRecords
+        )
+    )
+    assert str(consensusSequenceOutput.seq) == consensusSequence
+
+
+def test__consensus_strategy_poa__generate_consensus_record_from_biopython_records__works_when_all_target_sequences_are_the_same(
+    consensusStrategyPoa, targetSequenceRecords
+):
+    identicalTargetSequenceRecords = [targetSequenceRecords[0] for _ in range(10)]
+    expectedSequence = str(targetSequenceRecords[0].seq)
+    expectedSequenceOutput = (
+        consensusStrategyPoa.generate_consensus_record_from_biopython_records(
+            identicalTargetSequenceRecords
+        )
+    )
+    assert str(expectedSequenceOutput.seq) == expectedSequence
+
+
+def test__consensus_strategy_poa__populate_future_processes_with_benchmark_tasks(
+    consensusStrategyPoa, consensusSequence, targetSequenceRecords
+):
+    intervals = [10]
+    iterations = 2
+    numProcesses = 1
+    futureProcesses: T.List[Future] = []
+    consensusStrategyPoa.populate_future_processes_with_benchmark_tasks(
+        futureProcesses,
+        numProcesses,
+        consensusSequence,
+        targetSequenceRecords,
+        intervals,
+        iterations,
+    )
+    rowsOutput = [
+        futureProcess.result() for futureProcess in as_completed(futureProcesses)
+    ]
+    rowsOutput.sort()
+    assert [row[:2] for row in rowsOutput] == [
+        ["1", "0"],
+        ["1", "1"],
+        ["10", "0"],
+        ["10", "1"],
+    ]
+    for rowOutput in rowsOutput:
+        assert distance(rowOutput[2], rowOutput[3]) == int(rowOutput[4])
+        assert rowOutput[-1] == "14"
+
+
+def test__consensus_strategy_poa__generate_consensus_algorithm_path_header(
+    consensusStrategyPoa,
+):
+    processName = "consensus"
+    poaFileName = processName + r"-poa-\d{8}-\d{6}"
+    poaFileNameOutput = consensusStrategyPoa.generate_consensus_algorithm_path_header(
+        processName
+    )
+    assert re.match(poaFileName, poaFileNameOutput)
@@ -0,0 +1,170 @@
+import pytest
+import sys
+import os
+import asyncio
+from tempfile import TemporaryDirectory
+from concurrent.futures import ProcessPoolExecutor
+
+srcPath = os.getcwd().split("/")[:-1]
+srcPath = "/".join(srcPath) + "/src/ConSeqUMI"
+sys.path.insert(1, srcPath)
+testsPath = os.getcwd().split("/")[:-1]
+testsPath = "/".join(testsPath) + "/tests"
+sys.path.insert(1, testsPath)
+from consensus import ExternalProcessExecutor
+
+
+@pytest.fixture
+def scratchRootDirectory(monkeypatch):
+    scratchRootDirectory = TemporaryDirectory(prefix="conseq_scratch_test_")
+    monkeypatch.setitem(
+        ExternalProcessExecutor.EXTERNAL_PROCESS,
+        "scratchDirectory",
+        scratchRootDirectory.name,
+    )
+    monkeypatch.setattr(ExternalProcessExecutor, "WORKER_SCRATCH_DIRECTORIES", {})
+    yield scratchRootDirectory.name
+    scratchRootDirectory.cleanup()
+
+
+@pytest.fixture
+def externalProcessExecutor():
+    return ExternalProcessExecutor.ExternalProcessExecutor("testTool")
+
+
+def find_scratch_directory_in_worker(toolName):
+    externalProcessExecutor = ExternalProcessExecutor.ExternalProcessExecutor(toolName)
+    return externalProcessExecutor.find_scratch_directory()
+
+
+def test__external_process_executor__find_scratch_directory__is_reused_within_a_worker(
+    scratchRootDirectory, externalProcessExecutor
+):
+    scratchDirectory = externalProcessExecutor.find_scratch_directory()
+    assert os.path.dirname(scratchDirectory) == scratchRootDirectory
+    assert os.path.basename(scratchDirectory).startswith("conseq_testTool_delete_")
+    assert externalProcessExecutor.find_scratch_directory() == scratchDirectory
+    assert (
+        ExternalProcessExecutor.ExternalProcessExecutor(
+            "testTool"
+        ).find_scratch_directory()
+        == scratchDirectory
+    )
+    assert (
+        ExternalProcessExecutor.ExternalProcessExecutor(
+            "otherTool"
+        ).find_scratch_directory()
+        != scratchDirectory
+    )
+
+
+def test__external_process_executor__find_scratch_directory__is_separate_and_removed_per_worker(
+    scratchRootDirectory, externalProcessExecutor
+):
+    with ProcessPoolExecutor(max_workers=1) as processPool:
+        workerScratchDirectory = processPool.submit(
+            find_scratch_directory_in_worker, "testTool"
+        ).result()
+    assert workerScratchDirectory != externalProcessExecutor.find_scratch_directory()
+    assert not os.path.exists(workerScratchDirectory)
+
+
+def test__external_process_executor__find_scratch_root_directory__falls_back_when_missing(
+    monkeypatch,
+):
+    monkeypatch.setitem(
+        ExternalProcessExecutor.EXTERNAL_PROCESS,
+        "scratchDirectory",
+        "/this/path/does/not/exist/",
+    )
+    assert ExternalProcessExecutor.find_scratch_root_directory() is None
+
+
+def test__external_process_executor__find_scratch_path(
+    scratchRootDirectory, externalProcessExecutor
+):
+    scratchPath = externalProcessExecutor.find_scratch_path("input.fastq")
+    assert scratchPath == os.path.join(
+        externalProcessExecutor.find_scratch_directory(), "input.fastq"
+    )
+
+
+def test__external_process_executor__run(externalProcessExecutor):
+    completedProcess = externalProcessExecutor.run(
+        [sys.executable, "-c", "print('consensus')"]
+    )
+    assert completedProcess.returncode == 0
+    assert completedProcess.stdout.decode("utf8").strip() == "consensus"
+
+
+def test__external_process_executor__run__waits_for_process_slot(
+    externalProcessExecutor, monkeypatch
+):
+    externalProcessSlots = ExternalProcessExecutor.BoundedSemaphore(1)
+    monkeypatch.setitem(
+        ExternalProcessExecutor.EXTERNAL_PROCESS_SLOTS,
+        "semaphore",
+        externalProcessSlots,
+    )
+    externalProcessExecutor.run([sys.executable, "-c", "pass"])
+    assert externalProcessSlots.acquire(block=False)
+    externalProcessSlots.release()
+
+
+def test__external_process_executor__create_external_process_slots(monkeypatch):
+    monkeypatch.setitem(ExternalProcessExecutor.EXTERNAL_PROCESS, "processNum", 0)
+    assert ExternalProcessExecutor.create_external_process_slots() is None
+    monkeypatch.setitem(ExternalProcessExecutor.EXTERNAL_PROCESS, "processNum", 2)
+    externalProcessSlots = ExternalProcessExecutor.create_external_process_slots()
+    assert externalProcessSlots.acquire(block=False)
+    assert externalProcessSlots.acquire(block=False)
+    assert not externalProcessSlots.acquire(block=False)
+
+
+def test__external_process_executor__initialize_external_process_worker__applies_consensus_settings(
+    monkeypatch,
+):
+    for name, settings in ExternalProcessExecutor.CONSENSUS_SETTINGS.items():
+        for key, value in settings.items():
+            monkeypatch.setitem(settings, key, value)
+    consensusSettings = ExternalProcessExecutor.find_consensus_settings()
+    consensusSettings["consensusCache"]["cacheDirectory"] = "cacheDirectory"
+    consensusSettings["pairwiseWindow"]["windowLength"] = 500
+    assert (
+        ExternalProcessExecutor.CONSENSUS_SETTINGS["pairwiseWindow"]["windowLength"]
+        != 500
+    )
+    ExternalProcessExecutor.initialize_external_process_worker(
+        None, {}, {}, consensusSettings
+    )
+    assert (
+        ExternalProcessExecutor.CONSENSUS_SETTINGS["consensusCache"]["cacheDirectory"]
+        == "cacheDirectory"
+    )
+    assert (
+        ExternalProcessExecutor.CONSENSUS_SETTINGS["pairwiseWindow"]["windowLength"]
+        == 500
+    )
+
+
+def test__async_external_process_executor__scratch_directory_is_per_instance_and_removed(
+    scratchRootDirectory,
+):
+    firstExecutor = ExternalProcessExecutor.AsyncExternalProcessExecutor("testTool")
+    secondExecutor = ExternalProcessExecutor.AsyncExternalProcessExecutor("testTool")
+    firstScratchDirectory = firstExecutor.find_scratch_directory()
+    assert os.path.dirname(firstScratchDirectory) == scratchRootDirectory
+    assert firstExecutor.find_scratch_directory() == firstScratchDirectory
+    assert secondExecutor.find_scratch_directory() != firstScratchDirectory
+    firstExecutor.remove_scratch_directory()
+    assert not os.path.exists(firstScratchDirectory)
+
+
+def test__async_external_process_executor__run():
+    externalProcessExecutor = ExternalProcessExecutor.AsyncExternalProcessExecutor(
+        "testTool"
+    )
+    completedProcess = asyncio.run(
+        externalProcessExecutor.run([sys.executable, "-c", "print('consensus')"])
+    )
+    assert completedProcess.stdout.decode("utf8").strip() == "consensus"
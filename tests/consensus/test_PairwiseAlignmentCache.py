@@ -0,0 +1,166 @@
+import pytest
+import random
+import sys
+import os
+
+srcPath = os.getcwd().split("/")[:-1]
+srcPath = "/".join(srcPath) + "/src/ConSeqUMI"
+sys.path.insert(1, srcPath)
+testsPath = os.getcwd().split("/")[:-1]
+testsPath = "/".join(testsPath) + "/tests"
+sys.path.insert(1, testsPath)
+from pytestConsensusFixtures import (
+    consensusSequence,
+    targetSequences,
+    simpleInsert,
+)
+from consensus.PairwiseAlignmentCache import PairwiseAlignmentCache
+from consensus.ConsensusStrategyPairwise import ConsensusStrategyPairwise
+
+
+@pytest.fixture
+def consensusStrategyPairwise():
+    return ConsensusStrategyPairwise()
+
+
+@pytest.fixture
+def pairwiseAlignmentCache(consensusStrategyPairwise):
+    return PairwiseAlignmentCache(
+        consensusStrategyPairwise.find_pairwise_score_and_alignment_strings_between_two_sequences
+    )
+
+
+def test__pairwise_alignment_cache__initialization(consensusStrategyPairwise):
+    pairwiseAlignmentCache = PairwiseAlignmentCache(
+        consensusStrategyPairwise.find_pairwise_score_and_alignment_strings_between_two_sequences,
+        matchScore=2,
+        mismatchScore=-2,
+        openGapScore=-3,
+        extendGapScore=-1,
+        flankLength=5,
+    )
+    assert pairwiseAlignmentCache.matchScore == 2
+    assert pairwiseAlignmentCache.mismatchScore == -2
+    assert pairwiseAlignmentCache.openGapScore == -3
+    assert pairwiseAlignmentCache.extendGapScore == -1
+    assert pairwiseAlignmentCache.flankLength == 5
+
+
+def test__pairwise_alignment_cache__score_alignment_strings_matches_aligner_score(
+    pairwiseAlignmentCache,
+    consensusStrategyPairwise,
+    consensusSequence,
+    targetSequences,
+):
+    for targetSequence in targetSequences:
+        (
+            score,
+            *alignmentStrings,
+        ) = consensusStrategyPairwise.find_pairwise_score_and_alignment_strings_between_two_sequences(
+            consensusSequence, targetSequence
+        )
+        assert pairwiseAlignmentCache.score_alignment_strings(
+            *alignmentStrings
+        ) == pytest.approx(score)
+
+
+def test__pairwise_alignment_cache__add_candidate_version(
+    pairwiseAlignmentCache, consensusSequence, targetSequences
+):
+    version = pairwiseAlignmentCache.add_candidate_version(
+        consensusSequence, targetSequences
+    )
+    assert pairwiseAlignmentCache.find_candidate_sequence(version) == consensusSequence
+    assert len(pairwiseAlignmentCache.find_alignments(version)) == len(targetSequences)
+
+
+def test__pairwise_alignment_cache__add_edited_candidate_version_matches_full_realignment(
+    pairwiseAlignmentCache, consensusSequence, targetSequences
+):
+    editedSequence = consensusSequence[:20] + "C" + consensusSequence[20:]
+    parentVersion = pairwiseAlignmentCache.add_candidate_version(
+        consensusSequence, targetSequences
+    )
+    editedVersion = pairwiseAlignmentCache.add_edited_candidate_version(
+        parentVersion, (20, 20, "C")
+    )
+    fullVersion = pairwiseAlignmentCache.add_candidate_version(
+        editedSequence, targetSequences
+    )
+    assert pairwiseAlignmentCache.find_candidate_sequence(editedVersion) == (
+        editedSequence
+    )
+    assert pairwiseAlignmentCache.find_average_score(editedVersion) == pytest.approx(
+        pairwiseAlignmentCache.find_average_score(fullVersion)
+    )
+    for editedAlignment, targetSequence in zip(
+        pairwiseAlignmentCache.find_alignments(editedVersion), targetSequences
+    ):
+        _, editedSequenceAlignment, _, targetSequenceAlignment = editedAlignment
+        assert editedSequenceAlignment.replace("-", "") == editedSequence
+        assert targetSequenceAlignment.replace("-", "") == targetSequence
+
+
+def test__pairwise_alignment_cache__add_edited_candidate_version_at_sequence_ends(
+    pairwiseAlignmentCache, consensusSequence, targetSequences
+):
+    parentVersion = pairwiseAlignmentCache.add_candidate_version(
+        consensusSequence, targetSequences
+    )
+    for difference in [
+        (0, 3, ""),
+        (len(consensusSequence), len(consensusSequence), "GG"),
+    ]:
+        editedVersion = pairwiseAlignmentCache.add_edited_candidate_version(
+            parentVersion, difference
+        )
+        editedSequence = pairwiseAlignmentCache.find_candidate_sequence(editedVersion)
+        for score, *alignmentStrings in pairwiseAlignmentCache.find_alignments(
+            editedVersion
+        ):
+            assert alignmentStrings[0].replace("-", "") == editedSequence
+            assert score == pairwiseAlignmentCache.score_alignment_strings(
+                *alignmentStrings
+            )
+
+
+@pytest.mark.parametrize("useScoreOnlyAligner", [False, True])
+def test__pairwise_alignment_cache__find_edited_average_score_matches_edited_version(
+    consensusStrategyPairwise, consensusSequence, targetSequences, useScoreOnlyAligner
+):
+    pairwiseAlignmentCache = PairwiseAlignmentCache(
+        consensusStrategyPairwise.find_pairwise_score_and_alignment_strings_between_two_sequences,
+        score_sequences=(
+            consensusStrategyPairwise.find_pairwise_score_between_two_sequences
+            if useScoreOnlyAligner
+            else None
+        ),
+    )
+    parentVersion = pairwiseAlignmentCache.add_candidate_version(
+        consensusSequence, targetSequences
+    )
+    for difference in [
+        (20, 20, "C"),
+        (35, 36, "T"),
+        (50, 53, ""),
+        (0, 3, ""),
+        (len(consensusSequence), len(consensusSequence), "GG"),
+    ]:
+        editedVersion = pairwiseAlignmentCache.add_edited_candidate_version(
+            parentVersion, difference
+        )
+        assert pairwiseAlignmentCache.find_edited_average_score(
+            parentVersion, difference
+        ) == pairwiseAlignmentCache.find_average_score(editedVersion)
+        pairwiseAlignmentCache.discard_version(editedVersion)
+
+
+def test__pairwise_alignment_cache__discard_version(
+    pairwiseAlignmentCache, consensusSequence, targetSequences
+):
+    version = pairwiseAlignmentCache.add_candidate_version(
+        consensusSequence, targetSequences
+    )
+    pairwiseAlignmentCache.discard_version(version)
+    assert version not in pairwiseAlignmentCache.candidateSequences
+    assert version not in pairwiseAlignmentCache.alignments
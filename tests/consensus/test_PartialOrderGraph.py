@@ -0,0 +1,95 @@
+import pytest
+import random
+import numpy as np
+import sys
+import os
+
+srcPath = os.getcwd().split("/")[:-1]
+srcPath = "/".join(srcPath) + "/src/ConSeqUMI"
+sys.path.insert(1, srcPath)
+testsPath = os.getcwd().split("/")[:-1]
+testsPath = "/".join(testsPath) + "/tests"
+sys.path.insert(1, testsPath)
+from pytestConsensusFixtures import (
+    consensusSequence,
+    targetSequences,
+    simpleInsert,
+)
+from consensus.PartialOrderGraph import PartialOrderGraph
+
+
+@pytest.fixture
+def partialOrderGraph():
+    return PartialOrderGraph()
+
+
+def test__partial_order_graph__initialization():
+    partialOrderGraph = PartialOrderGraph(
+        matchScore=2, mismatchScore=-3, gapScore=-2, capacity=4
+    )
+    assert partialOrderGraph.matchScore == 2
+    assert partialOrderGraph.mismatchScore == -3
+    assert partialOrderGraph.gapScore == -2
+    assert len(partialOrderGraph.nodeBases) == 4
+    assert partialOrderGraph.numNodes == 0
+
+
+def test__partial_order_graph__add_node_grows_node_storage():
+    partialOrderGraph = PartialOrderGraph(capacity=2)
+    for base in b"ACGTA":
+        partialOrderGraph.add_node(base)
+    assert partialOrderGraph.numNodes == 5
+    assert len(partialOrderGraph.nodeBases) >= 5
+    assert partialOrderGraph.nodeBases[:5].tobytes() == b"ACGTA"
+
+
+def test__partial_order_graph__add_sequence_creates_chain_for_first_sequence(
+    partialOrderGraph,
+):
+    partialOrderGraph.add_sequence("ACGT")
+    assert partialOrderGraph.numNodes == 4
+    assert partialOrderGraph.predecessors == [[], [0], [1], [2]]
+    assert partialOrderGraph.find_topological_order() == [0, 1, 2, 3]
+
+
+def test__partial_order_graph__add_sequence_reuses_nodes_for_identical_sequences(
+    partialOrderGraph,
+):
+    for _ in range(3):
+        partialOrderGraph.add_sequence("ACGTACGT")
+    assert partialOrderGraph.numNodes == 8
+    assert set(partialOrderGraph.edgeWeights.values()) == {3}
+
+
+def test__partial_order_graph__add_sequence_links_mismatched_nodes_as_aligned(
+    partialOrderGraph,
+):
+    partialOrderGraph.add_sequence("AAAAGAAAA")
+    partialOrderGraph.add_sequence("AAAACAAAA")
+    assert partialOrderGraph.numNodes == 10
+    assert partialOrderGraph.alignedNodes[4] == [9]
+    assert partialOrderGraph.alignedNodes[9] == [4]
+
+
+def test__partial_order_graph__align_sequence_to_graph_marks_insertions_and_deletions(
+    partialOrderGraph,
+):
+    partialOrderGraph.add_sequence("AAAAGGAAAA")
+    alignmentPairs = partialOrderGraph.align_sequence_to_graph("AAAAGGTAAAA")
+    assert [pair for pair in alignmentPairs if pair[0] == -1] == [(-1, 6)]
+    alignmentPairs = partialOrderGraph.align_sequence_to_graph("AAAAAAAA")
+    assert len([pair for pair in alignmentPairs if pair[1] == -1]) == 2
+
+
+def test__partial_order_graph__find_heaviest_path_sequence(
+    partialOrderGraph, consensusSequence, targetSequences
+):
+    for targetSequence in targetSequences:
+        partialOrderGraph.add_sequence(targetSequence)
+    assert partialOrderGraph.find_heaviest_path_sequence() == consensusSequence
+
+
+def test__partial_order_graph__find_heaviest_path_sequence_of_empty_graph_is_empty(
+    partialOrderGraph,
+):
+    assert partialOrderGraph.find_heaviest_path_sequence() == ""
@@ -1,8 +1,11 @@
 import pytest
 import re
 import pandas as pd
+from Bio import SeqIO
 import os
 import sys
+import zlib
+from collections import defaultdict
 
 srcPath = os.getcwd().split("/")[:-1]
 srcPath = "/".join(srcPath) + "/src/ConSeqUMI"
@@ -12,6 +15,8 @@ testsPath = "/".join(testsPath) + "/tests"
 sys.path.insert(1, testsPath)
 
 from consensus import benchmark
+from consensus.CompactBenchmarkOutput import CompactBenchmarkOutput
+from consensus.ConsensusStrategyPairwise import ConsensusStrategyPairwise
 from test_conseq import parser, benchmarkArgs, benchmarkFiles
 from pytestConsensusFixtures import (
     consensusSequence,
@@ -53,6 +58,10 @@ def test__benchmark__main__defaults(
         "benchmarkSequence",
         "levenshteinDistance",
         "originalNumberOfSequences",
+        "consensusAlgorithm",
+        "wallTimeSeconds",
+        "bin",
+        "cachedConsensus",
     ]
     assert list(benchmarkDf.columns) == columns
     assert len(benchmarkDf) == 2
@@ -80,6 +89,245 @@ def test__benchmark__main__works_with_provided_reference_sequence(
         "benchmarkSequence",
         "levenshteinDistance",
         "originalNumberOfSequences",
+        "consensusAlgorithm",
+        "wallTimeSeconds",
+        "bin",
+        "cachedConsensus",
     ]
     assert list(benchmarkDf.columns) == columns
     assert len(benchmarkDf) == 2
+
+
+def test__benchmark__has_interval_converged():
+    assert not benchmark.has_interval_converged([0] * 20, 0)
+    assert not benchmark.has_interval_converged([0] * 9, 0.5)
+    assert benchmark.has_interval_converged([0] * 10, 0.5)
+    assert not benchmark.has_interval_converged([0, 10] * 5, 0.5)
+    assert benchmark.has_interval_converged([0, 1] * 50, 0.5)
+    assert benchmark.find_confidence_interval_half_width([3]) == float("inf")
+
+
+def test__benchmark__generate_benchmark_task_arguments__skips_converged_strategies():
+    class ConvergedConsensusStrategy(ConsensusStrategyPairwise):
+        def generate_consensus_algorithm_path_header_insert(self):
+            return "converged"
+
+    strategies = [ConsensusStrategyPairwise(), ConvergedConsensusStrategy()]
+    intervalDistances = defaultdict(list)
+    intervalDistances[("converged", "bin", 5)] = [0] * 10
+    taskArguments = list(
+        benchmark.generate_benchmark_task_arguments(
+            strategies, [[1, 5]], 3, [20], ["bin"], intervalDistances, 0.5
+        )
+    )
+    assert [
+        (strategy.generate_consensus_algorithm_path_header_insert(), intervalNumber)
+        for strategy, _, intervalNumber, _, _, _ in taskArguments
+    ] == [("pairwise", 1), ("converged", 1)] * 3 + [("pairwise", 5)] * 3
+    intervalDistances[("pairwise", "bin", 5)] = [0] * 10
+    taskArguments = list(
+        benchmark.generate_benchmark_task_arguments(
+            strategies, [[1, 5]], 3, [20], ["bin"], intervalDistances, 0.5
+        )
+    )
+    assert len(taskArguments) == 6
+
+
+def test__benchmark__main__convergence_threshold_stops_intervals_early(
+    parser, benchmarkArgs, benchmarkFiles
+):
+    benchmarkArgs += ["-int", "5", "-iter", "30", "-ct", "100"]
+    args = vars(parser.parse_args(benchmarkArgs))
+    benchmark.main(args)
+    outputContents = sorted(os.listdir(args["output"]))
+    assert len(outputContents) == 3
+    benchmarkDf = pd.read_csv(args["output"] + outputContents[0])
+    iterationCounts = benchmarkDf.groupby("interval").size()
+    assert list(iterationCounts.index) == [1, 5, 10]
+    assert all(10 <= iterationCount < 30 for iterationCount in iterationCounts)
+
+
+def test__benchmark__main__compact_output(
+    parser, benchmarkArgs, benchmarkFiles, consensusAlgorithm, capsys
+):
+    benchmarkArgs += ["-iter", "2", "-co"]
+    args = vars(parser.parse_args(benchmarkArgs))
+    benchmark.main(args)
+    outputContents = sorted(os.listdir(args["output"]))
+    printedOutput = capsys.readouterr().out
+    assert "output file: " + args["output"] + outputContents[1] in printedOutput
+    assert (
+        "output sequences file: " + args["output"] + outputContents[0] in printedOutput
+    )
+    assert len(outputContents) == 4
+    assert re.match(
+        "benchmark-" + consensusAlgorithm + r"-\d{8}-\d{6}-sequences\.fasta",
+        outputContents[0],
+    )
+    assert re.match(
+        "benchmark-" + consensusAlgorithm + r"-\d{8}-\d{6}\.npz", outputContents[1]
+    )
+    benchmarkDf = CompactBenchmarkOutput.load(args["output"] + outputContents[1])
+    assert len(benchmarkDf) == 4
+    assert sorted(benchmarkDf["interval"]) == [1, 1, 10, 10]
+    assert all(
+        benchmarkDf["levenshteinDistance"]
+        == benchmarkDf["substitutions"]
+        + benchmarkDf["insertions"]
+        + benchmarkDf["deletions"]
+    )
+
+
+def test__benchmark__main__compares_several_consensus_algorithms_on_the_same_subsamples(
+    parser, benchmarkArgs, benchmarkFiles
+):
+    benchmarkArgs += ["-c", "pairwise,poa", "-iter", "2"]
+    args = vars(parser.parse_args(benchmarkArgs))
+    benchmark.main(args)
+    outputContents = sorted(os.listdir(args["output"]))
+    assert len(outputContents) == 3
+    assert re.match(r"benchmark-pairwise_poa-\d{8}-\d{6}\.csv", outputContents[0])
+    benchmarkDf = pd.read_csv(args["output"] + outputContents[0])
+    assert len(benchmarkDf) == 8
+    assert sorted(set(benchmarkDf["consensusAlgorithm"])) == ["pairwise", "poa"]
+    assert all(benchmarkDf["wallTimeSeconds"] >= 0)
+    singleReadDf = benchmarkDf[benchmarkDf["interval"] == 1]
+    for _, iterationDf in singleReadDf.groupby("iteration"):
+        assert len(set(iterationDf["benchmarkSequence"])) == 1
+
+
+def test__benchmark__main__reports_total_time_under_the_algorithm_column_name(
+    parser, benchmarkArgs, benchmarkFiles, monkeypatch, capfd
+):
+    monkeypatch.setattr(
+        "ConSeqUMI.consensus.ConsensusStrategyPairwise.ConsensusStrategyPairwise.generate_consensus_algorithm_path_header_insert",
+        lambda self: "pairwise-model",
+    )
+    benchmarkArgs += ["-iter", "2"]
+    args = vars(parser.parse_args(benchmarkArgs))
+    benchmark.main(args)
+    benchmarkFile = [
+        fileName
+        for fileName in os.listdir(args["output"])
+        if fileName.startswith("benchmark-")
+    ][0]
+    benchmarkDf = pd.read_csv(args["output"] + benchmarkFile)
+    assert set(benchmarkDf["consensusAlgorithm"]) == {"pairwise-model"}
+    totalTimeLines = [
+        line
+        for line in capfd.readouterr().out.splitlines()
+        if "total consensus time" in line
+    ]
+    assert len(totalTimeLines) == 1
+    totalSeconds = float(totalTimeLines[0].split(": ")[-1].split()[0])
+    assert "pairwise-model total consensus time" in totalTimeLines[0]
+    assert totalSeconds == pytest.approx(benchmarkDf["wallTimeSeconds"].sum(), abs=0.01)
+
+
+def test__benchmark__main__benchmarks_every_bin_in_a_directory(
+    parser, benchmarkArgs, benchmarkFiles, targetSequenceRecords
+):
+    binDirectory = os.path.join(benchmarkFiles.parentDir.name, "bins")
+    os.mkdir(binDirectory)
+    for binName, binRecords in [
+        ("bin1", targetSequenceRecords),
+        ("bin2", targetSequenceRecords[:12]),
+    ]:
+        SeqIO.write(binRecords, os.path.join(binDirectory, binName + ".fastq"), "fastq")
+    benchmarkArgs = ["benchmark", "-ib", binDirectory] + benchmarkArgs[3:]
+    benchmarkArgs += ["-r", benchmarkFiles.referenceFile.name, "-iter", "2"]
+    args = vars(parser.parse_args(benchmarkArgs))
+    benchmark.main(args)
+    outputContents = sorted(os.listdir(args["output"]))
+    assert len(outputContents) == 4
+    assert re.match(r"benchmark-pairwise-\d{8}-\d{6}-aggregate\.csv", outputContents[0])
+    assert re.match(r"benchmark-pairwise-\d{8}-\d{6}-per_bin\.csv", outputContents[1])
+    assert re.match(r"benchmark-pairwise-\d{8}-\d{6}\.csv", outputContents[2])
+    assert outputContents[3] == "reference.fasta"
+    benchmarkDf = pd.read_csv(args["output"] + outputContents[2])
+    assert len(benchmarkDf) == 8
+    assert sorted(set(benchmarkDf["bin"])) == ["bin1", "bin2"]
+    assert set(
+        benchmarkDf[benchmarkDf["bin"] == "bin2"]["originalNumberOfSequences"]
+    ) == {12}
+    binDf = pd.read_csv(args["output"] + outputContents[1])
+    assert list(binDf["bin"]) == ["bin1", "bin1", "bin2", "bin2"]
+    assert list(binDf["iterations"]) == [2, 2, 2, 2]
+    aggregateDf = pd.read_csv(args["output"] + outputContents[0])
+    assert list(aggregateDf["interval"]) == [1, 10]
+    assert list(aggregateDf["bins"]) == [2, 2]
+    assert list(aggregateDf["iterations"]) == [4, 4]
+    referenceRecords = list(
+        SeqIO.parse(os.path.join(args["output"], "reference.fasta"), "fasta")
+    )
+    assert [record.id for record in referenceRecords] == ["bin1", "bin2"]
+
+
+def test__benchmark__main__seed_reproduces_subsamples_across_process_numbers(
+    parser, benchmarkArgs, benchmarkFiles, tmp_path
+):
+    benchmarkOutputs = []
+    cachedConsensusFlags = []
+    for processNum in ["1", "2"]:
+        outputDirectory = tmp_path / f"processNum{processNum}"
+        outputDirectory.mkdir()
+        args = vars(
+            parser.parse_args(
+                ["benchmark", "-i", benchmarkFiles.inputFile.name]
+                + ["-o", str(outputDirectory), "-iter", "3", "-s", "11"]
+                + ["-p", processNum, "-cd", str(tmp_path)]
+            )
+        )
+        benchmark.main(args)
+        benchmarkFile = [
+            fileName
+            for fileName in os.listdir(args["output"])
+            if fileName.startswith("benchmark-")
+        ][0]
+        benchmarkDf = pd.read_csv(args["output"] + benchmarkFile)
+        benchmarkOutputs.append(
+            benchmarkDf.sort_values(["interval", "iteration"])[
+                ["interval", "iteration", "benchmarkSequence"]
+            ].values.tolist()
+        )
+        cachedConsensusFlags.append(
+            benchmarkDf.groupby("interval")["cachedConsensus"].all().to_dict()
+        )
+    assert benchmarkOutputs[0] == benchmarkOutputs[1]
+    assert cachedConsensusFlags == [{1: False, 10: False}, {1: False, 10: True}]
+    assert len(benchmarkOutputs[0]) == 6
+    assert len([fileName for fileName in os.listdir(tmp_path) if "." in fileName]) == 3
+
+
+def test__benchmark__main__nested_subsamples_extend_smaller_intervals(
+    parser, benchmarkArgs, benchmarkFiles, targetSequenceRecords
+):
+    benchmarkArgs += ["-int", "5", "-iter", "2", "-ns", "-s", "3"]
+    args = vars(parser.parse_args(benchmarkArgs))
+    benchmark.main(args)
+    benchmarkFile = [
+        fileName
+        for fileName in os.listdir(args["output"])
+        if fileName.startswith("benchmark-")
+    ][0]
+    benchmarkDf = pd.read_csv(args["output"] + benchmarkFile)
+    assert len(benchmarkDf) == 6
+    assert sorted(benchmarkDf["interval"]) == [1, 1, 5, 5, 10, 10]
+    assert list(benchmarkDf["iteration"].value_counts().sort_index()) == [3, 3]
+    consensusStrategyPairwise = ConsensusStrategyPairwise()
+    for iteration in range(2):
+        sampleIndices = consensusStrategyPairwise.find_benchmark_sample_indices(
+            len(targetSequenceRecords), 10, iteration, 3, zlib.crc32(b"input")
+        )
+        sampleRecords = [targetSequenceRecords[index] for index in sampleIndices]
+        iterationDf = benchmarkDf[benchmarkDf["iteration"] == iteration]
+        iterationSequences = dict(
+            zip(iterationDf["interval"], iterationDf["benchmarkSequence"])
+        )
+        assert iterationSequences[1] == str(sampleRecords[0].seq)
+        for intervalNumber in [5, 10]:
+            assert iterationSequences[intervalNumber] == str(
+                consensusStrategyPairwise.generate_consensus_record_from_biopython_records(
+                    sampleRecords[:intervalNumber]
+                ).seq
+            )
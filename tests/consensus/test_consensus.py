@@ -3,6 +3,10 @@ import re
 from Bio import SeqIO
 import sys
 import os
+import stat
+import time
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
 
 srcPath = os.getcwd().split("/")[:-1]
 srcPath = "/".join(srcPath) + "/src/ConSeqUMI"
@@ -12,6 +16,7 @@ testsPath = "/".join(testsPath) + "/tests"
 sys.path.insert(1, testsPath)
 
 from consensus import consensus
+from consensus.ConsensusManifest import ConsensusManifest
 from test_conseq import parser, consArgs, consFiles
 from test_conseq import parsedConsArgs as args
 from pytestConsensusFixtures import (
@@ -29,21 +34,33 @@ def consensusAlgorithm():
 
 @pytest.fixture
 def fileNamePattern(consensusAlgorithm):
-    pattern = r"-\d{8}-\d{6}\.fasta"
+    pattern = r"-\d{8}-\d{6}\.fastq"
     return "consensus-" + consensusAlgorithm + pattern
 
 
+def find_consensus_file(outputDirectory):
+    file = [
+        fileName
+        for fileName in os.listdir(outputDirectory)
+        if fileName.startswith("consensus-")
+    ]
+    assert len(file) == 1
+    return outputDirectory + file[0]
+
+
 def test__cons__main(args, consFiles):
     consensus.main(args)
-    file = os.listdir(args["output"])
-    assert len(file) == 1
+    file = sorted(os.listdir(args["output"]))
+    assert len(file) == 2
+    assert file[1] == "consensus_manifest.tsv"
     consFile = args["output"] + file[0]
     expectedDescriptionStarts = [
         "Number of Target Sequences used to generate this consensus: 14",
         "Number of Target Sequences used to generate this consensus: 28",
     ]
-    consensusRecords = list(SeqIO.parse(consFile, "fasta"))
+    consensusRecords = list(SeqIO.parse(consFile, "fastq"))
     for record in consensusRecords:
+        assert len(record.letter_annotations["phred_quality"]) == len(record.seq)
         descriptionStart = len(record.id) + 1
         assert (
             record.description[
@@ -53,22 +70,256 @@ def test__cons__main(args, consFiles):
         )
 
 
+def test__cons__main__with_batches(args, consFiles):
+    args["batchSize"] = 2
+    consensus.main(args)
+    consFile = find_consensus_file(args["output"])
+    consensusRecords = list(SeqIO.parse(consFile, "fastq"))
+    assert len(consensusRecords) == 2
+    assert len(set(record.id for record in consensusRecords)) == 2
+
+
+def test__cons__main__with_async_external_processes(args, consFiles):
+    args["asyncExternalProcesses"] = True
+    consensus.main(args)
+    consFile = find_consensus_file(args["output"])
+    consensusRecords = list(SeqIO.parse(consFile, "fastq"))
+    assert len(consensusRecords) == 2
+    assert len(set(record.id for record in consensusRecords)) == 2
+
+
+def test__cons__main__records_timings_for_cost_model(args, consFiles, tmp_path):
+    args["costModel"] = str(tmp_path / "timings.csv")
+    consensus.main(args)
+    consensus.main(args)
+    with open(args["costModel"]) as file:
+        timingRows = file.read().splitlines()
+    assert timingRows[0] == "consensusAlgorithm,path,readCount,meanReadLength,seconds"
+    assert len(timingRows) == 5
+
+
+fakeLamassembleScript = """#!{python}
+import sys
+import time
+from Bio import SeqIO
+
+if len(list(SeqIO.parse(sys.argv[-1], "fastq"))) > 20:
+    time.sleep(30)
+print(">consensus")
+print("ACGT")
+"""
+
+
+@pytest.mark.parametrize("asyncExternalProcesses", [False, True])
+def test__cons__main__skips_bins_whose_external_tool_fails(
+    args, consFiles, tmp_path, monkeypatch, capfd, asyncExternalProcesses
+):
+    fakeLamassemblePath = tmp_path / "lamassemble"
+    fakeLamassemblePath.write_text(fakeLamassembleScript.format(python=sys.executable))
+    os.chmod(fakeLamassemblePath, os.stat(fakeLamassemblePath).st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", str(tmp_path) + os.pathsep + os.environ["PATH"])
+    args["consensusAlgorithm"] = "lamassemble"
+    args["toolTimeout"] = 1
+    args["asyncExternalProcesses"] = asyncExternalProcesses
+    slowPath = consFiles.targetSequenceFastq2.name
+    startTime = time.perf_counter()
+    consensus.main(args)
+    assert time.perf_counter() - startTime < 20
+    consensusRecords = list(SeqIO.parse(find_consensus_file(args["output"]), "fasta"))
+    assert [
+        record.description.split("File Path: ")[1] for record in consensusRecords
+    ] == [consFiles.targetSequenceFastq1.name]
+    consensusManifest = ConsensusManifest(args["output"])
+    consensusManifest.load_completed_paths()
+    assert consensusManifest.completedPaths == {consFiles.targetSequenceFastq1.name}
+    assert f"skipping {slowPath}, consensus generation failed" in capfd.readouterr().out
+
+
+@pytest.mark.parametrize("asyncExternalProcesses", [False, True])
+def test__cons__main__does_not_record_timings_for_cached_consensus(
+    args, consFiles, tmp_path, asyncExternalProcesses
+):
+    args["costModel"] = str(tmp_path / "timings.csv")
+    args["cacheDirectory"] = str(tmp_path / "cache")
+    args["asyncExternalProcesses"] = asyncExternalProcesses
+    os.mkdir(args["cacheDirectory"])
+    consensus.main(args)
+    consensus.main(args)
+    with open(args["costModel"]) as file:
+        timingRows = file.read().splitlines()
+    assert len(timingRows) == 3
+    assert sorted(row.split(",")[1] for row in timingRows[1:]) == sorted(args["input"])
+
+
 def test__cons__main_quits_when_minimum_read_count_reached(args, consFiles):
     args["minimumReads"] = 20
     consensus.main(args)
-    file = os.listdir(args["output"])
-    consFile = args["output"] + file[0]
-    consensusRecords = list(SeqIO.parse(consFile, "fasta"))
+    consFile = find_consensus_file(args["output"])
+    consensusRecords = list(SeqIO.parse(consFile, "fastq"))
     assert len(consensusRecords) == 1
 
 
+def test__cons__main__resume_skips_completed_files(args, consFiles):
+    consensus.main(args)
+    consFile = find_consensus_file(args["output"])
+    consensusRecords = list(SeqIO.parse(consFile, "fastq"))
+    with open(args["output"] + "consensus_manifest.tsv") as file:
+        manifestLines = file.read().splitlines()
+    assert sorted(line.split("\t")[1] for line in manifestLines) == sorted(
+        args["input"]
+    )
+    with open(args["output"] + "consensus_manifest.tsv", "w") as file:
+        file.write(manifestLines[0] + "\n")
+    with open(consFile, "a") as file:
+        file.write("@partially_written_record\nAC")
+    args["resume"] = args["output"]
+    consensus.main(args)
+    assert find_consensus_file(args["output"]) == consFile
+    resumedRecords = list(SeqIO.parse(consFile, "fastq"))
+    assert len(resumedRecords) == 2
+    assert sorted(str(record.seq) for record in resumedRecords) == sorted(
+        str(record.seq) for record in consensusRecords
+    )
+    with open(args["output"] + "consensus_manifest.tsv") as file:
+        assert len(file.read().splitlines()) == 2
+
+
+def test__cons__main__resume_skips_everything_when_complete(args, consFiles):
+    consensus.main(args)
+    consFile = find_consensus_file(args["output"])
+    with open(consFile) as file:
+        consensusText = file.read()
+    args["resume"] = args["output"]
+    consensus.main(args)
+    with open(consFile) as file:
+        assert file.read() == consensusText
+
+
+def test__cons__main__reuses_cached_consensus(args, consFiles, tmp_path, monkeypatch):
+    args["cacheDirectory"] = str(tmp_path)
+    consensus.main(args)
+    consFile = find_consensus_file(args["output"])
+    consensusRecords = list(SeqIO.parse(consFile, "fastq"))
+    assert len(os.listdir(tmp_path)) == 2
+
+    def fail_to_generate_consensus(self, binRecords):
+        raise AssertionError("consensus should have been read from the cache")
+
+    monkeypatch.setattr(
+        consensus.ConsensusContext,
+        "generate_consensus_record_from_biopython_records",
+        fail_to_generate_consensus,
+    )
+    args["minimumReads"] = 1
+    os.remove(consFile)
+    os.remove(args["output"] + "consensus_manifest.tsv")
+    consensus.main(args)
+    cachedRecords = list(SeqIO.parse(find_consensus_file(args["output"]), "fastq"))
+    assert sorted(str(record.seq) for record in cachedRecords) == sorted(
+        str(record.seq) for record in consensusRecords
+    )
+
+
+def test__cons__main__passes_cache_settings_to_spawned_workers(
+    args, consFiles, tmp_path
+):
+    args["cacheDirectory"] = str(tmp_path)
+    startMethod = multiprocessing.get_start_method(allow_none=True)
+    multiprocessing.set_start_method("spawn", force=True)
+    try:
+        consensus.main(args)
+    finally:
+        multiprocessing.set_start_method(startMethod, force=True)
+    assert len(os.listdir(tmp_path)) == 2
+
+
+def test__cons__submit_tasks_with_bounded_window(monkeypatch):
+    inFlightCounts = []
+
+    def wait_and_record_in_flight_count(futureProcesses, return_when):
+        inFlightCounts.append(len(futureProcesses))
+        return consensus_wait(futureProcesses, return_when=return_when)
+
+    consensus_wait = consensus.wait
+    monkeypatch.setattr(consensus, "wait", wait_and_record_in_flight_count)
+    with ThreadPoolExecutor(max_workers=2) as threadPool:
+        results = list(
+            consensus.submit_tasks_with_bounded_window(
+                threadPool, pow, ((number, 2) for number in range(10)), 3
+            )
+        )
+    assert sorted(results) == [number**2 for number in range(10)]
+    assert max(inFlightCounts) == 3
+
+
+def test__cons__submit_tasks_with_bounded_window__ordered(monkeypatch):
+    inFlightCounts = []
+
+    def wait_and_record_in_flight_count(futureProcesses, return_when):
+        inFlightCounts.append(len(futureProcesses))
+        return consensus_wait(futureProcesses, return_when=return_when)
+
+    def sleep_and_return(seconds, value):
+        time.sleep(seconds)
+        return value
+
+    consensus_wait = consensus.wait
+    monkeypatch.setattr(consensus, "wait", wait_and_record_in_flight_count)
+    with ThreadPoolExecutor(max_workers=3) as threadPool:
+        results = list(
+            consensus.submit_tasks_with_bounded_window(
+                threadPool,
+                sleep_and_return,
+                ((0.01 * (5 - number % 5), number) for number in range(10)),
+                3,
+                ordered=True,
+            )
+        )
+    assert results == list(range(10))
+    assert max(inFlightCounts) <= 3
+
+
+def test__cons__main__with_ordered_output(args, consFiles, tmp_path):
+    args["orderedOutput"] = True
+    args["costModel"] = str(tmp_path / "bin_timings.csv")
+    consensusFiles = []
+    for run in range(2):
+        args["output"] = str(tmp_path / f"run{run}") + "/"
+        os.mkdir(args["output"])
+        consensus.main(args)
+        consensusFiles.append(find_consensus_file(args["output"]))
+    consensusRecords = list(SeqIO.parse(consensusFiles[0], "fastq"))
+    assert [
+        record.description.split("File Path: ")[1] for record in consensusRecords
+    ] == sorted(args["input"])
+    with open(consensusFiles[0]) as firstFile, open(consensusFiles[1]) as secondFile:
+        assert firstFile.read() == secondFile.read()
+
+
+def test__cons__main__with_ordered_output_and_async_external_processes(args, consFiles):
+    args["orderedOutput"] = True
+    args["asyncExternalProcesses"] = True
+    consensus.main(args)
+    consensusRecords = list(SeqIO.parse(find_consensus_file(args["output"]), "fastq"))
+    assert [
+        record.description.split("File Path: ")[1] for record in consensusRecords
+    ] == sorted(args["input"])
+
+
 def test__cons__determine_output_file_type__default():
-    consensusAlgorithm = "pairwise"
+    consensusAlgorithm = "medaka"
     fileType = "fasta"
     fileTypeOutput = consensus.determine_output_file_type(consensusAlgorithm)
     assert fileType == fileTypeOutput
 
 
+def test__cons__determine_output_file_type__pairwise():
+    consensusAlgorithm = "pairwise"
+    fileType = "fastq"
+    fileTypeOutput = consensus.determine_output_file_type(consensusAlgorithm)
+    assert fileType == fileTypeOutput
+
+
 @pytest.mark.skipif(
     True,
     reason="Not sure how to test this. I would need to change the LCOMMAND config variable in-code to test separately from typical options.",
@@ -1,6 +1,7 @@
 import pytest
 import sys
 import os
+import numpy as np
 
 srcPath = os.getcwd().split("/")[:-1]
 srcPath = "/".join(srcPath) + "/src/ConSeqUMI"
@@ -656,3 +657,155 @@ def test__consensus_strategy_pairwise_functions__identify_differences_from_indic
         singleBackMutationWithFrontInsertDifferenceOutput
         == singleBackMutationWithFrontInsertDifference
     )
+
+
+def test__consensus_strategy_pairwise_functions__find_insertion_columns():
+    insertionColumnsOutput = consensusStrategyPairwiseFunctions.find_insertion_columns(
+        "-AC--GT-"
+    )
+    assert list(insertionColumnsOutput) == [0, 3, 4, 7]
+
+
+def test__consensus_strategy_pairwise_functions__identify_differences_from_indices__with_shared_insertion_columns():
+    originalSequenceAlignment = "-ACG--TAC"
+    differentSequenceAlignment = "TACGGGTTC"
+    insertionColumns = consensusStrategyPairwiseFunctions.find_insertion_columns(
+        originalSequenceAlignment
+    )
+    insertionDifferencesOutput = (
+        consensusStrategyPairwiseFunctions.identify_differences_from_indices(
+            "insertion",
+            [[0], [4, 5]],
+            originalSequenceAlignment,
+            differentSequenceAlignment,
+            insertionColumns,
+        )
+    )
+    mutationDifferencesOutput = (
+        consensusStrategyPairwiseFunctions.identify_differences_from_indices(
+            "mutation",
+            [[7]],
+            originalSequenceAlignment,
+            differentSequenceAlignment,
+            insertionColumns,
+        )
+    )
+    assert insertionDifferencesOutput == [(0, 0, "T"), (3, 3, "GG")]
+    assert mutationDifferencesOutput == [(4, 5, "T")]
+
+
+def test__consensus_strategy_pairwise_functions__find_runs_of_character():
+    runStarts, runEnds = consensusStrategyPairwiseFunctions.find_runs_of_character(
+        "-AC--GT-", "-"
+    )
+    assert list(runStarts) == [0, 3, 7]
+    assert list(runEnds) == [1, 5, 8]
+
+
+def test__consensus_strategy_pairwise_functions__find_base_counts_before_columns():
+    basesBeforeColumnsOutput = (
+        consensusStrategyPairwiseFunctions.find_base_counts_before_columns("A-CG-")
+    )
+    assert list(basesBeforeColumnsOutput) == [0, 1, 1, 2, 3, 3]
+
+
+def test__consensus_strategy_pairwise_functions__find_summed_qualities_of_column_runs():
+    differentSequenceAlignment = "AC-GTT"
+    qualities = [10, 20, 30, 40, 50]
+    qualityPrefixSums = np.concatenate([[0], np.cumsum(qualities)])
+    basesBeforeColumns = (
+        consensusStrategyPairwiseFunctions.find_base_counts_before_columns(
+            differentSequenceAlignment
+        )
+    )
+    summedQualitiesOutput = (
+        consensusStrategyPairwiseFunctions.find_summed_qualities_of_column_runs(
+            np.array([0, 2, 4]),
+            np.array([1, 3, 6]),
+            basesBeforeColumns,
+            qualityPrefixSums,
+        )
+    )
+    assert list(summedQualitiesOutput) == [10, 25, 90]
+
+
+def test__consensus_strategy_pairwise_functions__encode_differences():
+    differences = [(5, 6, "T"), (3, 3, "AC"), (5, 6, "T"), (5, 6, "G"), (3, 3, "AC")]
+    differenceCodes, firstIndices = (
+        consensusStrategyPairwiseFunctions.encode_differences(differences)
+    )
+    assert len(set(differenceCodes)) == 3
+    for difference, differenceCode in zip(differences, differenceCodes):
+        assert differences[firstIndices[differenceCode]] == difference
+
+
+def test__consensus_strategy_pairwise_functions__count_matching_reads_at_each_position():
+    alignments = [
+        (0, "ACGT", "||||", "ACGT"),
+        (0, "AC-GT", "||-.|", "ACTTT"),
+        (0, "ACGT", "|--|", "A--T"),
+    ]
+    matchCountsOutput = (
+        consensusStrategyPairwiseFunctions.count_matching_reads_at_each_position(
+            4, alignments
+        )
+    )
+    assert list(matchCountsOutput) == [3, 2, 1, 3]
+
+
+def test__consensus_strategy_pairwise_functions__convert_match_counts_to_phred_qualities():
+    phredQualitiesOutput = (
+        consensusStrategyPairwiseFunctions.convert_match_counts_to_phred_qualities(
+            np.array([0, 8, 998]), 998, 25
+        )
+    )
+    assert phredQualitiesOutput == [0, 0, 25]
+    assert consensusStrategyPairwiseFunctions.convert_match_counts_to_phred_qualities(
+        np.array([8]), 8, 60
+    ) == [10]
+
+
+def test__consensus_strategy_pairwise_functions__find_window_boundaries():
+    windowBoundaries = [(0, 150), (100, 250), (200, 320)]
+    windowBoundariesOutput = consensusStrategyPairwiseFunctions.find_window_boundaries(
+        320, 100, 50
+    )
+    assert windowBoundariesOutput == windowBoundaries
+
+
+def test__consensus_strategy_pairwise_functions__find_window_boundaries__short_sequence_is_one_window():
+    windowBoundariesOutput = consensusStrategyPairwiseFunctions.find_window_boundaries(
+        120, 100, 50
+    )
+    assert windowBoundariesOutput == [(0, 120)]
+
+
+def test__consensus_strategy_pairwise_functions__map_target_indices_to_query_indices():
+    alignedBlocks = ([(0, 3), (5, 8)], [(0, 3), (3, 6)])
+    targetToQueryIndices = [0, 1, 2, 3, 3, 3, 4, 5, 8]
+    targetToQueryIndicesOutput = (
+        consensusStrategyPairwiseFunctions.map_target_indices_to_query_indices(
+            alignedBlocks, 8, 8
+        )
+    )
+    assert list(targetToQueryIndicesOutput) == targetToQueryIndices
+
+
+def test__consensus_strategy_pairwise_functions__map_target_indices_to_query_indices__keeps_leading_insertion():
+    alignedBlocks = ([(0, 4)], [(2, 6)])
+    targetToQueryIndicesOutput = (
+        consensusStrategyPairwiseFunctions.map_target_indices_to_query_indices(
+            alignedBlocks, 4, 6
+        )
+    )
+    assert list(targetToQueryIndicesOutput) == [0, 3, 4, 5, 6]
+
+
+def test__consensus_strategy_pairwise_functions__find_aligned_blocks_from_alignment_strings():
+    originalBlocks, differentBlocks = (
+        consensusStrategyPairwiseFunctions.find_aligned_blocks_from_alignment_strings(
+            "AC-GT-A", "ACCG-TA"
+        )
+    )
+    assert originalBlocks.tolist() == [[0, 2], [2, 3], [4, 5]]
+    assert differentBlocks.tolist() == [[0, 2], [3, 4], [5, 6]]
@@ -0,0 +1,90 @@
+import pytest
+import sys
+import os
+
+srcPath = os.getcwd().split("/")[:-1]
+srcPath = "/".join(srcPath) + "/src/ConSeqUMI"
+sys.path.insert(1, srcPath)
+microbenchmarksPath = os.getcwd().split("/")[:-1]
+microbenchmarksPath = "/".join(microbenchmarksPath) + "/extraScripts/microbenchmarks"
+sys.path.insert(1, microbenchmarksPath)
+from umi.UmiExtractor import UmiExtractor
+from ReadSimulator import ReadSimulator
+
+
+@pytest.fixture
+def adapters():
+    return [
+        "GAGTGTGGCTCTTCGGAT",
+        "CACCTTCGTGACTTCCCATT",
+        "GTGGGACTGCTGATGACGACTGAT",
+        "GCGATGCAATTTCCTCATTT",
+    ]
+
+
+@pytest.fixture
+def errorFreeProfile():
+    return {
+        "substitution": 0,
+        "insertion": 0,
+        "deletion": 0,
+        "homopolymerDeletion": 0,
+    }
+
+
+def test__read_simulator__generate_reads__is_reproducible_with_seed(adapters):
+    readSets = [
+        ReadSimulator(adapters, seed=seed, ampliconLength=200).generate_reads(3, 4)
+        for seed in [1, 1, 2]
+    ]
+    readSequences = [
+        [str(record.seq) for record in readRecords] for _, _, readRecords in readSets
+    ]
+    assert readSets[0][:2] == readSets[1][:2]
+    assert readSequences[0] == readSequences[1]
+    assert readSequences[0] != readSequences[2]
+    assert len(readSequences[0]) == 12
+
+
+def test__read_simulator__generate_reads__umis_and_amplicon_are_extractable(
+    adapters, errorFreeProfile
+):
+    readSimulator = ReadSimulator(
+        adapters, seed=0, ampliconLength=300, errorProfile=errorFreeProfile
+    )
+    ampliconSequence, umiPairs, readRecords = readSimulator.generate_reads(4, 3)
+    umiExtractor = UmiExtractor(umiLength=readSimulator.umiLength)
+    umiExtractor.set_universal_top_and_bottom_linked_adapters(*adapters)
+    (
+        topUmis,
+        bottomUmis,
+        targetRecords,
+    ) = umiExtractor.extract_umis_and_target_sequences_from_all_records(readRecords)
+    assert len(ampliconSequence) == 300
+    assert set(zip(topUmis, bottomUmis)) == set(umiPairs)
+    assert all(str(record.seq) == ampliconSequence for record in targetRecords)
+
+
+def test__read_simulator__add_sequencing_errors__follows_error_profile(adapters):
+    readSimulator = ReadSimulator(
+        adapters,
+        seed=0,
+        errorProfile={
+            "substitution": 0.1,
+            "insertion": 0,
+            "deletion": 0,
+            "homopolymerDeletion": 0.5,
+        },
+    )
+    sequence = "ACGT" * 250 + "A" * 1000
+    readSequence, readQualities = readSimulator.add_sequencing_errors(sequence)
+    assert len(readQualities) == len(readSequence)
+    assert readSequence[:1000].count("A") < 1000
+    assert 0.35 < 1 - (len(readSequence) - 1000) / 1000 < 0.65
+    mismatchIndices = [
+        index for index in range(1000) if sequence[index] != readSequence[index]
+    ]
+    assert 50 < len(mismatchIndices) < 150
+    assert {readQualities[index] for index in mismatchIndices} == {
+        readSimulator.errorQuality
+    }
@@ -0,0 +1,197 @@
+import pytest
+import re
+import sys
+import os
+import csv
+import time
+import asyncio
+
+srcPath = os.getcwd().split("/")[:-1]
+srcPath = "/".join(srcPath) + "/src/ConSeqUMI"
+sys.path.insert(1, srcPath)
+testsPath = os.getcwd().split("/")[:-1]
+testsPath = "/".join(testsPath) + "/tests"
+sys.path.insert(1, testsPath)
+from ExternalProcessRunner import ExternalProcessRunner, ExternalProcessError
+
+
+def python_commands(code):
+    return [sys.executable, "-c", code]
+
+
+def test__external_process_runner__run__returns_output_of_successful_process():
+    externalProcessRunner = ExternalProcessRunner(timeout=0, retries=0, logFile="")
+    completedProcess = externalProcessRunner.run(
+        python_commands("import sys; print(sys.stdin.read().upper())"),
+        inputText="acgt",
+    )
+    assert completedProcess.returncode == 0
+    assert completedProcess.stdout.decode("utf8").strip() == "ACGT"
+    assert len(externalProcessRunner.invocationRecords) == 1
+    invocationRecord = externalProcessRunner.invocationRecords[0]
+    assert invocationRecord["attempt"] == 1
+    assert invocationRecord["returnCode"] == 0
+    assert not invocationRecord["timedOut"]
+    assert invocationRecord["wallTimeSeconds"] >= 0
+    assert invocationRecord["maxRssKilobytes"] > 0
+
+
+def test__external_process_runner__run__handles_input_larger_than_pipe_buffer():
+    externalProcessRunner = ExternalProcessRunner(timeout=0, retries=0, logFile="")
+    inputText = "ACGT" * 100000
+    completedProcess = externalProcessRunner.run(
+        python_commands("import sys; sys.stdout.write(sys.stdin.read())"),
+        inputText=inputText,
+    )
+    assert completedProcess.stdout.decode("utf8") == inputText
+
+
+def test__external_process_runner__run__raises_error_with_stderr_on_nonzero_exit():
+    externalProcessRunner = ExternalProcessRunner(timeout=0, retries=0, logFile="")
+    errorOutput = "exited with code 3 after 1 attempt(s)"
+    with pytest.raises(ExternalProcessError, match=re.escape(errorOutput)) as error:
+        externalProcessRunner.run(
+            python_commands("import sys; sys.stderr.write('bad input'); sys.exit(3)")
+        )
+    assert "bad input" in str(error.value)
+
+
+def test__external_process_runner__run__retries_failed_process(tmp_path):
+    attemptFile = tmp_path / "attempts.txt"
+    code = (
+        f"import os, sys; path = {str(attemptFile)!r}; "
+        "open(path, 'a').write('x'); "
+        "sys.exit(0 if len(open(path).read()) == 3 else 1)"
+    )
+    externalProcessRunner = ExternalProcessRunner(timeout=0, retries=2, logFile="")
+    completedProcess = externalProcessRunner.run(python_commands(code))
+    assert completedProcess.returncode == 0
+    assert [
+        invocationRecord["returnCode"]
+        for invocationRecord in externalProcessRunner.invocationRecords
+    ] == [1, 1, 0]
+
+
+def test__external_process_runner__run__stops_process_after_timeout():
+    externalProcessRunner = ExternalProcessRunner(timeout=1, retries=1, logFile="")
+    errorOutput = "timed out after 1 seconds after 2 attempt(s)"
+    with pytest.raises(ExternalProcessError, match=re.escape(errorOutput)):
+        externalProcessRunner.run(python_commands("import time; time.sleep(30)"))
+    assert len(externalProcessRunner.invocationRecords) == 2
+    for invocationRecord in externalProcessRunner.invocationRecords:
+        assert invocationRecord["timedOut"]
+        assert invocationRecord["wallTimeSeconds"] < 10
+
+
+def is_process_running(processId):
+    try:
+        with open(f"/proc/{processId}/stat") as file:
+            return file.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def spawning_python_commands(childProcessIdPath):
+    return python_commands(
+        "import subprocess, sys, time; "
+        "childProcess = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)']); "
+        f"open({str(childProcessIdPath)!r}, 'w').write(str(childProcess.pid)); "
+        "time.sleep(30)"
+    )
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="requires /proc")
+def test__external_process_runner__run__stops_child_processes_after_timeout(tmp_path):
+    childProcessIdPath = tmp_path / "child.pid"
+    externalProcessRunner = ExternalProcessRunner(timeout=1, retries=0, logFile="")
+    with pytest.raises(ExternalProcessError):
+        externalProcessRunner.run(spawning_python_commands(childProcessIdPath))
+    childProcessId = int(childProcessIdPath.read_text())
+    time.sleep(0.2)
+    assert not is_process_running(childProcessId)
+
+
+def test__external_process_runner__run__appends_invocations_to_log_file(tmp_path):
+    logFile = str(tmp_path / "external_process_log.csv")
+    for _ in range(2):
+        ExternalProcessRunner(timeout=0, retries=0, logFile=logFile).run(
+            python_commands("pass")
+        )
+    with open(logFile) as file:
+        logRows = list(csv.DictReader(file))
+    assert len(logRows) == 2
+    assert list(logRows[0]) == [
+        "tool",
+        "attempt",
+        "returnCode",
+        "timedOut",
+        "wallTimeSeconds",
+        "maxRssKilobytes",
+    ]
+    assert logRows[0]["tool"] == os.path.basename(sys.executable)
+    assert logRows[1]["returnCode"] == "0"
+
+
+def test__external_process_runner__run_async__returns_output_of_successful_process():
+    externalProcessRunner = ExternalProcessRunner(timeout=0, retries=0, logFile="")
+    completedProcess = asyncio.run(
+        externalProcessRunner.run_async(
+            python_commands("import sys; print(sys.stdin.read().upper())"),
+            inputText="acgt",
+        )
+    )
+    assert completedProcess.stdout.decode("utf8").strip() == "ACGT"
+    assert externalProcessRunner.invocationRecords[0]["returnCode"] == 0
+
+
+def test__external_process_runner__run_async__runs_processes_concurrently():
+    externalProcessRunner = ExternalProcessRunner(timeout=0, retries=0, logFile="")
+
+    async def run_processes():
+        return await asyncio.gather(
+            *[
+                externalProcessRunner.run_async(
+                    python_commands("import time; time.sleep(1)")
+                )
+                for _ in range(4)
+            ]
+        )
+
+    startTime = time.perf_counter()
+    asyncio.run(run_processes())
+    assert time.perf_counter() - startTime < 3
+    assert len(externalProcessRunner.invocationRecords) == 4
+
+
+def test__external_process_runner__run_async__stops_process_after_timeout():
+    externalProcessRunner = ExternalProcessRunner(timeout=1, retries=1, logFile="")
+    errorOutput = "timed out after 1 seconds after 2 attempt(s)"
+    with pytest.raises(ExternalProcessError, match=re.escape(errorOutput)):
+        asyncio.run(
+            externalProcessRunner.run_async(
+                python_commands("import time; time.sleep(30)")
+            )
+        )
+    assert [
+        invocationRecord["timedOut"]
+        for invocationRecord in externalProcessRunner.invocationRecords
+    ] == [True, True]
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="requires /proc")
+def test__external_process_runner__run_async__stops_child_processes_after_timeout(
+    tmp_path,
+):
+    childProcessIdPath = tmp_path / "child.pid"
+    externalProcessRunner = ExternalProcessRunner(timeout=1, retries=0, logFile="")
+    startTime = time.perf_counter()
+    with pytest.raises(ExternalProcessError):
+        asyncio.run(
+            externalProcessRunner.run_async(
+                spawning_python_commands(childProcessIdPath)
+            )
+        )
+    assert time.perf_counter() - startTime < 10
+    childProcessId = int(childProcessIdPath.read_text())
+    time.sleep(0.2)
+    assert not is_process_running(childProcessId)
@@ -510,12 +510,20 @@ def test__conseq__set_command_line_settings__cons_succeeds_when_consensusAlgorit
     assert args["consensusAlgorithm"] == "medaka"
 
 
+def test__conseq__set_command_line_settings__cons_succeeds_when_consensusAlgorithm_is_poa(
+    parser, consArgs
+):
+    consArgs += ["-c", "poa"]
+    args = vars(parser.parse_args(consArgs))
+    assert args["consensusAlgorithm"] == "poa"
+
+
 def test__conseq__set_command_line_settings__cons_fails_when_consensusAlgorithm_is_not_recognized(
     parser, consArgs
 ):
     errorValue = "unidentified"
     consArgs += ["-c", errorValue]
-    errorOutput = f"The -c or --consensusAlgorithm argument must be 'pairwise', 'lamassemble' or 'medaka'. Offending value: {errorValue}"
+    errorOutput = f"The -c or --consensusAlgorithm argument must be 'pairwise', 'lamassemble', 'medaka' or 'poa'. Offending value: {errorValue}"
     with pytest.raises(argparse.ArgumentTypeError, match=re.escape(errorOutput)):
         args = parser.parse_args(consArgs)
 
@@ -582,6 +590,187 @@ def test__conseq__set_command_line_settings__cons_fails_when_processNum_is_negat
         args = parser.parse_args(consArgs)
 
 
+def test__conseq__set_command_line_settings__cons_window_defaults_set_correctly(
+    parser, consArgs
+):
+    args = vars(parser.parse_args(consArgs))
+    assert args["windowLength"] == 0
+    assert args["windowProcessNum"] == 1
+    assert not args["qualityWeightedVoting"]
+
+
+def test__conseq__set_command_line_settings__cons_accepts_windowLength(
+    parser, consArgs
+):
+    consArgs += ["-w", "500", "-wp", "1"]
+    args = vars(parser.parse_args(consArgs))
+    assert args["windowLength"] == 500
+    assert args["windowProcessNum"] == 1
+
+
+def test__conseq__set_command_line_settings__cons_accepts_qualityWeightedVoting(
+    parser, consArgs
+):
+    consArgs += ["-qw"]
+    args = vars(parser.parse_args(consArgs))
+    assert args["qualityWeightedVoting"]
+
+
+def test__conseq__set_command_line_settings__cons_fails_when_windowLength_is_too_small(
+    parser, consArgs
+):
+    errorValue = "99"
+    consArgs += ["-w", errorValue]
+    errorOutput = f"The -w or --windowLength argument must be greater than or equal to 100. Offending value: {errorValue}"
+    with pytest.raises(argparse.ArgumentTypeError, match=re.escape(errorOutput)):
+        args = parser.parse_args(consArgs)
+
+
+def test__conseq__set_command_line_settings__cons_external_process_defaults_set_correctly(
+    parser, consArgs
+):
+    args = vars(parser.parse_args(consArgs))
+    assert args["scratchDirectory"] == ""
+    assert args["externalProcessNum"] == 0
+    assert args["batchSize"] == 1
+    assert args["toolTimeout"] == 0
+    assert args["toolRetries"] == 0
+    assert not args["asyncExternalProcesses"]
+    assert args["costModel"] == ""
+    assert args["resume"] is None
+    assert args["cacheDirectory"] == ""
+    assert args["cacheSize"] == 1024
+    assert not args["orderedOutput"]
+
+
+def test__conseq__set_command_line_settings__cons_accepts_external_process_settings(
+    parser, consArgs, consFiles
+):
+    consArgs += ["-sd", consFiles.parentDir.name, "-ep", "2"]
+    args = vars(parser.parse_args(consArgs))
+    assert args["scratchDirectory"] == consFiles.parentDir.name
+    assert args["externalProcessNum"] == 2
+
+
+def test__conseq__set_command_line_settings__cons_accepts_tool_timeout_and_retries(
+    parser, consArgs
+):
+    consArgs += ["-tt", "600", "-tr", "2"]
+    args = vars(parser.parse_args(consArgs))
+    assert args["toolTimeout"] == 600
+    assert args["toolRetries"] == 2
+
+
+def test__conseq__set_command_line_settings__cons_accepts_asyncExternalProcesses(
+    parser, consArgs
+):
+    consArgs += ["-as"]
+    args = vars(parser.parse_args(consArgs))
+    assert args["asyncExternalProcesses"]
+
+
+def test__conseq__set_command_line_settings__cons_accepts_resume_instead_of_output(
+    parser, consArgs, consFiles
+):
+    consArgs = consArgs[:3] + ["-re", consFiles.parentDir.name]
+    args = vars(parser.parse_args(consArgs))
+    assert args["resume"] == consFiles.parentDir.name + "/"
+    assert args["output"] is None
+
+
+def test__conseq__set_command_line_settings__cons_fails_when_resume_directory_does_not_exist(
+    parser, consArgs
+):
+    consArgs = consArgs[:3] + ["-re", "/this/path/does/not/exist/"]
+    errorOutput = "The -re or --resume argument must be an existing directory."
+    with pytest.raises(argparse.ArgumentTypeError, match=re.escape(errorOutput)):
+        args = parser.parse_args(consArgs)
+
+
+def test__conseq__set_command_line_settings__cons_accepts_cache_settings(
+    parser, consArgs, consFiles
+):
+    consArgs += ["-cd", consFiles.parentDir.name, "-cs", "50"]
+    args = vars(parser.parse_args(consArgs))
+    assert args["cacheDirectory"] == consFiles.parentDir.name
+    assert args["cacheSize"] == 50
+
+
+def test__conseq__set_command_line_settings__cons_fails_when_cacheDirectory_does_not_exist(
+    parser, consArgs
+):
+    consArgs += ["-cd", "/this/path/does/not/exist/"]
+    errorOutput = "The -cd or --cacheDirectory argument must be an existing directory."
+    with pytest.raises(argparse.ArgumentTypeError, match=re.escape(errorOutput)):
+        args = parser.parse_args(consArgs)
+
+
+def test__conseq__set_command_line_settings__cons_accepts_costModel(
+    parser, consArgs, consFiles
+):
+    costModelFile = os.path.join(consFiles.parentDir.name, "timings.csv")
+    consArgs += ["-cm", costModelFile]
+    args = vars(parser.parse_args(consArgs))
+    assert args["costModel"] == costModelFile
+
+
+def test__conseq__set_command_line_settings__cons_fails_when_costModel_is_not_csv(
+    parser, consArgs, consFiles
+):
+    consArgs += ["-cm", os.path.join(consFiles.parentDir.name, "timings.txt")]
+    errorOutput = "The -cm or --costModel argument file can only be a csv file (.csv)."
+    with pytest.raises(argparse.ArgumentTypeError, match=re.escape(errorOutput)):
+        args = parser.parse_args(consArgs)
+
+
+def test__conseq__set_command_line_settings__cons_fails_when_costModel_directory_does_not_exist(
+    parser, consArgs
+):
+    consArgs += ["-cm", "/this/path/does/not/exist/timings.csv"]
+    errorOutput = (
+        "The -cm or --costModel argument must be a file in an existing directory."
+    )
+    with pytest.raises(argparse.ArgumentTypeError, match=re.escape(errorOutput)):
+        args = parser.parse_args(consArgs)
+
+
+def test__conseq__set_command_line_settings__cons_fails_when_toolRetries_is_negative(
+    parser, consArgs
+):
+    errorValue = "-1"
+    consArgs += ["-tr", errorValue]
+    errorOutput = f"The -tr or --toolRetries argument must be greater than or equal to 1. Offending value: {errorValue}"
+    with pytest.raises(argparse.ArgumentTypeError, match=re.escape(errorOutput)):
+        args = parser.parse_args(consArgs)
+
+
+def test__conseq__set_command_line_settings__cons_fails_when_scratchDirectory_does_not_exist(
+    parser, consArgs
+):
+    consArgs += ["-sd", "/this/path/does/not/exist/"]
+    errorOutput = (
+        "The -sd or --scratchDirectory argument must be an existing directory."
+    )
+    with pytest.raises(argparse.ArgumentTypeError, match=re.escape(errorOutput)):
+        args = parser.parse_args(consArgs)
+
+
+def test__conseq__set_command_line_settings__cons_accepts_batchSize(parser, consArgs):
+    consArgs += ["-b", "8"]
+    args = vars(parser.parse_args(consArgs))
+    assert args["batchSize"] == 8
+
+
+def test__conseq__set_command_line_settings__cons_fails_when_batchSize_is_zero(
+    parser, consArgs
+):
+    errorValue = "0"
+    consArgs += ["-b", errorValue]
+    errorOutput = f"The -b or --batchSize argument must be greater than or equal to 1. Offending value: {errorValue}"
+    with pytest.raises(argparse.ArgumentTypeError, match=re.escape(errorOutput)):
+        args = parser.parse_args(consArgs)
+
+
 @pytest.fixture
 def benchmarkFiles(consensusSequence, targetSequenceRecords):
     class fileObj:
@@ -648,14 +837,91 @@ def test__conseq__set_command_line_settings__benchmark_defaults_set_correctly(
     assert args["reference"] == ""
     assert args["intervals"] == [10]
     assert args["iterations"] == 100
+    assert args["scratchDirectory"] == ""
+    assert args["externalProcessNum"] == 0
+    assert args["toolTimeout"] == 0
+    assert args["toolRetries"] == 0
+    assert args["convergenceThreshold"] == 0
+    assert not args["compactOutput"]
+    assert args["inputBins"] is None
+    assert args["binNumber"] == 0
+    assert args["seed"] is None
+    assert not args["nestedSubsamples"]
+    assert args["cacheDirectory"] == ""
+    assert args["cacheSize"] == 1024
     assert args["processNum"] == 1
 
 
+def test__conseq__set_command_line_settings__benchmark_accepts_inputBins(
+    parser, benchmarkArgs, benchmarkFiles
+):
+    binDirectory = os.path.join(benchmarkFiles.parentDir.name, "bins")
+    os.mkdir(binDirectory)
+    for binName in ["bin2.fastq", "bin1.fq", "notes.txt"]:
+        open(os.path.join(binDirectory, binName), "w").close()
+    benchmarkArgs = ["benchmark", "-ib", binDirectory] + benchmarkArgs[3:]
+    args = vars(parser.parse_args(benchmarkArgs + ["-nb", "1"]))
+    assert args["input"] is None
+    assert args["inputBins"] == [
+        os.path.join(binDirectory, "bin1.fq"),
+        os.path.join(binDirectory, "bin2.fastq"),
+    ]
+    assert args["binNumber"] == 1
+
+
+def test__conseq__set_command_line_settings__benchmark_fails_when_inputBins_has_no_fastq_files(
+    parser, benchmarkArgs, benchmarkFiles
+):
+    benchmarkArgs = ["benchmark", "-ib", benchmarkFiles.outputDir.name] + benchmarkArgs[
+        3:
+    ]
+    errorOutput = "The -ib or --inputBins argument directory must contain fastq files (.fq or .fastq)."
+    with pytest.raises(argparse.ArgumentTypeError, match=re.escape(errorOutput)):
+        args = parser.parse_args(benchmarkArgs)
+
+
+def test__conseq__set_command_line_settings__benchmark_fails_when_both_input_and_inputBins_are_given(
+    parser, benchmarkArgs, benchmarkFiles
+):
+    benchmarkArgs += ["-ib", benchmarkFiles.parentDir.name]
+    errorOutput = "argument -ib/--inputBins: not allowed with argument -i/--input"
+    with pytest.raises(argparse.ArgumentTypeError, match=re.escape(errorOutput)):
+        args = parser.parse_args(benchmarkArgs)
+
+
+def test__conseq__set_command_line_settings__benchmark_accepts_convergenceThreshold(
+    parser, benchmarkArgs
+):
+    benchmarkArgs += ["-ct", "0.25"]
+    args = vars(parser.parse_args(benchmarkArgs))
+    assert args["convergenceThreshold"] == 0.25
+
+
+def test__conseq__set_command_line_settings__benchmark_fails_when_convergenceThreshold_is_negative(
+    parser, benchmarkArgs
+):
+    errorValue = "-1"
+    benchmarkArgs += ["-ct", errorValue]
+    errorOutput = f"The -ct or --convergenceThreshold argument must be greater than or equal to 0. Offending value: {errorValue}"
+    with pytest.raises(argparse.ArgumentTypeError, match=re.escape(errorOutput)):
+        args = parser.parse_args(benchmarkArgs)
+
+
+def test__conseq__set_command_line_settings__benchmark_fails_when_convergenceThreshold_is_not_a_number(
+    parser, benchmarkArgs
+):
+    errorValue = "narrow"
+    benchmarkArgs += ["-ct", errorValue]
+    errorOutput = f"The -ct or --convergenceThreshold argument must be a number. Offending value: {errorValue}"
+    with pytest.raises(argparse.ArgumentTypeError, match=re.escape(errorOutput)):
+        args = parser.parse_args(benchmarkArgs)
+
+
 def test__conseq__set_command_line_settings__benchmark_fails_when_does_not_include_input_file(
     parser, benchmarkArgs
 ):
     benchmarkArgsWithoutInput = [benchmarkArgs[0]] + benchmarkArgs[3:]
-    errorOutput = "the following arguments are required: -i/--input"
+    errorOutput = "one of the arguments -i/--input -ib/--inputBins is required"
     with pytest.raises(argparse.ArgumentTypeError, match=re.escape(errorOutput)):
         args = parser.parse_args(benchmarkArgsWithoutInput)
 
@@ -781,12 +1047,28 @@ def test__conseq__set_command_line_settings__benchmark_succeeds_when_consensusAl
     assert args["consensusAlgorithm"] == "medaka"
 
 
+def test__conseq__set_command_line_settings__benchmark_succeeds_when_consensusAlgorithm_is_poa(
+    parser, benchmarkArgs
+):
+    benchmarkArgs += ["-c", "poa"]
+    args = vars(parser.parse_args(benchmarkArgs))
+    assert args["consensusAlgorithm"] == "poa"
+
+
+def test__conseq__set_command_line_settings__benchmark_accepts_several_consensusAlgorithms(
+    parser, benchmarkArgs
+):
+    benchmarkArgs += ["-c", "poa,pairwise,poa"]
+    args = vars(parser.parse_args(benchmarkArgs))
+    assert args["consensusAlgorithm"] == "poa,pairwise"
+
+
 def test__conseq__set_command_line_settings__benchmark_fails_when_consensusAlgorithm_is_not_recognized(
     parser, benchmarkArgs
 ):
     errorValue = "unidentified"
     benchmarkArgs += ["-c", errorValue]
-    errorOutput = f"The -c or --consensusAlgorithm argument must be 'pairwise', 'lamassemble' or 'medaka'. Offending value: {errorValue}"
+    errorOutput = f"The -c or --consensusAlgorithm argument must be 'pairwise', 'lamassemble', 'medaka' or 'poa'. Offending value: {errorValue}"
     with pytest.raises(argparse.ArgumentTypeError, match=re.escape(errorOutput)):
         args = parser.parse_args(benchmarkArgs)
 
@@ -922,6 +1204,24 @@ def test__conseq__set_command_line_settings__benchmark_fails_when_iterations_is_
         args = parser.parse_args(benchmarkArgs)
 
 
+def test__conseq__set_command_line_settings__benchmark_accepts_seed_of_zero(
+    parser, benchmarkArgs
+):
+    benchmarkArgs += ["-s", "0"]
+    args = vars(parser.parse_args(benchmarkArgs))
+    assert args["seed"] == 0
+
+
+def test__conseq__set_command_line_settings__benchmark_fails_when_seed_is_negative(
+    parser, benchmarkArgs
+):
+    errorValue = "-1"
+    benchmarkArgs += ["-s", errorValue]
+    errorOutput = f"The -s or --seed argument must be greater than or equal to 0. Offending value: {errorValue}"
+    with pytest.raises(argparse.ArgumentTypeError, match=re.escape(errorOutput)):
+        args = parser.parse_args(benchmarkArgs)
+
+
 def test__conseq__set_command_line_settings__benchmark_accepts_processNum(
     parser, benchmarkArgs
 ):